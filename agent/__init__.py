@@ -6,16 +6,31 @@ Contains AI-powered components for learning path recommendations and user onboar
 # Make this a proper Python package
 __version__ = "1.0.0"
 
-# Import key classes to make them available at package level
-try:
-    from .dynamic_role_manager import DynamicRoleManager, get_target_skills_for_role, get_role_profile_for_analysis
-    from .onboarding_agent import OnboardingAIAgent, bootstrap_user_onboarding, get_user_onboarding_status
-    from .resume_analyzer import ResumeAnalyzer, analyze_resume_for_role
-    from .department_mapping import DepartmentLearningPathManager, get_onboarding_learning_paths_for_user
-    from .role_skills import RoleSkillsManager
-    from .persistence import *
-    print("✅ Agent package imports successful")
-except ImportError as e:
-    print(f"⚠️ Warning: Could not import agent modules: {e}")
-    # Don't override successful imports with None
-    pass
\ No newline at end of file
+# Key classes are available at package level but imported on first access,
+# so importing one agent module (e.g. agent.supervisor) does not pull in the
+# resume parsers and their PDF/LLM dependencies
+from .persistence import *
+
+_LAZY_EXPORTS = {
+    "DynamicRoleManager": "dynamic_role_manager",
+    "get_target_skills_for_role": "dynamic_role_manager",
+    "get_role_profile_for_analysis": "dynamic_role_manager",
+    "OnboardingAIAgent": "onboarding_agent",
+    "bootstrap_user_onboarding": "onboarding_agent",
+    "get_user_onboarding_status": "onboarding_agent",
+    "ResumeAnalyzer": "resume_analyzer",
+    "analyze_resume_for_role": "resume_analyzer",
+    "DepartmentLearningPathManager": "department_mapping",
+    "get_onboarding_learning_paths_for_user": "department_mapping",
+    "RoleSkillsManager": "role_skills",
+}
+
+
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+    value = getattr(import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,190 @@
+"""
+Batch Resume Analysis
+Scores a directory or archive of resumes against one role in parallel
+
+Text extraction and heuristic scoring run in a process pool; results come
+back as one record per resume (JSON-serializable, ready to be written as
+JSONL) followed by a summary record. A resume that cannot be read or
+scored yields an error record instead of failing the batch.
+"""
+
+import os
+import time
+import shutil
+import tarfile
+import zipfile
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterator, List, Optional
+
+try:
+    from .resume_analyzer import ResumeAnalyzer, heuristic_skill_report
+except ImportError:
+    from resume_analyzer import ResumeAnalyzer, heuristic_skill_report
+
+RESUME_EXTENSIONS = {'.pdf', '.docx', '.doc', '.txt'}
+ARCHIVE_SUFFIXES = ('.zip', '.tar', '.tar.gz', '.tgz')
+
+# One analyzer per worker process, so compiled matchers are reused across resumes
+_worker_analyzer: Optional[ResumeAnalyzer] = None
+
+
+def is_archive(path: str) -> bool:
+    return path.lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def check_archive(archive_path: str, max_members: Optional[int] = None,
+                  max_bytes: Optional[int] = None) -> None:
+    """Raise ValueError if the archive has more than max_members files or unpacks to more than max_bytes."""
+    if archive_path.lower().endswith('.zip'):
+        with zipfile.ZipFile(archive_path) as archive:
+            sizes = [info.file_size for info in archive.infolist() if not info.is_dir()]
+    else:
+        with tarfile.open(archive_path) as archive:
+            sizes = [m.size for m in archive.getmembers() if m.isfile()]
+    if max_members is not None and len(sizes) > max_members:
+        raise ValueError(f"Archive has {len(sizes)} files; the limit is {max_members}")
+    if max_bytes is not None and sum(sizes) > max_bytes:
+        raise ValueError(f"Archive unpacks to {sum(sizes)} bytes; the limit is {max_bytes}")
+
+
+def extract_archive(archive_path: str, dest_dir: str, max_members: Optional[int] = None,
+                    max_bytes: Optional[int] = None) -> None:
+    """Unpack a zip or tar archive into dest_dir, refusing members that escape it or exceed the limits."""
+    check_archive(archive_path, max_members, max_bytes)
+    dest_root = os.path.realpath(dest_dir)
+
+    def _check(name: str) -> None:
+        target = os.path.realpath(os.path.join(dest_root, name))
+        if os.path.commonpath([dest_root, target]) != dest_root:
+            raise ValueError(f"Unsafe path in archive: {name}")
+
+    if archive_path.lower().endswith('.zip'):
+        with zipfile.ZipFile(archive_path) as archive:
+            for name in archive.namelist():
+                _check(name)
+            archive.extractall(dest_root)
+    else:
+        with tarfile.open(archive_path) as archive:
+            members = [m for m in archive.getmembers() if m.isfile() or m.isdir()]
+            for member in members:
+                _check(member.name)
+            archive.extractall(dest_root, members=members)
+
+
+def collect_resumes(directory: str) -> List[str]:
+    """Resume files under directory, sorted by relative path (hidden files skipped)."""
+    paths = []
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = [d for d in dirs if not d.startswith(('.', '__MACOSX'))]
+        for name in files:
+            if not name.startswith('.') and os.path.splitext(name)[1].lower() in RESUME_EXTENSIONS:
+                paths.append(os.path.join(root, name))
+    return sorted(paths, key=lambda p: os.path.relpath(p, directory))
+
+
+def resolve_role_skills(target_role: str, department: Optional[str] = None,
+                        data_dir: Optional[str] = None) -> List[str]:
+    """Skill names for a role: dynamic roles first, then the static role catalog."""
+    try:
+        from .dynamic_role_manager import DynamicRoleManager
+        from .role_skills import RoleSkillsManager
+    except ImportError:
+        from dynamic_role_manager import DynamicRoleManager
+        from role_skills import RoleSkillsManager
+
+    dynamic_role = DynamicRoleManager(data_dir).get_role_by_name(target_role, department)
+    if dynamic_role:
+        return [s.skill_name for s in dynamic_role.skills]
+    if data_dir is None:
+        data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+    role_profile = RoleSkillsManager(data_dir).get_role_by_name(target_role, department)
+    if not role_profile:
+        raise ValueError(f"Role '{target_role}' not found in department '{department}'")
+    return [skill["skill_name"] for skill in role_profile["skills"]]
+
+
+def analyze_one(index: int, path: str, role_skills: List[str], display_name: Optional[str] = None) -> Dict:
+    """Analyze one resume; never raises, failures become an error record."""
+    global _worker_analyzer
+    started = time.perf_counter()
+    record = {"type": "result", "index": index, "file": display_name or os.path.basename(path)}
+    try:
+        if _worker_analyzer is None:
+            _worker_analyzer = ResumeAnalyzer()
+        resume_text = _worker_analyzer.extract_text_from_file(path)
+        if not resume_text.strip():
+            raise ValueError("No text could be extracted from the resume")
+        report = heuristic_skill_report(_worker_analyzer, resume_text, role_skills)
+        record.update(status="ok", skills=report["skills"], summary=report["summary"])
+    except Exception as e:
+        record.update(status="error", error=f"{type(e).__name__}: {e}")
+    record["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return record
+
+
+def analyze_resumes(paths: List[str], role_skills: List[str], workers: Optional[int] = None,
+                    ordered: bool = True, base_dir: Optional[str] = None) -> Iterator[Dict]:
+    """Yield one result record per resume, then a summary record.
+
+    With ``ordered`` results come back in input order; otherwise as soon
+    as each finishes (every record carries its input ``index``). ``workers``
+    defaults to the CPU count; 1 analyzes in this process.
+    """
+    started = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    names = [os.path.relpath(p, base_dir) if base_dir else os.path.basename(p) for p in paths]
+    counts = {"ok": 0, "error": 0}
+
+    def _finish(record: Dict) -> Dict:
+        counts[record["status"]] += 1
+        return record
+
+    if workers == 1 or len(paths) <= 1:
+        for i, path in enumerate(paths):
+            yield _finish(analyze_one(i, path, role_skills, names[i]))
+    else:
+        pending = set(range(len(paths)))
+        try:
+            with ProcessPoolExecutor(max_workers=min(workers, len(paths))) as pool:
+                futures = {pool.submit(analyze_one, i, path, role_skills, names[i]): i
+                           for i, path in enumerate(paths)}
+                if ordered:
+                    results = (f.result() for f in futures)
+                else:
+                    results = (f.result() for f in as_completed(futures))
+                for record in results:
+                    pending.discard(record["index"])
+                    yield _finish(record)
+        except BrokenProcessPool as e:
+            # A worker died (e.g. a malformed PDF crashed the parser); report the rest
+            for i in sorted(pending):
+                yield _finish({"type": "result", "index": i, "file": names[i], "status": "error",
+                               "error": f"Worker process failed: {e}"})
+
+    yield {
+        "type": "summary",
+        "total": len(paths),
+        "succeeded": counts["ok"],
+        "failed": counts["error"],
+        "role_skills": role_skills,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)
+    }
+
+
+def analyze_source(source: str, role_skills: List[str], workers: Optional[int] = None,
+                   ordered: bool = True, max_members: Optional[int] = None,
+                   max_bytes: Optional[int] = None) -> Iterator[Dict]:
+    """analyze_resumes over a directory or archive; archives are unpacked to a temp dir within the limits."""
+    if os.path.isdir(source):
+        yield from analyze_resumes(collect_resumes(source), role_skills, workers, ordered, base_dir=source)
+        return
+    if not is_archive(source):
+        raise ValueError(f"Expected a directory or a .zip/.tar archive: {source}")
+    tmp_dir = tempfile.mkdtemp(prefix="resumes_")
+    try:
+        extract_archive(source, tmp_dir, max_members, max_bytes)
+        yield from analyze_resumes(collect_resumes(tmp_dir), role_skills, workers, ordered, base_dir=tmp_dir)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
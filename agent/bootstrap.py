@@ -5,23 +5,25 @@ from .models import UserSkillProfile
 import re
 import os
 
-# Try to import GROQ parser, fallback to heuristic if not available
-try:
-    from .groq_resume_parser import GroqResumeParser
-    GROQ_AVAILABLE = True
-except ImportError:
-    GROQ_AVAILABLE = False
-    print("GROQ parser not available - using heuristic method")
+def _groq_parser_class():
+    """The GROQ parser, imported on first use (it pulls in groq and the PDF/DOCX readers)."""
+    try:
+        from .groq_resume_parser import GroqResumeParser
+        return GroqResumeParser
+    except ImportError:
+        print("GROQ parser not available - using heuristic method")
+        return None
 
 def estimate_from_resume_enhanced(resume_text: str, skills: List[str], target_role: str = "") -> Dict[str, dict]:
 	"""
 	Enhanced resume skill extraction using GROQ AI if available, otherwise fallback to heuristic
 	"""
 	# Try GROQ first if available and API key is set
-	if GROQ_AVAILABLE and os.getenv('GROQ_API_KEY'):
+	parser_class = _groq_parser_class() if os.getenv('GROQ_API_KEY') else None
+	if parser_class is not None:
 		try:
 			print("🔍 Using GROQ AI for resume analysis...")
-			parser = GroqResumeParser()
+			parser = parser_class()
 			analysis = parser.parse_resume_for_skills(resume_text, skills, target_role)
 			
 			# Convert GROQ format to our expected format
@@ -137,74 +139,91 @@ def bootstrap_profile(user_id: str, role_id: str, resume_text: str) -> dict:
 	"""Enhanced bootstrap that integrates with onboarding agent"""
 	import traceback
 	try:
-		jd = persistence.get_jd(role_id)
-		# Support both {skills: {...}} and {required: [{skill, level}]}
-		if not jd:
-			raise ValueError(f"No JD for role {role_id}")
-		if 'skills' in jd:
-			skills = list(jd['skills'].keys())
-		elif 'required' in jd:
-			skills = [s['skill'] for s in jd['required']]
-		else:
-			raise ValueError(f"No skills or required in JD for role {role_id}")
-		
-		# Use enhanced resume analysis (GROQ + fallback)
-		role_name = role_id.replace('_', ' ').title()  # Convert role_id to readable name
-		est = estimate_from_resume_enhanced(resume_text, skills, role_name)
-		
-		profile_dict = {
-			"user_id": user_id,
-			"role_id": role_id,
-			"skills": {k: {"level": v["level"], "confidence": v["confidence"]} for k, v in est.items()}
-		}
-		persistence.save_user_profile(user_id, profile_dict)
-		
-		# For focus, convert required to skills if needed
-		if 'skills' not in jd and 'required' in jd:
-			jd_focus = {"skills": {s['skill']: {"required_level": s['level'], "importance": 1} for s in jd['required']}}
-		else:
-			jd_focus = dict(jd)
-			jd_focus.pop('role_id', None)
-		focus_points = focus.compute_focus_points(profile_dict, jd_focus)
-		persistence.upsert_focus(user_id, {"focus": focus_points})
-		
-		# Create audit entry with enhanced information
-		audit_entry = {
-			"event": "resume_bootstrap",
-			"profile": profile_dict,
-			"focus": focus_points,
-			"provenance": {
-				"resume_text": resume_text[:500] + "..." if len(resume_text) > 500 else resume_text,
-				"jd": jd,
-				"evidence": {k: v["evidence"][:100] + "..." if len(v["evidence"]) > 100 else v["evidence"] for k, v in est.items()}
-			},
-			"skill_analysis_summary": {
-				"total_skills_analyzed": len(skills),
-				"skills_found": len([k for k, v in est.items() if v["level"] > 1.0]),
-				"high_confidence_skills": len([k for k, v in est.items() if v["confidence"] > 0.7]),
-				"average_skill_level": sum(v["level"] for v in est.values()) / len(est) if est else 1.0
-			}
-		}
-		
-		persistence.append_audit(user_id, audit_entry)
-		
-		# Try to trigger onboarding analysis if available
-		try:
-			trigger_onboarding_analysis(user_id, role_id, resume_text, profile_dict)
-		except Exception as onboarding_error:
-			print(f"Warning: Onboarding analysis failed: {onboarding_error}")
-		
-		return {"profile": profile_dict, "focus": focus_points}
-		
+		return save_bootstrap(user_id, analyze_resume(user_id, role_id, resume_text))
 	except Exception as e:
 		print("[EXCEPTION in bootstrap_profile]", e)
 		traceback.print_exc()
 		raise
 
-def trigger_onboarding_analysis(user_id: str, role_id: str, resume_text: str, profile_dict: dict):
+def analyze_resume(user_id: str, role_id: str, resume_text: str) -> dict:
 	"""
-	Trigger enhanced onboarding analysis if the new system is available
-	This is called after basic bootstrap to provide additional insights
+	The slow half of bootstrap_profile: the resume parse (GROQ when configured), focus points and
+	audit entries. Nothing is written, so callers can run it before taking the state write lock.
+	"""
+	jd = persistence.get_jd(role_id)
+	# Support both {skills: {...}} and {required: [{skill, level}]}
+	if not jd:
+		raise ValueError(f"No JD for role {role_id}")
+	if 'skills' in jd:
+		skills = list(jd['skills'].keys())
+	elif 'required' in jd:
+		skills = [s['skill'] for s in jd['required']]
+	else:
+		raise ValueError(f"No skills or required in JD for role {role_id}")
+	
+	# Use enhanced resume analysis (GROQ + fallback)
+	role_name = role_id.replace('_', ' ').title()  # Convert role_id to readable name
+	est = estimate_from_resume_enhanced(resume_text, skills, role_name)
+	
+	profile_dict = {
+		"user_id": user_id,
+		"role_id": role_id,
+		"skills": {k: {"level": v["level"], "confidence": v["confidence"]} for k, v in est.items()}
+	}
+	
+	# For focus, convert required to skills if needed
+	if 'skills' not in jd and 'required' in jd:
+		jd_focus = {"skills": {s['skill']: {"required_level": s['level'], "importance": 1} for s in jd['required']}}
+	else:
+		jd_focus = dict(jd)
+		jd_focus.pop('role_id', None)
+	focus_points = focus.compute_focus_points(profile_dict, jd_focus)
+	
+	# Create audit entry with enhanced information
+	audit_entry = {
+		"event": "resume_bootstrap",
+		"profile": profile_dict,
+		"focus": focus_points,
+		"provenance": {
+			"resume_text": resume_text[:500] + "..." if len(resume_text) > 500 else resume_text,
+			"jd": jd,
+			"evidence": {k: v["evidence"][:100] + "..." if len(v["evidence"]) > 100 else v["evidence"] for k, v in est.items()}
+		},
+		"skill_analysis_summary": {
+			"total_skills_analyzed": len(skills),
+			"skills_found": len([k for k, v in est.items() if v["level"] > 1.0]),
+			"high_confidence_skills": len([k for k, v in est.items() if v["confidence"] > 0.7]),
+			"average_skill_level": sum(v["level"] for v in est.values()) / len(est) if est else 1.0
+		}
+	}
+	
+	# Typed so the seed profile can be found again when replaying the log (agent/replay.py)
+	audits = [{"event_type": "resume_bootstrap", "payload": audit_entry}]
+	
+	# Try to trigger onboarding analysis if available
+	try:
+		request = onboarding_request(user_id, role_id, resume_text, profile_dict)
+		if request is not None:
+			audits.append(request)
+	except Exception as onboarding_error:
+		print(f"Warning: Onboarding analysis failed: {onboarding_error}")
+	
+	return {"profile": profile_dict, "focus": focus_points, "audits": audits}
+
+def save_bootstrap(user_id: str, analysis: dict) -> dict:
+	"""Writes the profile, focus and audit entries of analyze_resume. Returns {profile, focus}."""
+	persistence.save_user_profile(user_id, analysis["profile"])
+	persistence.upsert_focus(user_id, {"focus": analysis["focus"]})
+	for entry in analysis["audits"]:
+		persistence.append_audit(user_id, entry)
+		if entry.get("event") == "enhanced_onboarding_requested":
+			print(f"✅ Enhanced onboarding analysis queued for {user_id}")
+	return {"profile": analysis["profile"], "focus": analysis["focus"]}
+
+def onboarding_request(user_id: str, role_id: str, resume_text: str, profile_dict: dict):
+	"""
+	The audit entry that queues enhanced onboarding analysis, if the new system is available
+	for role_id (None otherwise). It follows the basic bootstrap to provide additional insights
 	"""
 	try:
 		# Map legacy role_id to department and role name
@@ -219,8 +238,8 @@ def trigger_onboarding_analysis(user_id: str, role_id: str, resume_text: str, pr
 		if role_id in role_mapping:
 			role_name, department = role_mapping[role_id]
 			
-			# Store the enhanced analysis request for later processing
-			persistence.append_audit(user_id, {
+			# Stored with the bootstrap for later processing
+			return {
 				"event": "enhanced_onboarding_requested",
 				"role_mapping": {
 					"legacy_role_id": role_id,
@@ -232,11 +251,9 @@ def trigger_onboarding_analysis(user_id: str, role_id: str, resume_text: str, pr
 					"skill_indicators_found": len([k for k, v in profile_dict["skills"].items() if v["level"] > 1.0])
 				},
 				"timestamp": persistence._now()
-			})
-			
-			print(f"✅ Enhanced onboarding analysis queued for {user_id}")
+			}
 					
 	except Exception as e:
 		print(f"Enhanced onboarding analysis failed: {e}")
 		# Don't let this failure break the basic bootstrap process
-		pass
+	return None
@@ -1,7 +1,7 @@
 
 import os
 import json
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 BASE = os.path.dirname(os.path.dirname(__file__))
 MODULES_DIR = os.path.join(BASE, 'data', 'modules')
@@ -19,9 +19,10 @@ def _load_modules_catalog() -> List[dict]:
 					continue
 	return modules
 
-def compute_focus_points(profile_dict: dict, jd_dict: dict) -> List[dict]:
+def compute_focus_points(profile_dict: dict, jd_dict: dict, modules: Optional[List[dict]] = None) -> List[dict]:
 	"""
 	Returns top-3 focus points: [{skill, gap, suggested_modules: [module_id, ...]}]
+	modules is the catalog to suggest from; it is read from MODULES_DIR when omitted.
 	"""
 	print("[DEBUG] compute_focus_points: jd_dict type:", type(jd_dict), jd_dict)
 	skills = jd_dict.get('skills', {})
@@ -46,7 +47,8 @@ def compute_focus_points(profile_dict: dict, jd_dict: dict) -> List[dict]:
 	top_focus = focus[:3]
 
 	# Suggest modules for each focus skill
-	modules = _load_modules_catalog()
+	if modules is None:
+		modules = _load_modules_catalog()
 	for f in top_focus:
 		skill = f['skill']
 		# Find modules that cover this skill
@@ -3,13 +3,17 @@ Simple resume parser using Google Gemini 2.5 Flash
 Extracts skills from resume text with proficiency levels
 """
 
-import google.generativeai as genai
 import json
 import os
 from typing import Dict, List, Optional
 import PyPDF2
 import docx
 
+try:
+    from .llm_gateway import get_gateway
+except ImportError:
+    from llm_gateway import get_gateway
+
 class GeminiResumeParser:
     def __init__(self, api_key: Optional[str] = None):
         """
@@ -23,8 +27,9 @@ class GeminiResumeParser:
         if not api_key:
             raise ValueError("Gemini API key is required. Set GEMINI_API_KEY environment variable or pass api_key parameter.")
             
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-1.5-flash')
+        self.gateway = get_gateway()
+        self.gateway.use_api_key("gemini", api_key)
+        self.model = 'gemini-1.5-flash'
         
     def extract_text_from_pdf(self, file_path: str) -> str:
         """Extract text from PDF file"""
@@ -124,7 +129,7 @@ Respond in this exact JSON format:
 """
         
         try:
-            response = self.model.generate_content(prompt)
+            response = self.gateway.complete("gemini", prompt, model=self.model)
             
             # Clean the response and extract JSON
             response_text = response.text.strip()
@@ -145,6 +150,7 @@ Respond in this exact JSON format:
         except json.JSONDecodeError as e:
             print(f"JSON parsing error: {e}")
             print(f"Response was: {response.text}")
+            self.gateway.forget(response)
             # Return a fallback structure
             return self._create_fallback_analysis(target_skills)
             
@@ -3,13 +3,17 @@ Simple resume parser using GROQ API
 Extracts skills from resume text with proficiency levels
 """
 
-import groq
 import json
 import os
 from typing import Dict, List, Optional
 import PyPDF2
 import docx
 
+try:
+    from .llm_gateway import get_gateway
+except ImportError:
+    from llm_gateway import get_gateway
+
 class GroqResumeParser:
     def __init__(self, api_key: Optional[str] = None):
         """
@@ -23,7 +27,8 @@ class GroqResumeParser:
         if not api_key:
             raise ValueError("GROQ API key is required. Set GROQ_API_KEY environment variable or pass api_key parameter.")
 
-        self.client = groq.Groq(api_key=api_key)
+        self.gateway = get_gateway()
+        self.gateway.use_api_key("groq", api_key)
         self.model = "llama-3.1-8b-instant"  # Using Llama as it's good for analysis tasks
 
     def extract_text_from_pdf(self, file_path: str) -> str:
@@ -124,18 +129,18 @@ Respond in this exact JSON format:
 """
 
         try:
-            response = self.client.chat.completions.create(
+            response = self.gateway.complete(
+                "groq",
+                prompt,
                 model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are an expert resume analyzer. Always respond with valid JSON."},
-                    {"role": "user", "content": prompt}
-                ],
+                system="You are an expert resume analyzer. Always respond with valid JSON.",
                 temperature=0.1,  # Low temperature for consistent analysis
-                max_tokens=2000
+                max_tokens=2000,
+                cache=True
             )
 
             # Extract the response content
-            response_text = response.choices[0].message.content.strip()
+            response_text = response.text.strip()
 
             # Diagnostic: log raw response for debugging
             try:
@@ -161,6 +166,7 @@ Respond in this exact JSON format:
         except json.JSONDecodeError as e:
             print(f"JSON parsing error: {e}")
             print(f"Response text causing JSON error: {response_text}")
+            self.gateway.forget(response)
             # Return a fallback structure
             return self._create_fallback_analysis(target_skills)
 
@@ -0,0 +1,107 @@
+"""
+LLM Prompt Cache
+Content-addressed cache of LLM responses in SQLite, shared across processes
+
+Entries are keyed by a SHA-256 of provider, model, messages and sampling
+parameters, expire after ``ttl_seconds``, and are evicted least recently
+used once the stored text exceeds ``max_bytes``. The database runs in WAL
+mode so the auth, session and main server processes can share it.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Any, Dict, List, Optional
+
+
+def cache_key(provider: str, model: str, messages: List[Dict[str, str]], temperature: float,
+              max_tokens: Optional[int]) -> str:
+    payload = json.dumps([provider, model, messages, temperature, max_tokens], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class PromptCache:
+    def __init__(self, db_path: str, ttl_seconds: float = 7 * 24 * 3600, max_bytes: int = 64 * 1024 * 1024,
+                 evict_interval: int = 100):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        # Eviction runs every ``evict_interval`` writes rather than on each one
+        self.evict_interval = evict_interval
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.conn = sqlite3.connect(db_path, timeout=5, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+            "created REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """The cached response fields for ``key``, or None if missing or expired."""
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM responses WHERE key = ? AND created > ?",
+                                    (key, now - self.ttl_seconds)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        encoded = json.dumps(value, ensure_ascii=False)
+        now = time.time()
+        with self.lock:
+            self.conn.execute("INSERT OR REPLACE INTO responses (key, value, size, created, last_used) "
+                              "VALUES (?, ?, ?, ?, ?)", (key, encoded, len(encoded), now, now))
+            self._writes += 1
+            if self._writes % self.evict_interval == 0:
+                self._evict(now)
+
+    def discard(self, key: str) -> None:
+        with self.lock:
+            self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def _evict(self, now: float) -> None:
+        self.conn.execute("DELETE FROM responses WHERE created <= ?", (now - self.ttl_seconds,))
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Drop least recently used entries until back under 90% of the budget
+        excess = total - int(self.max_bytes * 0.9)
+        freed = 0
+        stale = []
+        for key, size in self.conn.execute("SELECT key, size FROM responses ORDER BY last_used"):
+            stale.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        self.conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+
+    def evict(self) -> None:
+        with self.lock:
+            self._evict(time.time())
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            entries, size = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "entries": entries,
+                "bytes": size,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds
+            }
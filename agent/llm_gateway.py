@@ -0,0 +1,562 @@
+"""
+LLM Gateway
+One place that owns LLM clients, concurrency limits, retries and metrics
+
+Every LLM call in the app goes through ``get_gateway()``:
+
+    response = get_gateway().complete("groq", "Summarize ...", model="llama-3.1-8b-instant")
+    response.text, response.prompt_tokens, response.latency_ms
+
+- Each provider has one pooled client, built on first use.
+- Each provider has a concurrency semaphore. A caller waits at most
+  ``queue_timeout`` seconds for a slot, then gets an LLMError, so one slow
+  provider cannot pile up Flask worker threads.
+- Timeouts, connection errors, rate limits and 5xx responses are retried
+  with exponential backoff and jitter.
+- A global retry budget caps retries at a fraction of recent requests, so
+  an outage does not turn into a retry storm.
+- Deterministic calls (temperature 0, or ``cache=True``) are answered from
+  a persistent PromptCache when the same model, messages and parameters
+  were seen within its TTL.
+- ``metrics()`` reports per-provider request counts, failures, retries,
+  latency percentiles, token usage and cache hit rates.
+
+Set ``LLM_PROVIDER=mock`` to answer every call from a local MockProvider
+(tests, offline development).
+"""
+
+import os
+import time
+import random
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Union
+
+try:
+    from .llm_cache import PromptCache, cache_key
+except ImportError:
+    from llm_cache import PromptCache, cache_key
+
+Messages = Union[str, List[Dict[str, str]]]
+
+
+class LLMError(Exception):
+    """An LLM call failed (after any retries) or was rejected by the gateway."""
+
+    def __init__(self, message: str, provider: str = "", retryable: bool = False):
+        super().__init__(message)
+        self.provider = provider
+        self.retryable = retryable
+
+
+@dataclass
+class LLMResponse:
+    text: str
+    provider: str
+    model: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    latency_ms: float = 0.0
+    attempts: int = 1
+    cached: bool = False
+    cache_key: Optional[str] = None
+
+    @property
+    def content(self) -> str:
+        # Same attribute name as langchain messages, for call sites ported from them
+        return self.text
+
+
+def _as_messages(prompt: Messages, system: Optional[str] = None) -> List[Dict[str, str]]:
+    messages = [{"role": "user", "content": prompt}] if isinstance(prompt, str) else list(prompt)
+    if system:
+        messages.insert(0, {"role": "system", "content": system})
+    return messages
+
+
+# Providers
+
+class Provider:
+    """One LLM backend. Subclasses implement ``complete`` and may override ``stream``."""
+
+    name = "base"
+    default_model = ""
+
+    def complete(self, messages: List[Dict[str, str]], model: str, temperature: float,
+                 max_tokens: Optional[int], timeout: float) -> LLMResponse:
+        raise NotImplementedError
+
+    def stream(self, messages: List[Dict[str, str]], model: str, temperature: float,
+               max_tokens: Optional[int], timeout: float) -> Iterator[str]:
+        yield self.complete(messages, model, temperature, max_tokens, timeout).text
+
+    def is_retryable(self, error: Exception) -> bool:
+        if isinstance(error, LLMError):
+            return error.retryable
+        return isinstance(error, (TimeoutError, ConnectionError))
+
+
+class GroqProvider(Provider):
+    """Groq chat completions over one shared, connection-pooled HTTP client."""
+
+    name = "groq"
+    default_model = "llama-3.1-8b-instant"
+
+    def __init__(self, api_key: Optional[str] = None, max_connections: int = 8):
+        import groq
+        import httpx
+        api_key = api_key or os.getenv('GROQ_API_KEY')
+        if not api_key:
+            raise ValueError("Groq API key is required. Set GROQ_API_KEY environment variable.")
+        self._groq = groq
+        # Retries are the gateway's job; the SDK must not retry on its own
+        self.client = groq.Groq(
+            api_key=api_key,
+            max_retries=0,
+            http_client=httpx.Client(limits=httpx.Limits(max_connections=max_connections,
+                                                         max_keepalive_connections=max_connections))
+        )
+
+    def complete(self, messages, model, temperature, max_tokens, timeout):
+        response = self.client.chat.completions.create(
+            model=model, messages=messages, temperature=temperature, max_tokens=max_tokens, timeout=timeout
+        )
+        usage = getattr(response, "usage", None)
+        return LLMResponse(
+            text=response.choices[0].message.content or "",
+            provider=self.name,
+            model=model,
+            prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+            completion_tokens=getattr(usage, "completion_tokens", 0) or 0
+        )
+
+    def stream(self, messages, model, temperature, max_tokens, timeout):
+        for chunk in self.client.chat.completions.create(
+            model=model, messages=messages, temperature=temperature, max_tokens=max_tokens,
+            timeout=timeout, stream=True
+        ):
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                yield delta
+
+    def is_retryable(self, error):
+        retryable = (self._groq.APITimeoutError, self._groq.APIConnectionError,
+                     self._groq.RateLimitError, self._groq.InternalServerError)
+        return isinstance(error, retryable) or super().is_retryable(error)
+
+
+class GeminiProvider(Provider):
+    """Google Gemini through langchain-google-genai, one client per model."""
+
+    name = "gemini"
+    default_model = "gemini-2.5-flash"
+
+    def __init__(self, api_key: Optional[str] = None):
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        self._client_class = ChatGoogleGenerativeAI
+        self.api_key = api_key or os.getenv('GEMINI_API_KEY') or os.getenv('GOOGLE_API_KEY')
+        if not self.api_key:
+            raise ValueError("Gemini API key is required. Set GEMINI_API_KEY or GOOGLE_API_KEY.")
+        self.clients: Dict[tuple, Any] = {}
+        self.lock = threading.Lock()
+
+    def _client(self, model: str, temperature: float, max_tokens: Optional[int], timeout: float):
+        key = (model, temperature, max_tokens, timeout)
+        with self.lock:
+            if key not in self.clients:
+                self.clients[key] = self._client_class(
+                    model=model, google_api_key=self.api_key, temperature=temperature,
+                    max_output_tokens=max_tokens, timeout=timeout, max_retries=0
+                )
+            return self.clients[key]
+
+    @staticmethod
+    def _prompt(messages):
+        return [(m["role"] if m["role"] != "assistant" else "ai", m["content"]) for m in messages]
+
+    def complete(self, messages, model, temperature, max_tokens, timeout):
+        message = self._client(model, temperature, max_tokens, timeout).invoke(self._prompt(messages))
+        usage = getattr(message, "usage_metadata", None) or {}
+        return LLMResponse(
+            text=message.content if isinstance(message.content, str) else str(message.content),
+            provider=self.name,
+            model=model,
+            prompt_tokens=usage.get("input_tokens", 0),
+            completion_tokens=usage.get("output_tokens", 0)
+        )
+
+    def stream(self, messages, model, temperature, max_tokens, timeout):
+        for chunk in self._client(model, temperature, max_tokens, timeout).stream(self._prompt(messages)):
+            if chunk.content:
+                yield chunk.content
+
+    def is_retryable(self, error):
+        name = type(error).__name__
+        return name in ("ResourceExhausted", "ServiceUnavailable", "DeadlineExceeded", "InternalServerError") \
+            or super().is_retryable(error)
+
+
+class MockProvider(Provider):
+    """Local provider for tests and offline development.
+
+    ``responses`` is a string, a list consumed in order (the last one
+    repeats), or a callable taking the message list. Entries that are
+    exceptions are raised instead of returned. Every call's messages are
+    kept in ``calls``.
+    """
+
+    name = "mock"
+    default_model = "mock-model"
+
+    def __init__(self, responses: Union[str, List[Any], Callable[[List[Dict[str, str]]], str]] = "mock response",
+                 latency: float = 0.0):
+        self.responses = responses
+        self.latency = latency
+        self.calls: List[List[Dict[str, str]]] = []
+        self.lock = threading.Lock()
+
+    def _next(self, messages):
+        with self.lock:
+            self.calls.append(messages)
+            if callable(self.responses):
+                return self.responses(messages)
+            if isinstance(self.responses, list):
+                return self.responses.pop(0) if len(self.responses) > 1 else self.responses[0]
+            return self.responses
+
+    def complete(self, messages, model, temperature, max_tokens, timeout):
+        if self.latency:
+            time.sleep(self.latency)
+        response = self._next(messages)
+        if isinstance(response, Exception):
+            raise response
+        prompt_words = sum(len(m["content"].split()) for m in messages)
+        return LLMResponse(text=response, provider=self.name, model=model,
+                           prompt_tokens=prompt_words, completion_tokens=len(response.split()))
+
+    def stream(self, messages, model, temperature, max_tokens, timeout):
+        text = self.complete(messages, model, temperature, max_tokens, timeout).text
+        for i, word in enumerate(text.split(" ")):
+            yield word if i == 0 else " " + word
+
+
+PROVIDER_FACTORIES: Dict[str, Callable[[], Provider]] = {
+    "groq": GroqProvider,
+    "gemini": GeminiProvider,
+    "mock": MockProvider,
+}
+
+
+# Gateway
+
+class RetryBudget:
+    """Retries allowed as a fraction of recent requests (plus a small floor).
+
+    Each first attempt deposits ``ratio`` tokens (up to ``max_tokens``) and
+    each retry spends one, so a broad outage degrades to roughly
+    ``ratio`` extra load instead of ``max_retries`` times the load.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_tokens: float = 10, max_tokens: float = 100):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = min_tokens
+        self.lock = threading.Lock()
+
+    def record_request(self) -> None:
+        with self.lock:
+            self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self.lock:
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+class ProviderStats:
+    def __init__(self, window: int = 512):
+        self.requests = 0
+        self.failures = 0
+        self.retries = 0
+        self.rejected = 0
+        self.in_flight = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.latencies: Deque[float] = deque(maxlen=window)
+
+    def snapshot(self) -> Dict[str, Any]:
+        latencies = sorted(self.latencies)
+
+        def pct(p):
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 1) if latencies else 0.0
+
+        return {
+            "requests": self.requests,
+            "failures": self.failures,
+            "retries": self.retries,
+            "rejected": self.rejected,
+            "in_flight": self.in_flight,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "latency_ms": {"p50": pct(0.5), "p95": pct(0.95), "max": round(latencies[-1], 1) if latencies else 0.0}
+        }
+
+
+class LLMGateway:
+    def __init__(self, timeout: float = 30.0, max_retries: int = 2, backoff_base: float = 0.5,
+                 backoff_max: float = 8.0, max_concurrency: int = 4, queue_timeout: float = 10.0,
+                 retry_budget: Optional[RetryBudget] = None, force_provider: Optional[str] = None,
+                 cache: Optional[PromptCache] = None):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self.retry_budget = retry_budget or RetryBudget()
+        self.force_provider = force_provider
+        self.cache = cache
+        self.providers: Dict[str, Provider] = {}
+        self.semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self.stats: Dict[str, ProviderStats] = {}
+        self.lock = threading.Lock()
+
+    def register(self, name: str, provider: Provider, max_concurrency: Optional[int] = None) -> Provider:
+        with self.lock:
+            self.providers[name] = provider
+            self.semaphores[name] = threading.BoundedSemaphore(max_concurrency or self.max_concurrency)
+            self.stats.setdefault(name, ProviderStats())
+        return provider
+
+    def provider(self, name: str) -> Provider:
+        """The provider registered as ``name``, building the default one on first use."""
+        if self.force_provider:
+            name = self.force_provider
+        provider = self.providers.get(name)
+        if provider is not None:
+            return provider
+        with self.lock:
+            if name in self.providers:
+                return self.providers[name]
+            if name not in PROVIDER_FACTORIES:
+                raise LLMError(f"Unknown LLM provider: {name}", provider=name)
+            provider = PROVIDER_FACTORIES[name]()
+        return self.register(name, provider)
+
+    def use_api_key(self, name: str, api_key: str) -> None:
+        """Build ``name`` with an explicit API key unless it is already set up."""
+        if self.force_provider or name in self.providers:
+            return
+        self.register(name, PROVIDER_FACTORIES[name](api_key=api_key))
+
+    def is_available(self, name: str) -> bool:
+        """True if ``name`` is registered or can be built (e.g. its API key is set)."""
+        try:
+            self.provider(name)
+            return True
+        except Exception:
+            return False
+
+    def _resolve(self, name: str):
+        provider = self.provider(name)
+        name = self.force_provider or name
+        return name, provider, self.semaphores[name], self.stats[name]
+
+    def _acquire(self, name: str, semaphore, stats: ProviderStats) -> None:
+        if not semaphore.acquire(timeout=self.queue_timeout):
+            with self.lock:
+                stats.rejected += 1
+            raise LLMError(f"{name}: all {self.max_concurrency} slots busy for {self.queue_timeout}s",
+                           provider=name, retryable=True)
+        with self.lock:
+            stats.in_flight += 1
+
+    def _release(self, semaphore, stats: ProviderStats) -> None:
+        with self.lock:
+            stats.in_flight -= 1
+        semaphore.release()
+
+    def _backoff(self, attempt: int) -> float:
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return delay * (0.5 + random.random() / 2)
+
+    def complete(self, provider: str, prompt: Messages, model: Optional[str] = None, temperature: float = 0.0,
+                 max_tokens: Optional[int] = None, system: Optional[str] = None,
+                 timeout: Optional[float] = None, cache: Optional[bool] = None) -> LLMResponse:
+        """Run one completion with caching, concurrency limiting, retries and metrics.
+
+        ``cache`` defaults to caching only temperature-0 calls.
+        """
+        name, backend, semaphore, stats = self._resolve(provider)
+        model = model or backend.default_model
+        messages = _as_messages(prompt, system)
+        timeout = timeout or self.timeout
+
+        key = None
+        if self.cache is not None and (temperature == 0 if cache is None else cache):
+            key = cache_key(name, model, messages, temperature, max_tokens)
+            hit = self.cache.get(key)
+            if hit is not None:
+                return LLMResponse(provider=name, model=model, cached=True, cache_key=key, **hit)
+        self.retry_budget.record_request()
+        with self.lock:
+            stats.requests += 1
+
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            self._acquire(name, semaphore, stats)
+            try:
+                response = backend.complete(messages, model, temperature, max_tokens, timeout)
+            except Exception as e:
+                error = e
+            else:
+                error = None
+            finally:
+                self._release(semaphore, stats)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+
+            if error is None:
+                response.latency_ms = elapsed_ms
+                response.attempts = attempt + 1
+                with self.lock:
+                    stats.latencies.append(elapsed_ms)
+                    stats.prompt_tokens += response.prompt_tokens
+                    stats.completion_tokens += response.completion_tokens
+                if key is not None:
+                    response.cache_key = key
+                    self.cache.put(key, {"text": response.text, "prompt_tokens": response.prompt_tokens,
+                                         "completion_tokens": response.completion_tokens})
+                return response
+
+            retryable = backend.is_retryable(error)
+            if not retryable or attempt >= self.max_retries or not self.retry_budget.try_spend():
+                with self.lock:
+                    stats.failures += 1
+                if isinstance(error, LLMError):
+                    raise error
+                raise LLMError(f"{name} call failed after {attempt + 1} attempt(s): {error}",
+                               provider=name, retryable=retryable) from error
+            with self.lock:
+                stats.retries += 1
+            time.sleep(self._backoff(attempt))
+            attempt += 1
+
+    def forget(self, response: LLMResponse) -> None:
+        """Drop a cached response the caller could not use (e.g. unparseable JSON)."""
+        if self.cache is not None and response.cache_key:
+            self.cache.discard(response.cache_key)
+
+    def stream(self, provider: str, prompt: Messages, model: Optional[str] = None, temperature: float = 0.0,
+               max_tokens: Optional[int] = None, system: Optional[str] = None,
+               timeout: Optional[float] = None) -> Iterator[str]:
+        """Stream text deltas; the provider slot is held until the stream ends. Not retried."""
+        name, backend, semaphore, stats = self._resolve(provider)
+        model = model or backend.default_model
+        messages = _as_messages(prompt, system)
+        self.retry_budget.record_request()
+        with self.lock:
+            stats.requests += 1
+        started = time.perf_counter()
+        self._acquire(name, semaphore, stats)
+        try:
+            completion_chars = 0
+            for delta in backend.stream(messages, model, temperature, max_tokens, timeout or self.timeout):
+                completion_chars += len(delta)
+                yield delta
+        except Exception as e:
+            with self.lock:
+                stats.failures += 1
+            if isinstance(e, LLMError):
+                raise
+            raise LLMError(f"{name} stream failed: {e}", provider=name) from e
+        else:
+            with self.lock:
+                stats.latencies.append((time.perf_counter() - started) * 1000)
+                # Streams carry no usage block; estimate at ~4 characters per token
+                stats.completion_tokens += completion_chars // 4
+        finally:
+            self._release(semaphore, stats)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "providers": {name: stats.snapshot() for name, stats in self.stats.items()},
+                "retry_budget_tokens": round(self.retry_budget.tokens, 2),
+                "max_concurrency": self.max_concurrency,
+                "cache": self.cache.stats() if self.cache is not None else None
+            }
+
+
+class ChatModel:
+    """Minimal langchain-style chat model (``invoke``/``stream`` returning objects
+    with ``.content``) backed by the gateway, for code written against langchain."""
+
+    def __init__(self, provider: str, model: Optional[str] = None, temperature: float = 0.0,
+                 max_tokens: Optional[int] = None, gateway: Optional[LLMGateway] = None,
+                 cache: Optional[bool] = None):
+        self.provider = provider
+        self.model = model
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.cache = cache
+        self._gateway = gateway
+
+    @property
+    def gateway(self) -> LLMGateway:
+        return self._gateway or get_gateway()
+
+    def invoke(self, prompt: Messages) -> LLMResponse:
+        return self.gateway.complete(self.provider, prompt, model=self.model, temperature=self.temperature,
+                                     max_tokens=self.max_tokens, cache=self.cache)
+
+    def stream(self, prompt: Messages) -> Iterator[LLMResponse]:
+        for delta in self.gateway.stream(self.provider, prompt, model=self.model,
+                                         temperature=self.temperature, max_tokens=self.max_tokens):
+            yield LLMResponse(text=delta, provider=self.provider, model=self.model or "")
+
+
+DEFAULT_CACHE_DB = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                'data', 'state', 'llm_cache.sqlite3')
+
+_gateway: Optional[LLMGateway] = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway() -> LLMGateway:
+    """Process-wide gateway configured from LLM_* environment variables."""
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                cache = None
+                if os.getenv("LLM_CACHE", "1") != "0":
+                    cache = PromptCache(
+                        os.getenv("LLM_CACHE_DB", DEFAULT_CACHE_DB),
+                        ttl_seconds=float(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600))),
+                        max_bytes=int(float(os.getenv("LLM_CACHE_MAX_MB", "64")) * 1024 * 1024)
+                    )
+                _gateway = LLMGateway(
+                    timeout=float(os.getenv("LLM_TIMEOUT_SECONDS", "30")),
+                    max_retries=int(os.getenv("LLM_MAX_RETRIES", "2")),
+                    max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "4")),
+                    queue_timeout=float(os.getenv("LLM_QUEUE_TIMEOUT_SECONDS", "10")),
+                    retry_budget=RetryBudget(ratio=float(os.getenv("LLM_RETRY_BUDGET_RATIO", "0.2"))),
+                    force_provider=os.getenv("LLM_PROVIDER") or None,
+                    cache=cache
+                )
+    return _gateway
+
+
+def peek_gateway() -> Optional[LLMGateway]:
+    """The process-wide gateway if it has already been built, without building it."""
+    return _gateway
+
+
+def set_gateway(gateway: Optional[LLMGateway]) -> None:
+    """Replace the process-wide gateway (tests); None rebuilds it from the environment."""
+    global _gateway
+    _gateway = gateway
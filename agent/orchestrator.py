@@ -3,10 +3,130 @@
 from . import bootstrap, supervisor, persistence
 from .models import EVENT_USER_CREATED, EVENT_ASSESSMENT_SUBMITTED, EVENT_MODULE_COMPLETED
 from datetime import datetime
+from collections import OrderedDict
+import copy
+
+class EventBatch:
+    """
+    Buffers the persistence calls of many events so each user is written once.
+    Profiles, focus, audit records and idempotency results are kept in memory;
+    flush() appends each user's audit records in one write and saves the rest.
+    """
+    def __init__(self):
+        self.profiles = {}
+        self.focus = {}
+        self.dirty_profiles = set()
+        self.audits = OrderedDict()
+        self.idempotency = {}
+        self.jds = {}
+        self.module_cache = {}
+        self.resume_analyses = {}
+        self._modules = None
+
+    @property
+    def modules(self):
+        # The catalog focus suggestions are drawn from, read once per batch
+        if self._modules is None:
+            from .focus import _load_modules_catalog
+            self._modules = _load_modules_catalog()
+        return self._modules
+
+    def append_audit(self, user_id, entry):
+        self.audits.setdefault(user_id, []).append(persistence._audit_record(entry))
+
+    def find_audit(self, user_id, idempotency_key, event_type=None):
+        yield from persistence.find_audit(user_id, idempotency_key, event_type)
+        for record in self.audits.get(user_id, []):
+            if persistence._idempotency_key_of(record) == idempotency_key and \
+                    (event_type is None or record["event_type"] == event_type):
+                yield record
+
+    def load_user_profile(self, user_id):
+        if user_id not in self.profiles:
+            self.profiles[user_id] = persistence.load_user_profile(user_id)
+        # Handlers mutate the profile they load; only a saved profile reaches the batch
+        return copy.deepcopy(self.profiles[user_id])
+
+    def save_user_profile(self, user_id, profile):
+        self.profiles[user_id] = copy.deepcopy(profile)
+        self.dirty_profiles.add(user_id)
+
+    def upsert_focus(self, user_id, focus_dict):
+        self.focus[user_id] = copy.deepcopy(focus_dict)
+
+    def load_idempotency(self, user_id, idempotency_key):
+        entry = self.idempotency.get(user_id, {}).get(idempotency_key)
+        if entry is not None:
+            return {"payload_hash": entry[0], "result": copy.deepcopy(entry[1])}
+        return persistence.load_idempotency(user_id, idempotency_key)
+
+    def save_idempotency(self, user_id, idempotency_key, payload_hash, result):
+        self.idempotency.setdefault(user_id, {})[idempotency_key] = (payload_hash, copy.deepcopy(result))
+
+    def prepare(self, events):
+        """
+        Runs the resume analysis (LLM calls) of the user_created events ahead of the
+        transaction they are handled in, so the state write lock is not held across them.
+        Events whose idempotency key already has a result are skipped.
+        """
+        seen = set()
+        for event in events:
+            if event.get("type") != EVENT_USER_CREATED or \
+                    any(event.get(field) is None for field in ("user_id", "role_id", "resume_text")):
+                continue
+            user_id, key = event.get("user_id"), event.get("idempotency_key")
+            if key and ((user_id, key) in seen or self.load_idempotency(user_id, key) is not None):
+                continue
+            seen.add((user_id, key))
+            try:
+                self.resume_analyses[id(event)] = bootstrap.analyze_resume(user_id, event["role_id"], event["resume_text"])
+            except Exception as e:
+                self.resume_analyses[id(event)] = e
+
+    def resume_analysis(self, event):
+        """The analysis prepared for event, or run now if it was not prepared."""
+        analysis = self.resume_analyses.pop(id(event), None)
+        if analysis is None:
+            analysis = bootstrap.analyze_resume(event["user_id"], event["role_id"], event["resume_text"])
+        if isinstance(analysis, Exception):
+            raise analysis
+        return analysis
+
+    def get_jd(self, role_id):
+        if role_id not in self.jds:
+            self.jds[role_id] = persistence.get_jd(role_id)
+        return self.jds[role_id]
+
+    def get_module(self, module_id):
+        if module_id not in self.module_cache:
+            self.module_cache[module_id] = persistence.get_module(module_id)
+        return self.module_cache[module_id]
+
+    def flush_user(self, user_id):
+        # Profile, focus and idempotency results land together or not at all; joins
+        # the caller's transaction when the events were handled inside one
+        with persistence.transaction():
+            if user_id in self.dirty_profiles:
+                self.dirty_profiles.discard(user_id)
+                persistence.save_user_profile(user_id, self.profiles[user_id])
+            if user_id in self.focus:
+                persistence.upsert_focus(user_id, self.focus.pop(user_id))
+            persistence.save_idempotency_many(user_id, self.idempotency.pop(user_id, {}))
+            # The audit log is a file, not part of the commit: appended last, before the
+            # outer COMMIT, while the write lock orders it against other writers of this user
+            persistence.append_audits(user_id, self.audits.pop(user_id, []))
+        self.profiles.pop(user_id, None)
+
+    def flush(self):
+        for user_id in set(self.audits) | self.dirty_profiles | set(self.focus) | set(self.idempotency):
+            self.flush_user(user_id)
 
 class Supervisor:
-    def handle_event(self, event: dict) -> dict:
-        """Dispatches event to handlers, manages idempotency & audit. Returns {profile, focus} or {ok:true} or {error:{...}}."""
+    def handle_event(self, event: dict, store=None) -> dict:
+        """Dispatches event to handlers, manages idempotency & audit. Returns {profile, focus} or {ok:true} or {error:{...}}.
+        Without a store the event runs as a batch of one, so its reads and state writes share one transaction."""
+        if store is None:
+            return self.handle_events([event])[0]
         from datetime import datetime, timezone
         now_iso = datetime.now(timezone.utc).replace(microsecond=0).isoformat().replace('+00:00', 'Z')
         import copy
@@ -37,7 +157,7 @@ class Supervisor:
             audit_payload = dict(payload)
             audit_payload["received_at"] = now_iso
             audit_payload["idempotency_key"] = idempotency_key
-            persistence.append_audit(user_id, {
+            store.append_audit(user_id, {
                 "event_type": event_type,
                 "payload": audit_payload
             })
@@ -59,7 +179,7 @@ class Supervisor:
                 "received_at": now_iso,
                 "idempotency_key": idempotency_key
             }
-            persistence.append_audit(user_id, {
+            store.append_audit(user_id, {
                 "event_type": event_type,
                 "payload": audit_payload
             })
@@ -70,52 +190,37 @@ class Supervisor:
                 "received_at": now_iso,
                 "idempotency_key": idempotency_key
             }
-            persistence.append_audit(user_id, {
+            store.append_audit(user_id, {
                 "event_type": event_type,
                 "payload": audit_payload
             })
 
         # Idempotency enforcement for write events (not for read-only events)
-        import os, json, hashlib
+        import json, hashlib
         idempotency_events = {EVENT_USER_CREATED, EVENT_MODULE_COMPLETED, EVENT_ASSESSMENT_SUBMITTED}
-        idemp_state = None
-        state_file = None
         payload_hash = None
         if idempotency_key and event_type in idempotency_events:
-            state_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'state')
-            os.makedirs(state_dir, exist_ok=True)
-            state_file = os.path.join(state_dir, f"{user_id}_idempotency.json")
-            # Load state
-            if os.path.exists(state_file):
-                with open(state_file, 'r', encoding='utf-8') as f:
-                    idemp_state = json.load(f)
-            else:
-                idemp_state = {}
             # Hash the payload (excluding idempotency_key)
             payload_for_hash = dict(payload)
             payload_for_hash.pop('idempotency_key', None)
             payload_bytes = json.dumps(payload_for_hash, sort_keys=True).encode('utf-8')
             payload_hash = hashlib.sha256(payload_bytes).hexdigest()
-            entry = idemp_state.get(idempotency_key)
+            entry = store.load_idempotency(user_id, idempotency_key)
             if entry and entry.get('payload_hash') == payload_hash:
                 # Always append audit for idempotent replay
                 cached_result = entry['result']
                 if event_type == EVENT_MODULE_COMPLETED:
-                    # Try to find deltas from previous audit entry for this idempotency_key
-                    from agent.persistence import load_audit
+                    # Deltas from the first audit entry for this idempotency_key, read via the audit index
                     deltas = None
                     try:
-                        audit_log = load_audit(user_id)
-                        for prev_audit_entry in audit_log:
-                            if prev_audit_entry.get("event_type") == event_type and prev_audit_entry.get("payload", {}).get("idempotency_key") == idempotency_key:
-                                # Check both locations for deltas
-                                deltas = None
-                                if "deltas" in prev_audit_entry:
-                                    deltas = prev_audit_entry["deltas"]
-                                elif "payload" in prev_audit_entry and isinstance(prev_audit_entry["payload"], dict):
-                                    deltas = prev_audit_entry["payload"].get("deltas")
-                                if deltas is not None:
-                                    break
+                        for prev_audit_entry in store.find_audit(user_id, idempotency_key, event_type):
+                            # Check both locations for deltas
+                            if "deltas" in prev_audit_entry:
+                                deltas = prev_audit_entry["deltas"]
+                            elif isinstance(prev_audit_entry.get("payload"), dict):
+                                deltas = prev_audit_entry["payload"].get("deltas")
+                            if deltas is not None:
+                                break
                     except Exception:
                         deltas = None
                     event_fields = copy.deepcopy(event)
@@ -132,7 +237,7 @@ class Supervisor:
                         "event_type": event_type,
                         "payload": audit_payload
                     }
-                    persistence.append_audit(user_id, audit_entry)
+                    store.append_audit(user_id, audit_entry)
                 return cached_result
 
         # --- Event Routing ---
@@ -142,18 +247,20 @@ class Supervisor:
             if event_type == EVENT_USER_CREATED:
                 # Expect user_id, role_id, resume_text
                 try:
-                    out = bootstrap.bootstrap_profile(user_id, event["role_id"], event["resume_text"])
+                    analysis = store.resume_analysis(event)
                 except Exception as e:
                     return {"error": {"code": "NOT_FOUND", "message": str(e), "details": {"event": event}}}
-                persistence.save_user_profile(user_id, out["profile"])
-                persistence.upsert_focus(user_id, {"focus": out["focus"]})
-                result = out
+                store.save_user_profile(user_id, analysis["profile"])
+                store.upsert_focus(user_id, {"focus": analysis["focus"]})
+                for entry in analysis["audits"]:
+                    store.append_audit(user_id, entry)
+                result = {"profile": analysis["profile"], "focus": analysis["focus"]}
 
             elif event_type == EVENT_MODULE_COMPLETED:
                 # Expect user_id, skill, target_level, completion_type, optional score
-                profile = persistence.load_user_profile(user_id)
-                module = persistence.get_module(event.get("module_id"))
-                jd = persistence.get_jd(profile["role_id"]) if profile else None
+                profile = store.load_user_profile(user_id)
+                module = store.get_module(event.get("module_id"))
+                jd = store.get_jd(profile["role_id"]) if profile else None
                 print("[DEBUG] JD loaded for role_id", profile["role_id"] if profile else None, ":", jd)
                 if not profile:
                     return {"error": {"code": "NOT_FOUND", "message": "Profile not found", "details": {"user_id": user_id}}}
@@ -189,11 +296,11 @@ class Supervisor:
                         "target_level": target_level
                     })
                 # Save profile and focus
-                persistence.save_user_profile(user_id, profile)
+                store.save_user_profile(user_id, profile)
                 print(f"[DEBUG] About to call compute_focus_points. profile type: {type(profile)}, profile: {profile}")
                 print(f"[DEBUG] About to call compute_focus_points. jd type: {type(jd)}, jd: {jd}")
-                focus_points = focus.compute_focus_points(profile, jd)
-                persistence.upsert_focus(user_id, {"focus": focus_points})
+                focus_points = focus.compute_focus_points(profile, jd, getattr(store, "modules", None))
+                store.upsert_focus(user_id, {"focus": focus_points})
                 # Audit per-skill delta (use correct nested structure)
                 event_fields = copy.deepcopy(event)
                 for k in ["deltas", "received_at", "idempotency_key"]:
@@ -205,7 +312,7 @@ class Supervisor:
                     "received_at": now_iso,
                     "idempotency_key": idempotency_key
                 }
-                persistence.append_audit(user_id, {
+                store.append_audit(user_id, {
                     "event_type": event_type,
                     "payload": audit_payload
                 })
@@ -216,14 +323,9 @@ class Supervisor:
                 # TODO: Map assessments to skill updates
                 result = {"ok": True, "todo": "Map assessment to skill updates"}
 
-            if idempotency_key and event_type in idempotency_events and state_file and payload_hash is not None:
-                # Store result in idempotency state
-                idemp_state[idempotency_key] = {
-                    'payload_hash': payload_hash,
-                    'result': result
-                }
-                with open(state_file, 'w', encoding='utf-8') as f:
-                    json.dump(idemp_state, f, indent=2)
+            if idempotency_key and event_type in idempotency_events and payload_hash is not None:
+                # Store result in the bounded per-user idempotency store
+                store.save_idempotency(user_id, idempotency_key, payload_hash, result)
             return result if result is not None else {"ok": True}
         except Exception as e:
             import traceback
@@ -232,221 +334,37 @@ class Supervisor:
                 traceback.print_exc(file=f)
             # Standardized error for any failure
             return {"error": {"code": "NOT_FOUND", "message": str(e), "details": {"event": event}}}
-        # Validation: required fields per event type
-        required_fields = {
-            EVENT_USER_CREATED: ["user_id", "role_id", "resume_text"],
-            EVENT_MODULE_COMPLETED: ["user_id", "skill", "target_level", "completion_type"],
-            EVENT_ASSESSMENT_SUBMITTED: ["user_id", "assessment_id", "score"],
-        }
-        missing = []
-        if event_type in required_fields:
-            for field in required_fields[event_type]:
-                if event.get(field) is None:
-                    missing.append(field)
-        if missing:
-            error = {
-                "error": {
-                    "code": "MISSING_FIELD",
-                    "message": f"Missing required fields: {', '.join(missing)}",
-                    "details": {"missing": missing}
-                }
-            }
-            # Audit even on error
-            audit_payload = dict(payload)
-            audit_payload["received_at"] = now_iso
-            audit_payload["idempotency_key"] = idempotency_key
-            persistence.append_audit(user_id, {
-                "event_type": event_type,
-                "payload": audit_payload
-            })
-            return error
-        # Audit every event
-        if event_type == EVENT_MODULE_COMPLETED:
-            event_fields = copy.deepcopy(event)
-            for k in ["deltas", "received_at", "idempotency_key"]:
-                if k in event_fields:
-                    event_fields.pop(k)
-            deltas = None
-            if "deltas" in payload and isinstance(payload["deltas"], list):
-                deltas = payload["deltas"]
-            if deltas is None:
-                deltas = []
-            audit_payload = {
-                "payload": event_fields,
-                "deltas": deltas,
-                "received_at": now_iso,
-                "idempotency_key": idempotency_key
-            }
-            persistence.append_audit(user_id, {
-                "event_type": event_type,
-                "payload": audit_payload
-            })
-        else:
-            audit_payload = dict(payload)
-            audit_payload = {
-                "payload": audit_payload,
-                "received_at": now_iso,
-                "idempotency_key": idempotency_key
-            }
-            persistence.append_audit(user_id, {
-                "event_type": event_type,
-                "payload": audit_payload
-            })
-
-        # Idempotency enforcement for write events (not for read-only events)
-        import os, json, hashlib
-        idempotency_events = {EVENT_USER_CREATED, EVENT_MODULE_COMPLETED, EVENT_ASSESSMENT_SUBMITTED}
-        idemp_state = None
-        state_file = None
-        payload_hash = None
-        if idempotency_key and event_type in idempotency_events:
-            state_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'state')
-            os.makedirs(state_dir, exist_ok=True)
-            state_file = os.path.join(state_dir, f"{user_id}_idempotency.json")
-            # Load state
-            if os.path.exists(state_file):
-                with open(state_file, 'r', encoding='utf-8') as f:
-                    idemp_state = json.load(f)
-            else:
-                idemp_state = {}
-            # Hash the payload (excluding idempotency_key)
-            payload_for_hash = dict(payload)
-            payload_for_hash.pop('idempotency_key', None)
-            payload_bytes = json.dumps(payload_for_hash, sort_keys=True).encode('utf-8')
-            payload_hash = hashlib.sha256(payload_bytes).hexdigest()
-            entry = idemp_state.get(idempotency_key)
-            if entry and entry.get('payload_hash') == payload_hash:
-                # Always append audit for idempotent replay
-                cached_result = entry['result']
-                if event_type == EVENT_MODULE_COMPLETED:
-                    # Try to find deltas from previous audit entry for this idempotency_key
-                    from agent.persistence import load_audit
-                    deltas = None
-                    try:
-                        audit_log = load_audit(user_id)
-                        for prev_audit_entry in audit_log:
-                            if prev_audit_entry.get("event_type") == event_type and prev_audit_entry.get("payload", {}).get("idempotency_key") == idempotency_key:
-                                # Check both locations for deltas
-                                deltas = None
-                                if "deltas" in prev_audit_entry:
-                                    deltas = prev_audit_entry["deltas"]
-                                elif "payload" in prev_audit_entry and isinstance(prev_audit_entry["payload"], dict):
-                                    deltas = prev_audit_entry["payload"].get("deltas")
-                                if deltas is not None:
-                                    break
-                    except Exception:
-                        deltas = None
-                    event_fields = copy.deepcopy(event)
-                    for k in ["deltas", "received_at", "idempotency_key"]:
-                        if k in event_fields:
-                            event_fields.pop(k)
-                    audit_payload = {
-                        "payload": event_fields,
-                        "deltas": deltas if deltas is not None else [],
-                        "received_at": now_iso,
-                        "idempotency_key": idempotency_key
-                    }
-                    audit_entry = {
-                        "event_type": event_type,
-                        "payload": audit_payload
-                    }
-                    persistence.append_audit(user_id, audit_entry)
-                return cached_result
-
-        # --- Event Routing ---
-        try:
-            from . import bootstrap, update_math, focus
-            result = None
-            if event_type == EVENT_USER_CREATED:
-                # Expect user_id, role_id, resume_text
-                try:
-                    out = bootstrap.bootstrap_profile(user_id, event["role_id"], event["resume_text"])
-                except Exception as e:
-                    return {"error": {"code": "NOT_FOUND", "message": str(e), "details": {"event": event}}}
-                persistence.save_user_profile(user_id, out["profile"])
-                persistence.upsert_focus(user_id, {"focus": out["focus"]})
-                result = out
-
-            elif event_type == EVENT_MODULE_COMPLETED:
-                # Expect user_id, skill, target_level, completion_type, optional score
-                profile = persistence.load_user_profile(user_id)
-                module = persistence.get_module(event.get("module_id"))
-                jd = persistence.get_jd(profile["role_id"]) if profile else None
-                print("[DEBUG] JD loaded for role_id", profile["role_id"] if profile else None, ":", jd)
-                if not profile:
-                    return {"error": {"code": "NOT_FOUND", "message": "Profile not found", "details": {"user_id": user_id}}}
-                if not module:
-                    return {"error": {"code": "NOT_FOUND", "message": "Module not found", "details": {"module_id": event.get("module_id")}}}
-                if not jd:
-                    return {"error": {"code": "NOT_FOUND", "message": "JD not found", "details": {"role_id": profile.get("role_id")}}}
-                # For each skills_covered in module
-                audit_deltas = []
-                for skill_meta in module.get("skills_covered", []):
-                    print("[DEBUG] skill_meta type:", type(skill_meta), skill_meta)
-                    skill = skill_meta["skill"]
-                    weight = skill_meta.get("weight", 1.0)
-                    target_level = skill_meta.get("target_level", event.get("target_level", 1.0))
-                    has_assessment = skill_meta.get("has_assessment", event.get("has_assessment", False))
-                    pass_threshold = skill_meta.get("pass_threshold", event.get("pass_threshold"))
-                    completion_type = event.get("completion_type")
-                    score = event.get("score")
-                    # Compute alpha
-                    alpha = update_math.compute_alpha(weight, completion_type, has_assessment, score, pass_threshold)
-                    # Update skill
-                    old = profile["skills"].get(skill, {"level": 1.0, "confidence": 0.3})
-                    print("[DEBUG] old skill dict type:", type(old), old)
-                    print("[DEBUG] event type:", type(event), event)
-                    L_old, C_old = old["level"], old["confidence"]
-                    L_new, C_new = update_math.update_skill(L_old, C_old, target_level, alpha, completion_type, score, has_assessment)
-                    delta_level = L_new - L_old
-                    profile["skills"][skill] = {"level": round(L_new, 2), "confidence": round(C_new, 2)}
-                    audit_deltas.append({
-                        "skill": skill,
-                        "delta_level": delta_level,
-                        "alpha": alpha,
-                        "target_level": target_level
-                    })
-                # Save profile and focus
-                persistence.save_user_profile(user_id, profile)
-                print(f"[DEBUG] About to call compute_focus_points. profile type: {type(profile)}, profile: {profile}")
-                print(f"[DEBUG] About to call compute_focus_points. jd type: {type(jd)}, jd: {jd}")
-                focus_points = focus.compute_focus_points(profile, jd)
-                persistence.upsert_focus(user_id, {"focus": focus_points})
-                # Audit per-skill delta (use correct nested structure)
-                event_fields = copy.deepcopy(event)
-                for k in ["deltas", "received_at", "idempotency_key"]:
-                    if k in event_fields:
-                        event_fields.pop(k)
-                audit_payload = {
-                    "payload": event_fields,
-                    "deltas": audit_deltas,
-                    "received_at": now_iso,
-                    "idempotency_key": idempotency_key
-                }
-                persistence.append_audit(user_id, {
-                    "event_type": event_type,
-                    "payload": audit_payload
-                })
-                result = {"profile": profile, "focus": focus_points}
 
-            elif event_type == EVENT_ASSESSMENT_SUBMITTED:
-                # For now, just audit and return ok
-                # TODO: Map assessments to skill updates
-                result = {"ok": True, "todo": "Map assessment to skill updates"}
+    def handle_events(self, events: list, flush_every: int = 0) -> list:
+        """
+        Handles many events (a bulk import or a replayed backlog) with the same
+        results as calling handle_event on each in order, but each user's profile,
+        focus and idempotency store is written once and their audit records are
+        appended in one write.
 
-            if idempotency_key and event_type in idempotency_events and state_file and payload_hash is not None:
-                # Store result in idempotency state
-                idemp_state[idempotency_key] = {
-                    'payload_hash': payload_hash,
-                    'result': result
-                }
-                with open(state_file, 'w', encoding='utf-8') as f:
-                    json.dump(idemp_state, f, indent=2)
-            return result if result is not None else {"ok": True}
-        except Exception as e:
-            import traceback
-            with open("traceback.log", "a") as f:
-                f.write("\n[Exception in handle_event at {}]\n".format(datetime.now(timezone.utc).isoformat()))
-                traceback.print_exc(file=f)
-            # Standardized error for any failure
-            return {"error": {"code": "NOT_FOUND", "message": str(e), "details": {"event": event}}}
+        Each user's events are handled inside one BEGIN IMMEDIATE transaction, so
+        the reads they depend on and the writes they make are atomic against any
+        other process handling events for the same user. Resume analysis for
+        user_created events runs before the transaction opens. The audit log is a
+        file outside the commit: its records are appended after the state writes but
+        before COMMIT, so a crash or failed commit in between leaves audit records for
+        state that was rolled back. The idempotency result is rolled back with it, so
+        a retry is applied again and logged again; replay keeps only the last applied
+        record of an idempotency key. flush_every > 0 commits a user's events in runs
+        of that many, bounding how long the lock is held.
+        """
+        batch = EventBatch()
+        results = [None] * len(events)
+        by_user = OrderedDict()
+        for i, event in enumerate(events):
+            by_user.setdefault(event.get("user_id"), []).append(i)
+        for user_id, indexes in by_user.items():
+            step = flush_every or len(indexes)
+            for start in range(0, len(indexes), step):
+                run = indexes[start:start + step]
+                batch.prepare([events[i] for i in run])
+                with persistence.transaction():
+                    for i in run:
+                        results[i] = self.handle_event(events[i], batch)
+                    batch.flush()
+        return results
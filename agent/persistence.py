@@ -13,28 +13,82 @@ def _ensure_dir(path: str):
 	os.makedirs(os.path.dirname(path), exist_ok=True)
 
 def load_user_profile(user_id: str) -> Optional[dict]:
-	path = os.path.join(STATE_DIR, f'{user_id}_profile.json')
-	if not os.path.exists(path):
-		return None
-	with open(path, 'r', encoding='utf-8') as f:
-		return json.load(f)
+	return state_store().get(user_id, 'profile')
 
 def save_user_profile(user_id: str, profile_dict: dict) -> None:
-	path = os.path.join(STATE_DIR, f'{user_id}_profile.json')
-	_ensure_dir(path)
-	with open(path, 'w', encoding='utf-8') as f:
-		json.dump(profile_dict, f, indent=2, ensure_ascii=False)
+	state_store().put(user_id, 'profile', profile_dict)
 
 
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
 from datetime import datetime, timezone
 
-def append_audit(user_id: str, entry: dict) -> None:
-	"""
-	Appends an audit entry with ts, event_type, and payload.
-	"""
-	print(f"[DEBUG] append_audit entry type: {type(entry)}, entry: {entry}")
-	path = os.path.join(STATE_DIR, f'{user_id}_audit.jsonl')
-	_ensure_dir(path)
+AUDIT_SUFFIX = '_audit.jsonl'
+AUDIT_INDEX_SUFFIX = '_audit.idx'
+IDEMPOTENCY_SUFFIX = '_idempotency.json'
+# Idempotency records kept per user: at most this many, none older than the TTL
+IDEMPOTENCY_MAX_KEYS = int(os.getenv('IDEMPOTENCY_MAX_KEYS', '1000'))
+IDEMPOTENCY_TTL_SECONDS = float(os.getenv('IDEMPOTENCY_TTL_DAYS', '30')) * 24 * 3600
+
+_audit_lock = threading.Lock()
+# user_id -> {"ino", "size", "keys": {idempotency_key: [(event_type, offset, length), ...]}}
+_audit_indexes = {}
+
+def _audit_path(user_id: str) -> str:
+	return os.path.join(STATE_DIR, f'{user_id}{AUDIT_SUFFIX}')
+
+def _audit_index_path(user_id: str) -> str:
+	return os.path.join(STATE_DIR, f'{user_id}{AUDIT_INDEX_SUFFIX}')
+
+def _idempotency_key_of(audit_entry: dict) -> Optional[str]:
+	payload = audit_entry.get("payload")
+	return payload.get("idempotency_key") if isinstance(payload, dict) else None
+
+def _rebuild_audit_index(user_id: str) -> None:
+	"""Writes the sidecar index for an audit log that predates it (one full scan)."""
+	lines = []
+	offset = 0
+	path = _audit_path(user_id)
+	if os.path.exists(path):
+		with open(path, 'rb') as f:
+			for raw in f:
+				if raw.strip():
+					entry = json.loads(raw)
+					key = _idempotency_key_of(entry)
+					if key:
+						lines.append(json.dumps([key, entry.get("event_type"), offset, len(raw)]) + '\n')
+				offset += len(raw)
+	index_path = _audit_index_path(user_id)
+	_ensure_dir(index_path)
+	with open(index_path + '.tmp', 'w', encoding='utf-8') as f:
+		f.writelines(lines)
+	os.replace(index_path + '.tmp', index_path)
+	_audit_indexes.pop(user_id, None)
+
+def _load_audit_index(user_id: str) -> dict:
+	"""The user's idempotency_key index, reading only lines appended since the last call."""
+	index_path = _audit_index_path(user_id)
+	if not os.path.exists(index_path):
+		_rebuild_audit_index(user_id)
+	stat = os.stat(index_path)
+	cached = _audit_indexes.get(user_id)
+	if cached is None or cached["ino"] != stat.st_ino or cached["size"] > stat.st_size:
+		cached = _audit_indexes[user_id] = {"ino": stat.st_ino, "size": 0, "keys": {}}
+	if cached["size"] < stat.st_size:
+		with open(index_path, 'rb') as f:
+			f.seek(cached["size"])
+			tail = f.read(stat.st_size - cached["size"])
+		# Only whole lines; a partially written last line is picked up next time
+		complete = tail[:tail.rfind(b'\n') + 1]
+		for line in complete.splitlines():
+			key, event_type, offset, length = json.loads(line)
+			cached["keys"].setdefault(key, []).append((event_type, offset, length))
+		cached["size"] += len(complete)
+	return cached["keys"]
+
+def _audit_record(entry: dict) -> dict:
 	ts = entry.get("ts") or datetime.now(timezone.utc).isoformat()
 	event_type = entry.get("event_type")
 	if not event_type:
@@ -46,43 +100,282 @@ def append_audit(user_id: str, entry: dict) -> None:
 	if not event_type:
 		event_type = "unknown"
 	payload = entry.get("payload") or entry.get("event") or entry
-	audit_entry = {"ts": ts, "event_type": event_type, "payload": payload}
-	with open(path, 'a', encoding='utf-8') as f:
-		f.write(json.dumps(audit_entry, ensure_ascii=False) + '\n')
+	return {"ts": ts, "event_type": event_type, "payload": payload}
+
+def append_audit(user_id: str, entry: dict) -> int:
+	"""
+	Appends an audit entry with ts, event_type, and payload. Returns its byte offset.
+	Entries carrying an idempotency_key are also recorded in the sidecar index.
+	"""
+	print(f"[DEBUG] append_audit entry type: {type(entry)}, entry: {entry}")
+	return append_audits(user_id, [entry])[0]
+
+def append_audits(user_id: str, entries: list) -> list:
+	"""
+	Appends several audit entries in one write (and one index write). Returns their byte offsets.
+	"""
+	if not entries:
+		return []
+	path = _audit_path(user_id)
+	_ensure_dir(path)
+	records = [_audit_record(entry) for entry in entries]
+	lines = [(json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8') for record in records]
+	with _audit_lock:
+		keyed = any(_idempotency_key_of(record) for record in records)
+		if keyed and not os.path.exists(_audit_index_path(user_id)):
+			_rebuild_audit_index(user_id)
+		with open(path, 'ab') as f:
+			offset = f.seek(0, os.SEEK_END)
+			f.write(b''.join(lines))
+		offsets = []
+		index_lines = []
+		for record, line in zip(records, lines):
+			offsets.append(offset)
+			key = _idempotency_key_of(record)
+			if key:
+				index_lines.append(json.dumps([key, record["event_type"], offset, len(line)]) + '\n')
+			offset += len(line)
+		if index_lines:
+			with open(_audit_index_path(user_id), 'a', encoding='utf-8') as f:
+				f.writelines(index_lines)
+	return offsets
 
 def load_audit(user_id: str) -> list:
 	"""
 	Loads the audit log for a user as a list of events.
 	"""
-	path = os.path.join(STATE_DIR, f'{user_id}_audit.jsonl')
+	path = _audit_path(user_id)
 	if not os.path.exists(path):
 		return []
 	with open(path, 'r', encoding='utf-8') as f:
 		return [json.loads(line) for line in f if line.strip()]
 
-def get_jd(role_id: str) -> Optional[dict]:
-	path = os.path.join(JD_DIR, f'{role_id}.json')
+def find_audit(user_id: str, idempotency_key: str, event_type: Optional[str] = None):
+	"""
+	Yields the audit entries recorded with idempotency_key (oldest first), reading
+	each by its indexed offset instead of parsing the whole log.
+	"""
+	path = _audit_path(user_id)
 	if not os.path.exists(path):
+		return
+	with _audit_lock:
+		refs = list(_load_audit_index(user_id).get(idempotency_key, []))
+	with open(path, 'rb') as f:
+		for ref_type, offset, length in refs:
+			if event_type is not None and ref_type != event_type:
+				continue
+			f.seek(offset)
+			try:
+				entry = json.loads(f.read(length))
+			except ValueError:
+				entry = {}
+			if not isinstance(entry, dict) or _idempotency_key_of(entry) != idempotency_key:
+				# The log was rewritten under the index; fall back to a full scan once
+				with _audit_lock:
+					_rebuild_audit_index(user_id)
+				for entry in load_audit(user_id):
+					if _idempotency_key_of(entry) == idempotency_key and event_type in (None, entry.get("event_type")):
+						yield entry
+				return
+			yield entry
+
+STATE_DB_NAME = 'user_state.sqlite3'
+# Legacy per-user files, read when a user has nothing in the state database yet
+_LEGACY_SUFFIXES = {'profile': '_profile.json', 'focus': FOCUS_SUFFIX, 'idempotency': IDEMPOTENCY_SUFFIX}
+
+class UserStateStore:
+	"""
+	Profiles, focus and idempotency results of every user in one SQLite database (WAL mode).
+	Writes inside transaction() commit together; each connection belongs to one thread.
+	Users still kept in the legacy per-user JSON files are imported on first read.
+	"""
+	def __init__(self, path: str, legacy_dir: Optional[str] = None):
+		self.path = path
+		self.legacy_dir = legacy_dir or os.path.dirname(path)
+		self._local = threading.local()
+		self._checked = set()
+
+	def _conn(self) -> sqlite3.Connection:
+		conn = getattr(self._local, 'conn', None)
+		# A forked worker opens its own connection rather than sharing its parent's
+		if conn is None or self._local.pid != os.getpid():
+			_ensure_dir(self.path)
+			conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+			conn.execute('PRAGMA journal_mode=WAL')
+			conn.execute('PRAGMA synchronous=NORMAL')
+			conn.execute('CREATE TABLE IF NOT EXISTS user_state (user_id TEXT NOT NULL, kind TEXT NOT NULL, '
+				'value TEXT NOT NULL, updated REAL NOT NULL, PRIMARY KEY (user_id, kind))')
+			conn.execute('CREATE TABLE IF NOT EXISTS idempotency (user_id TEXT NOT NULL, key TEXT NOT NULL, '
+				'payload_hash TEXT, result TEXT, stored_at REAL NOT NULL, UNIQUE (user_id, key))')
+			self._local.conn = conn
+			self._local.pid = os.getpid()
+			self._local.depth = 0
+		return conn
+
+	@contextmanager
+	def transaction(self):
+		"""Groups writes into one atomic commit; nested calls join the outer transaction."""
+		conn = self._conn()
+		if self._local.depth == 0:
+			conn.execute('BEGIN IMMEDIATE')
+		self._local.depth += 1
+		try:
+			yield self
+		except BaseException:
+			self._local.depth -= 1
+			if self._local.depth == 0:
+				conn.execute('ROLLBACK')
+			raise
+		self._local.depth -= 1
+		if self._local.depth == 0:
+			conn.execute('COMMIT')
+
+	def _legacy(self, user_id: str, kind: str) -> Any:
+		"""The user's legacy JSON file for kind, imported into the database once."""
+		if (user_id, kind) in self._checked:
+			return None
+		self._checked.add((user_id, kind))
+		path = os.path.join(self.legacy_dir, f'{user_id}{_LEGACY_SUFFIXES[kind]}')
+		if not os.path.exists(path):
+			return None
+		with open(path, 'r', encoding='utf-8') as f:
+			value = json.load(f)
+		if kind == 'idempotency':
+			# persistence kept {key: {payload_hash, result, stored_at}}; supervisor kept a list of keys
+			records = value if isinstance(value, dict) else {key: {} for key in value}
+			now = time.time()
+			with self.transaction():
+				self._conn().executemany('INSERT OR IGNORE INTO idempotency VALUES (?, ?, ?, ?, ?)', [
+					(user_id, key, entry.get("payload_hash"), json.dumps(entry.get("result"), ensure_ascii=False),
+						entry.get("stored_at", now)) for key, entry in records.items()])
+		else:
+			with self.transaction():
+				self._conn().execute('INSERT OR IGNORE INTO user_state VALUES (?, ?, ?, ?)',
+					(user_id, kind, json.dumps(value, ensure_ascii=False), time.time()))
+		return value
+
+	def get(self, user_id: str, kind: str) -> Any:
+		row = self._conn().execute('SELECT value FROM user_state WHERE user_id = ? AND kind = ?', (user_id, kind)).fetchone()
+		if row is None:
+			return self._legacy(user_id, kind)
+		return json.loads(row[0])
+
+	def put(self, user_id: str, kind: str, value: Any) -> None:
+		self._checked.add((user_id, kind))
+		with self.transaction():
+			self._conn().execute('INSERT OR REPLACE INTO user_state VALUES (?, ?, ?, ?)',
+				(user_id, kind, json.dumps(value, ensure_ascii=False), time.time()))
+
+	def get_idempotency(self, user_id: str, key: str) -> Optional[dict]:
+		self._legacy(user_id, 'idempotency')
+		row = self._conn().execute('SELECT payload_hash, result, stored_at FROM idempotency WHERE user_id = ? AND key = ?',
+			(user_id, key)).fetchone()
+		if row is None:
+			return None
+		return {"payload_hash": row[0], "result": json.loads(row[1]), "stored_at": row[2]}
+
+	def idempotency_keys(self, user_id: str) -> list:
+		self._legacy(user_id, 'idempotency')
+		return [row[0] for row in self._conn().execute(
+			'SELECT key FROM idempotency WHERE user_id = ? ORDER BY stored_at, rowid', (user_id,))]
+
+	def put_idempotency(self, user_id: str, records: dict, max_keys: int, ttl_seconds: float) -> None:
+		"""Stores {key: (payload_hash, result)}, then drops expired keys and the oldest past max_keys."""
+		self._legacy(user_id, 'idempotency')
+		now = time.time()
+		with self.transaction():
+			conn = self._conn()
+			conn.executemany('INSERT OR REPLACE INTO idempotency VALUES (?, ?, ?, ?, ?)', [
+				(user_id, key, payload_hash, json.dumps(result, ensure_ascii=False), now)
+				for key, (payload_hash, result) in records.items()])
+			conn.execute('DELETE FROM idempotency WHERE user_id = ? AND stored_at < ?', (user_id, now - ttl_seconds))
+			conn.execute('DELETE FROM idempotency WHERE user_id = ? AND rowid NOT IN (SELECT rowid FROM idempotency '
+				'WHERE user_id = ? ORDER BY stored_at DESC, rowid DESC LIMIT ?)', (user_id, user_id, max(0, max_keys)))
+
+	def migrate(self, remove: bool = False) -> int:
+		"""Imports every legacy profile, focus and idempotency file; returns how many were found."""
+		found = 0
+		if not os.path.isdir(self.legacy_dir):
+			return found
+		for fname in sorted(os.listdir(self.legacy_dir)):
+			for kind, suffix in _LEGACY_SUFFIXES.items():
+				if fname.endswith(suffix):
+					user_id = fname[:-len(suffix)]
+					self._checked.discard((user_id, kind))
+					if kind == 'idempotency':
+						self._legacy(user_id, kind)
+					else:
+						self.get(user_id, kind)
+					found += 1
+					if remove:
+						os.remove(os.path.join(self.legacy_dir, fname))
+		return found
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+def state_db_path(state_dir: Optional[str] = None) -> str:
+	"""The state database of state_dir; USER_STATE_DB overrides the default STATE_DIR one."""
+	if state_dir is None or state_dir == STATE_DIR:
+		return os.getenv('USER_STATE_DB') or os.path.join(STATE_DIR, STATE_DB_NAME)
+	return os.path.join(state_dir, STATE_DB_NAME)
+
+def state_store() -> UserStateStore:
+	"""The shared store for STATE_DIR."""
+	path = state_db_path()
+	store = _stores.get(path)
+	if store is None:
+		with _stores_lock:
+			store = _stores.setdefault(path, UserStateStore(path, STATE_DIR))
+	return store
+
+def transaction():
+	"""with persistence.transaction(): profile, focus and idempotency writes commit together."""
+	return state_store().transaction()
+
+def load_idempotency(user_id: str, idempotency_key: str) -> Optional[dict]:
+	"""The stored {payload_hash, result} for idempotency_key, unless missing or expired."""
+	entry = state_store().get_idempotency(user_id, idempotency_key)
+	if entry is None or time.time() - entry["stored_at"] > IDEMPOTENCY_TTL_SECONDS:
 		return None
-	with open(path, 'r', encoding='utf-8') as f:
-		return json.load(f)
+	return entry
 
-def get_module(module_id: str) -> Optional[dict]:
-	path = os.path.join(MODULES_DIR, f'{module_id}.json')
-	if not os.path.exists(path):
+def idempotency_keys(user_id: str) -> list:
+	"""The user's stored idempotency keys, oldest first."""
+	return state_store().idempotency_keys(user_id)
+
+def save_idempotency(user_id: str, idempotency_key: str, payload_hash: str, result: Any) -> None:
+	"""Stores a processed event's result, dropping expired and least recent keys past the cap."""
+	save_idempotency_many(user_id, {idempotency_key: (payload_hash, result)})
+
+def save_idempotency_many(user_id: str, records: dict) -> None:
+	"""save_idempotency for several {idempotency_key: (payload_hash, result)} in one transaction."""
+	if records:
+		state_store().put_idempotency(user_id, records, IDEMPOTENCY_MAX_KEYS, IDEMPOTENCY_TTL_SECONDS)
+
+# path -> (mtime_ns, parsed JSON); shared objects, callers must not mutate them
+_json_file_cache = {}
+
+def _read_json_file_cached(path: str) -> Optional[dict]:
+	try:
+		mtime = os.stat(path).st_mtime_ns
+	except OSError:
+		_json_file_cache.pop(path, None)
 		return None
-	with open(path, 'r', encoding='utf-8') as f:
-		return json.load(f)
+	cached = _json_file_cache.get(path)
+	if cached is None or cached[0] != mtime:
+		with open(path, 'r', encoding='utf-8') as f:
+			cached = _json_file_cache[path] = (mtime, json.load(f))
+	return cached[1]
+
+def get_jd(role_id: str) -> Optional[dict]:
+	return _read_json_file_cached(os.path.join(JD_DIR, f'{role_id}.json'))
+
+def get_module(module_id: str) -> Optional[dict]:
+	return _read_json_file_cached(os.path.join(MODULES_DIR, f'{module_id}.json'))
 
 def upsert_focus(user_id: str, focus_dict: dict) -> None:
-	path = os.path.join(STATE_DIR, f'{user_id}{FOCUS_SUFFIX}')
-	_ensure_dir(path)
-	with open(path, 'w', encoding='utf-8') as f:
-		json.dump(focus_dict, f, indent=2, ensure_ascii=False)
+	state_store().put(user_id, 'focus', focus_dict)
 
 def load_focus(user_id: str) -> Optional[dict]:
-	path = os.path.join(STATE_DIR, f'{user_id}{FOCUS_SUFFIX}')
-	if not os.path.exists(path):
-		return None
-	with open(path, 'r', encoding='utf-8') as f:
-		return json.load(f)
+	return state_store().get(user_id, 'focus')
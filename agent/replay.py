@@ -0,0 +1,234 @@
+
+import os
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional
+
+from . import persistence, update_math, focus
+from .models import EVENT_MODULE_COMPLETED
+
+BOOTSTRAP_EVENT = "resume_bootstrap"
+DEFAULT_SKILL = {"level": 1.0, "confidence": 0.3}
+
+def _load_json_dir(path: str) -> Dict[str, dict]:
+	"""{file stem: contents} for the JSON files in path."""
+	out = {}
+	if not os.path.isdir(path):
+		return out
+	for fname in os.listdir(path):
+		if fname.endswith('.json'):
+			try:
+				with open(os.path.join(path, fname), 'r', encoding='utf-8') as f:
+					out[fname[:-5]] = json.load(f)
+			except Exception:
+				continue
+	return out
+
+def _audited_users(state_dir: str) -> List[str]:
+	return sorted(f[:-len(persistence.AUDIT_SUFFIX)] for f in os.listdir(state_dir) if f.endswith(persistence.AUDIT_SUFFIX)) \
+		if os.path.isdir(state_dir) else []
+
+def read_log(state_dir: str, user_id: str):
+	"""
+	Streams a user's audit log. Returns (seed profile, applied module updates) where the seed is
+	the last resume_bootstrap snapshot and the updates are the module_completed records after it
+	that changed the profile, as (event fields, recorded deltas), one per idempotency key.
+	"""
+	seed, updates = None, []
+	path = os.path.join(state_dir, f'{user_id}{persistence.AUDIT_SUFFIX}')
+	if not os.path.exists(path):
+		return seed, updates
+	with open(path, 'r', encoding='utf-8') as f:
+		for line in f:
+			try:
+				record = json.loads(line)
+			except ValueError:
+				continue
+			payload = record.get("payload")
+			if not isinstance(payload, dict):
+				continue
+			if record.get("event_type") == BOOTSTRAP_EVENT and isinstance(payload.get("profile"), dict):
+				seed, updates = payload["profile"], []
+			elif record.get("event_type") == EVENT_MODULE_COMPLETED:
+				deltas = payload.get("deltas")
+				# Only the record written after the update carries computed alphas; the
+				# pre-routing and idempotent replay records of the same event do not
+				if deltas and all(isinstance(d, dict) and "alpha" in d for d in deltas):
+					updates.append((payload.get("idempotency_key"), payload.get("payload") or {}, deltas))
+	# An update whose commit was rolled back is logged again when its event is retried;
+	# only the last record of an idempotency key was applied
+	last = {key: i for i, (key, _, _) in enumerate(updates) if key}
+	return seed, [(event, deltas) for i, (key, event, deltas) in enumerate(updates) if not key or last[key] == i]
+
+def _plan(event: dict, deltas: list, modules: Dict[str, dict]) -> List[dict]:
+	"""The per-skill update inputs of one module_completed event, as the Supervisor derives them."""
+	module = modules.get(event.get("module_id"))
+	if module is None:
+		# The module is gone from the catalog; keep the alphas that were applied
+		return [{"skill": d["skill"], "target_level": d.get("target_level", 1.0), "alpha": d["alpha"],
+			"completion_type": event.get("completion_type"), "score": event.get("score"),
+			"has_assessment": event.get("has_assessment", False)} for d in deltas]
+	rows = []
+	for skill_meta in module.get("skills_covered", []):
+		rows.append({
+			"skill": skill_meta["skill"],
+			"weight": skill_meta.get("weight", 1.0),
+			"target_level": skill_meta.get("target_level", event.get("target_level", 1.0)),
+			"has_assessment": skill_meta.get("has_assessment", event.get("has_assessment", False)),
+			"pass_threshold": skill_meta.get("pass_threshold", event.get("pass_threshold")),
+			"completion_type": event.get("completion_type"),
+			"score": event.get("score"),
+		})
+	return rows
+
+def replay_skills(seeds: Dict[str, dict], plans: Dict[str, List[dict]]) -> Dict[str, dict]:
+	"""
+	Re-applies compute_alpha/update_skill for many users at once. Each (user, skill) is a lane;
+	alphas for every row are computed in one array call, then the k-th update of every lane is
+	applied together. Levels and confidences are rounded after each step as the Supervisor stores them.
+	Returns {user_id: skills}.
+	"""
+	import numpy as np
+	skills = {user_id: {k: dict(v) for k, v in (seed.get("skills") or {}).items()} for user_id, seed in seeds.items()}
+	lanes, lane_of, rows, lane_idx, step_idx, steps = [], {}, [], [], [], {}
+	for user_id, user_rows in plans.items():
+		for row in user_rows:
+			key = (user_id, row["skill"])
+			if key not in lane_of:
+				lane_of[key] = len(lanes)
+				lanes.append(key)
+			lane = lane_of[key]
+			rows.append(row)
+			lane_idx.append(lane)
+			step_idx.append(steps.get(lane, 0))
+			steps[lane] = steps.get(lane, 0) + 1
+	if not rows:
+		return skills
+
+	lane_idx, step_idx = np.array(lane_idx), np.array(step_idx)
+	completion = [r["completion_type"] for r in rows]
+	passed = np.array([c == "passed" for c in completion])
+	failed = np.array([c == "failed" for c in completion])
+	scored = [bool(r["has_assessment"]) and r["score"] is not None for r in rows]
+	score_val = np.array([float(r["score"]) if s else 0.0 for r, s in zip(rows, scored)])
+	score_term = np.array([float(r["score"]) - float(r["pass_threshold"]) if s and r.get("pass_threshold") is not None else 0.0
+		for r, s in zip(rows, scored)])
+	weight = np.array([float(r.get("weight", 1.0)) for r in rows])
+	target = np.array([float(r["target_level"]) for r in rows])
+	alpha = update_math.compute_alpha_batch(weight, passed, failed, score_term)
+	fixed = [i for i, r in enumerate(rows) if "alpha" in r]
+	if fixed:
+		alpha[fixed] = [float(rows[i]["alpha"]) for i in fixed]
+
+	start = [skills[user_id].get(skill, DEFAULT_SKILL) for user_id, skill in lanes]
+	L = np.array([float(s["level"]) for s in start])
+	C = np.array([float(s["confidence"]) for s in start])
+	for step in range(int(step_idx.max()) + 1):
+		at = np.nonzero(step_idx == step)[0]
+		idx = lane_idx[at]
+		L_new, C_new = update_math.update_skill_batch(L[idx], C[idx], target[at], alpha[at], passed[at], score_val[at])
+		# round() rather than np.round so every step matches the scalar path exactly
+		L[idx] = [round(v, 2) for v in L_new.tolist()]
+		C[idx] = [round(v, 2) for v in C_new.tolist()]
+	for lane, (user_id, skill) in enumerate(lanes):
+		skills[user_id][skill] = {"level": float(L[lane]), "confidence": float(C[lane])}
+	return skills
+
+def _diff(old_skills: dict, new_skills: dict) -> Dict[str, dict]:
+	changes = {}
+	for skill in sorted(set(old_skills) | set(new_skills)):
+		old, new = old_skills.get(skill), new_skills.get(skill)
+		if old != new:
+			changes[skill] = {"old": old, "new": new}
+	return changes
+
+def replay_users(user_ids: List[str], state_dir: str, modules: Dict[str, dict], jds: Dict[str, dict], write: bool = True) -> List[dict]:
+	"""
+	Rebuilds the profiles of user_ids from their audit logs. Changed profiles (and their focus)
+	are written in one transaction each when write is set. Returns one summary per user.
+	"""
+	store = persistence.UserStateStore(persistence.state_db_path(state_dir), state_dir)
+	results, seeds, plans, current = [], {}, {}, {}
+	for user_id in user_ids:
+		try:
+			seed, updates = read_log(state_dir, user_id)
+			if seed is None:
+				results.append({"user_id": user_id, "status": "no_baseline"})
+				continue
+			seeds[user_id] = seed
+			plans[user_id] = [row for event, deltas in updates for row in _plan(event, deltas, modules)]
+			current[user_id] = store.get(user_id, 'profile')
+		except Exception as e:
+			results.append({"user_id": user_id, "status": "failed", "error": str(e)})
+
+	replayed = replay_skills(seeds, plans)
+	catalog = list(modules.values())
+	for user_id, skills in replayed.items():
+		try:
+			profile = dict(current.get(user_id) or seeds[user_id])
+			old_skills = profile.get("skills") or {}
+			# Skills no logged event explains are left as they are
+			profile["skills"] = {**old_skills, **skills}
+			changes = _diff(old_skills, profile["skills"])
+			result = {"user_id": user_id, "status": "changed" if changes else "unchanged",
+				"events": len(plans[user_id]), "changes": changes}
+			if changes and write:
+				jd = jds.get(profile.get("role_id"))
+				with store.transaction():
+					store.put(user_id, 'profile', profile)
+					if jd:
+						store.put(user_id, 'focus', {"focus": focus.compute_focus_points(profile, jd, catalog)})
+			results.append(result)
+		except Exception as e:
+			results.append({"user_id": user_id, "status": "failed", "error": str(e)})
+	return results
+
+def replay_all(state_dir: Optional[str] = None, user_ids: Optional[List[str]] = None, workers: Optional[int] = None,
+		chunk_size: int = 200, write: bool = True, modules_dir: Optional[str] = None, jd_dir: Optional[str] = None,
+		progress: Optional[Callable[[int, int], None]] = None) -> dict:
+	"""
+	Rebuilds every audited user's skill profile with the current update_math, e.g. after its
+	coefficients change. Users are split into chunks replayed across a process pool; progress
+	is called with (users done, total). Run it while events are not being ingested.
+	Returns a summary with counts, the largest level change and per-user diffs of changed users.
+	"""
+	state_dir = state_dir or persistence.STATE_DIR
+	user_ids = list(user_ids) if user_ids is not None else _audited_users(state_dir)
+	modules = _load_json_dir(modules_dir or persistence.MODULES_DIR)
+	jds = _load_json_dir(jd_dir or persistence.JD_DIR)
+	chunks = [user_ids[i:i + chunk_size] for i in range(0, len(user_ids), max(1, chunk_size))]
+	started = time.perf_counter()
+	results = []
+
+	def _collect(chunk_results):
+		results.extend(chunk_results)
+		if progress is not None:
+			progress(len(results), len(user_ids))
+
+	workers = workers or os.cpu_count() or 1
+	if workers <= 1 or len(chunks) <= 1:
+		for chunk in chunks:
+			_collect(replay_users(chunk, state_dir, modules, jds, write))
+	else:
+		with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+			futures = [pool.submit(replay_users, chunk, state_dir, modules, jds, write) for chunk in chunks]
+			for future in as_completed(futures):
+				_collect(future.result())
+
+	counts = {"changed": 0, "unchanged": 0, "no_baseline": 0, "failed": 0}
+	max_delta = 0.0
+	for result in results:
+		counts[result["status"]] += 1
+		for change in result.get("changes", {}).values():
+			if change["old"] and change["new"]:
+				max_delta = max(max_delta, abs(change["new"]["level"] - change["old"]["level"]))
+	return {
+		"users": len(user_ids),
+		**counts,
+		"skills_changed": sum(len(r.get("changes", {})) for r in results),
+		"max_level_delta": round(max_delta, 2),
+		"written": write,
+		"elapsed_seconds": round(time.perf_counter() - started, 2),
+		"results": sorted((r for r in results if r["status"] != "unchanged"), key=lambda r: r["user_id"]),
+	}
@@ -7,12 +7,18 @@ Now with GROQ AI integration for enhanced analysis
 import re
 import json
 import os
+from functools import lru_cache
 from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass
 import PyPDF2
-import docx2txt
 from pathlib import Path
 
+# docx2txt is only needed for .docx resumes
+try:
+    import docx2txt
+except ImportError:
+    docx2txt = None
+
 # Try to import GROQ parser
 try:
     from .groq_resume_parser import GroqResumeParser
@@ -35,11 +41,109 @@ class SkillMatch:
     evidence: List[str]  # Phrases/sentences that indicate this skill
     years_experience: Optional[int] = None
 
+YEARS_PATTERN = re.compile(r"\b(\d+)\+?\s*years?\b")
+PROJECT_PATTERNS = [re.compile(p) for p in (
+    r"\bproject\b", r"\bbuilt\b", r"\bdeveloped\b", r"\bcreated\b",
+    r"\bimplemented\b", r"\bdesigned\b"
+)]
+PROJECT_EVIDENCE_PATTERN = re.compile(r"\bproject\b|\bbuilt\b|\bdeveloped\b")
+QUANTIFIED_RESULT_PATTERN = re.compile(r"\b\d+%|\bimproved\b|\bincreased\b|\breduced\b")
+# Every per-skill years pattern contains this, so evidence without it has no years
+YEARS_MENTION_PATTERN = re.compile(r"\d\+?\s*years?", re.IGNORECASE)
+
+
+@lru_cache(maxsize=1024)
+def _years_patterns(skill_lower: str) -> Tuple[re.Pattern, ...]:
+    skill = re.escape(skill_lower)
+    return tuple(re.compile(p, re.IGNORECASE) for p in (
+        rf"{skill}.*?(\d+)\+?\s*years?",
+        rf"(\d+)\+?\s*years?.*?{skill}",
+        rf"\b(\d+)\+?\s*years?\s*.*?{skill}"
+    ))
+
+
+def _first_literal(pattern: str) -> Optional[str]:
+    """The character every match of ``pattern`` starts with, if it is fixed."""
+    body = pattern[2:] if pattern.startswith(r"\b") else pattern
+    if not body:
+        return None
+    if body[0] == "\\":
+        return body[1] if len(body) > 1 and not body[1].isalnum() else None
+    return None if body[0] in "([.^$*+?{|" else body[0].lower()
+
+
+class SkillMatcher:
+    """Finds every hit of a set of regex patterns in one scan of the text.
+
+    The unique patterns are compiled once and joined into one zero-width
+    alternation, so a single pass finds each position where some pattern
+    matches. Only the patterns that can start with the character at that
+    position are then tried there. ``scan`` returns the same matches as
+    running ``re.finditer`` separately for each pattern.
+    """
+
+    def __init__(self, patterns: List[str]):
+        self.patterns = list(dict.fromkeys(patterns))
+        self.compiled = [re.compile(p, re.IGNORECASE) for p in self.patterns]
+        self.buckets: Dict[str, List[int]] = {}
+        unanchored = []
+        for i, pattern in enumerate(self.patterns):
+            first = _first_literal(pattern)
+            if first is None:
+                unanchored.append(i)
+            else:
+                self.buckets.setdefault(first, []).append(i)
+        # Patterns without a fixed first character are tried at every hit
+        self.buckets = {ch: sorted(ids + unanchored) for ch, ids in self.buckets.items()}
+        self.unanchored = unanchored
+        self.scanner = re.compile("(?=" + "|".join(f"(?:{p})" for p in self.patterns) + ")", re.IGNORECASE)
+
+    def scan(self, text: str) -> Dict[str, List[re.Match]]:
+        """Map each pattern that occurs in ``text`` to its non-overlapping matches."""
+        hits: Dict[str, List[re.Match]] = {}
+        next_start = [0] * len(self.patterns)
+        for hit in self.scanner.finditer(text):
+            pos = hit.start()
+            for i in self.buckets.get(text[pos].lower(), self.unanchored):
+                if pos < next_start[i]:
+                    continue
+                match = self.compiled[i].match(text, pos)
+                if match:
+                    hits.setdefault(self.patterns[i], []).append(match)
+                    next_start[i] = max(match.end(), pos + 1)
+        return hits
+
+
 class ResumeAnalyzer:
+    # Matchers for catalog + extra (non-catalog) skill patterns, per extra set
+    MAX_CACHED_MATCHERS = 32
+
     def __init__(self):
         # Load skill patterns and indicators
         self.skill_patterns = self._load_skill_patterns()
         self.proficiency_indicators = self._load_proficiency_indicators()
+        self.indicator_patterns = {
+            level: re.compile("|".join(f"(?:{p})" for p in config["patterns"]))
+            for level, config in self.proficiency_indicators.items()
+        }
+        self._matchers: Dict[Tuple[str, ...], SkillMatcher] = {}
+
+    def _matcher_for(self, extra_patterns: Tuple[str, ...]) -> SkillMatcher:
+        """Matcher over the skill catalog, the proficiency indicators and ``extra_patterns``."""
+        matcher = self._matchers.get(extra_patterns)
+        if matcher is None:
+            if len(self._matchers) >= self.MAX_CACHED_MATCHERS:
+                self._matchers.clear()
+            patterns = [p for patterns in self.skill_patterns.values() for p in patterns]
+            patterns += [p for config in self.proficiency_indicators.values() for p in config["patterns"]]
+            matcher = self._matchers[extra_patterns] = SkillMatcher(patterns + list(extra_patterns))
+        return matcher
+
+    def _indicator_weight(self, hits: Dict[str, List[re.Match]]) -> float:
+        """Highest proficiency weight whose indicators occur in the scanned text (0 if none)."""
+        weights = [config["weight"] for config in self.proficiency_indicators.values()
+                   if any(p in hits for p in config["patterns"])]
+        return max(weights, default=0)
         
     def _load_skill_patterns(self) -> Dict[str, List[str]]:
         """Load skill patterns for detection"""
@@ -140,7 +244,7 @@ class ResumeAnalyzer:
         }
     
     def extract_text_from_file(self, file_path: str) -> str:
-        """Extract text from PDF or DOCX files"""
+        """Extract text from PDF, DOCX or plain text files"""
         file_path = Path(file_path)
         
         if not file_path.exists():
@@ -150,6 +254,8 @@ class ResumeAnalyzer:
             return self._extract_from_pdf(file_path)
         elif file_path.suffix.lower() in ['.docx', '.doc']:
             return self._extract_from_docx(file_path)
+        elif file_path.suffix.lower() == '.txt':
+            return file_path.read_text(encoding='utf-8', errors='replace')
         else:
             raise ValueError(f"Unsupported file format: {file_path.suffix}")
     
@@ -167,6 +273,9 @@ class ResumeAnalyzer:
     
     def _extract_from_docx(self, file_path: Path) -> str:
         """Extract text from DOCX file"""
+        if docx2txt is None:
+            print("Error extracting text from DOCX: docx2txt is not installed")
+            return ""
         try:
             return docx2txt.process(str(file_path))
         except Exception as e:
@@ -190,20 +299,28 @@ class ResumeAnalyzer:
         # If target skills specified, only analyze those
         skills_to_analyze = target_skills if target_skills else list(self.skill_patterns.keys())
         
+        patterns_by_skill = {}
         for skill in skills_to_analyze:
             if skill not in self.skill_patterns:
                 # For unknown skills, do basic text matching
-                patterns = [rf"\b{re.escape(skill.lower())}\b"]
+                patterns_by_skill[skill] = [rf"\b{re.escape(skill.lower())}\b"]
             else:
-                patterns = self.skill_patterns[skill]
-            
+                patterns_by_skill[skill] = self.skill_patterns[skill]
+        extra = tuple(sorted({patterns[0] for skill, patterns in patterns_by_skill.items()
+                              if skill not in self.skill_patterns}))
+        
+        # One scan finds every skill mention and every proficiency indicator;
+        # the full-text proficiency signal is shared by all skills
+        hits = self._matcher_for(extra).scan(text_lower)
+        full_text_weight = self._indicator_weight(hits)
+        
+        for skill, patterns in patterns_by_skill.items():
             evidence = []
             skill_mentions = []
             
             # Find all mentions of the skill
             for pattern in patterns:
-                matches = re.finditer(pattern, text_lower, re.IGNORECASE)
-                for match in matches:
+                for match in hits.get(pattern, ()):
                     # Extract context around the match
                     start = max(0, match.start() - 50)
                     end = min(len(resume_text), match.end() + 50)
@@ -213,7 +330,7 @@ class ResumeAnalyzer:
             
             if evidence:
                 # Determine proficiency level
-                proficiency = self._determine_proficiency(evidence, resume_text)
+                proficiency = self._determine_proficiency(evidence, resume_text, full_text_weight)
                 years_exp = self._extract_years_experience(evidence, skill)
                 
                 results[skill] = SkillMatch(
@@ -226,41 +343,44 @@ class ResumeAnalyzer:
         
         return results
     
-    def _determine_proficiency(self, evidence: List[str], full_text: str) -> float:
-        """Determine proficiency level based on evidence"""
+    def _determine_proficiency(self, evidence: List[str], full_text: str,
+                               full_text_weight: Optional[float] = None) -> float:
+        """Determine proficiency level based on evidence
+        
+        ``full_text_weight`` is the indicator weight of the whole resume as
+        computed once by analyze_skills; it is recomputed when omitted.
+        """
         base_score = 2.0  # Default intermediate level
         
         # Check for proficiency indicators
         evidence_text = " ".join(evidence).lower()
-        full_text_lower = full_text.lower()
-        
-        max_weight = 0
-        for level, config in self.proficiency_indicators.items():
-            for pattern in config["patterns"]:
-                if re.search(pattern, evidence_text) or re.search(pattern, full_text_lower):
-                    max_weight = max(max_weight, config["weight"])
+        if full_text_weight is None:
+            full_text_lower = full_text.lower()
+            full_text_weight = max((self.proficiency_indicators[level]["weight"]
+                                    for level, pattern in self.indicator_patterns.items()
+                                    if pattern.search(full_text_lower)), default=0)
+        
+        # Evidence snippets can only raise the weight found in the full text
+        max_weight = full_text_weight
+        for level, pattern in self.indicator_patterns.items():
+            weight = self.proficiency_indicators[level]["weight"]
+            if weight > max_weight and pattern.search(evidence_text):
+                max_weight = weight
         
         if max_weight > 0:
             base_score = max_weight
         
         # Adjust based on context clues
-        if re.search(r"\b(\d+)\+?\s*years?\b", evidence_text):
-            years_match = re.search(r"\b(\d+)\+?\s*years?\b", evidence_text)
-            if years_match:
-                years = int(years_match.group(1))
-                if years >= 5:
-                    base_score = min(5.0, base_score + 1.0)
-                elif years >= 3:
-                    base_score = min(5.0, base_score + 0.5)
+        years_match = YEARS_PATTERN.search(evidence_text)
+        if years_match:
+            years = int(years_match.group(1))
+            if years >= 5:
+                base_score = min(5.0, base_score + 1.0)
+            elif years >= 3:
+                base_score = min(5.0, base_score + 0.5)
         
         # Check for project indicators
-        project_indicators = [
-            r"\bproject\b", r"\bbuilt\b", r"\bdeveloped\b", r"\bcreated\b",
-            r"\bimplemented\b", r"\bdesigned\b"
-        ]
-        
-        project_count = sum(1 for pattern in project_indicators 
-                          if re.search(pattern, evidence_text))
+        project_count = sum(1 for pattern in PROJECT_PATTERNS if pattern.search(evidence_text))
         
         if project_count >= 2:
             base_score = min(5.0, base_score + 0.5)
@@ -272,14 +392,10 @@ class ResumeAnalyzer:
         evidence_text = " ".join(evidence).lower()
         
         # Look for patterns like "3 years", "5+ years", etc.
-        patterns = [
-            rf"{re.escape(skill.lower())}.*?(\d+)\+?\s*years?",
-            rf"(\d+)\+?\s*years?.*?{re.escape(skill.lower())}",
-            rf"\b(\d+)\+?\s*years?\s*.*?{re.escape(skill.lower())}"
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, evidence_text, re.IGNORECASE)
+        if not YEARS_MENTION_PATTERN.search(evidence_text):
+            return None
+        for pattern in _years_patterns(skill.lower()):
+            match = pattern.search(evidence_text)
             if match:
                 return int(match.group(1))
         
@@ -294,11 +410,11 @@ class ResumeAnalyzer:
         
         # Boost confidence if there are specific examples or projects
         evidence_text = " ".join(evidence).lower()
-        if re.search(r"\bproject\b|\bbuilt\b|\bdeveloped\b", evidence_text):
+        if PROJECT_EVIDENCE_PATTERN.search(evidence_text):
             base_confidence = min(1.0, base_confidence + 0.2)
         
         # Boost if there are quantifiable results
-        if re.search(r"\b\d+%|\bimproved\b|\bincreased\b|\breduced\b", evidence_text):
+        if QUANTIFIED_RESULT_PATTERN.search(evidence_text):
             base_confidence = min(1.0, base_confidence + 0.1)
         
         return round(base_confidence, 2)
@@ -354,6 +470,41 @@ class ResumeAnalyzer:
         
         return summary
 
+def heuristic_skill_report(analyzer: ResumeAnalyzer, resume_text: str, role_skills: List[str]) -> Dict:
+    """Heuristic analysis of extracted resume text in the format analyze_resume_for_role returns."""
+    skill_matches = analyzer.analyze_skills(resume_text, role_skills)
+    summary = analyzer.generate_skill_summary(skill_matches)
+    
+    # Convert to format compatible with existing system
+    result = {}
+    for skill, match in skill_matches.items():
+        result[skill] = {
+            "level": match.proficiency_level,
+            "confidence": match.confidence,
+            "evidence": match.evidence[0] if match.evidence else "",
+            "years_experience": match.years_experience
+        }
+    
+    # Add skills not found in resume with default values
+    for skill in role_skills:
+        if skill not in result:
+            result[skill] = {
+                "level": 1.0,
+                "confidence": 0.1,
+                "evidence": "Skill not mentioned in resume",
+                "years_experience": None
+            }
+    
+    # Add analysis method to summary
+    summary["analysis_method"] = "heuristic"
+    
+    return {
+        "skills": result,
+        "summary": summary,
+        "resume_text": resume_text[:500] + "..." if len(resume_text) > 500 else resume_text,
+        "analysis_method": "heuristic"
+    }
+
 # Helper function for integration with existing system
 def analyze_resume_for_role(resume_file_path: str, role_skills: List[str], 
                            target_role: str = None, department: str = None) -> Dict[str, Dict]:
@@ -475,42 +626,7 @@ def analyze_resume_for_role(resume_file_path: str, role_skills: List[str],
     try:
         # Extract text from resume
         resume_text = analyzer.extract_text_from_file(resume_file_path)
-        
-        # Analyze skills
-        skill_matches = analyzer.analyze_skills(resume_text, role_skills)
-        
-        # Generate summary
-        summary = analyzer.generate_skill_summary(skill_matches)
-        
-        # Convert to format compatible with existing system
-        result = {}
-        for skill, match in skill_matches.items():
-            result[skill] = {
-                "level": match.proficiency_level,
-                "confidence": match.confidence,
-                "evidence": match.evidence[0] if match.evidence else "",
-                "years_experience": match.years_experience
-            }
-        
-        # Add skills not found in resume with default values
-        for skill in role_skills:
-            if skill not in result:
-                result[skill] = {
-                    "level": 1.0,
-                    "confidence": 0.1,
-                    "evidence": "Skill not mentioned in resume",
-                    "years_experience": None
-                }
-        
-        # Add analysis method to summary
-        summary["analysis_method"] = "heuristic"
-        
-        return {
-            "skills": result,
-            "summary": summary,
-            "resume_text": resume_text[:500] + "..." if len(resume_text) > 500 else resume_text,
-            "analysis_method": "heuristic"
-        }
+        return heuristic_skill_report(analyzer, resume_text, role_skills)
         
     except Exception as e:
         print(f"Error analyzing resume: {e}")
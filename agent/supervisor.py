@@ -1,27 +1,13 @@
 
-import os
-import json
 from . import bootstrap, persistence, update_math, focus
 
-IDEMP_SUFFIX = '_idempotency.json'
-BASE = os.path.dirname(os.path.dirname(__file__))
-STATE_DIR = os.path.join(BASE, 'data', 'state')
-
-def _idempotency_path(user_id):
-	return os.path.join(STATE_DIR, f'{user_id}{IDEMP_SUFFIX}')
-
 def _load_idempotency(user_id):
-	path = _idempotency_path(user_id)
-	if not os.path.exists(path):
-		return set()
-	with open(path, 'r', encoding='utf-8') as f:
-		return set(json.load(f))
+	return set(persistence.idempotency_keys(user_id))
 
 def _save_idempotency(user_id, idemp_set):
-	path = _idempotency_path(user_id)
-	os.makedirs(os.path.dirname(path), exist_ok=True)
-	with open(path, 'w', encoding='utf-8') as f:
-		json.dump(list(idemp_set), f)
+	# Keys only; they share the per-user idempotency store with the orchestrator's results
+	new_keys = set(idemp_set) - _load_idempotency(user_id)
+	persistence.save_idempotency_many(user_id, {key: (None, None) for key in new_keys})
 
 def handle_bootstrap(user_id: str, role_id: str, resume_text: str) -> dict:
 	return bootstrap.bootstrap_profile(user_id, role_id, resume_text)
@@ -79,9 +65,10 @@ def handle_module_completed(event_dict: dict) -> dict:
 			profile['skills'] = {}
 		profile['skills'][skill] = {"level": round(L_new, 2), "confidence": round(C_new, 2)}
 
-	persistence.save_user_profile(user_id, profile)
 	focus_points = focus.compute_focus_points(profile, jd)
-	persistence.upsert_focus(user_id, {"focus": focus_points})
+	with persistence.transaction():
+		persistence.save_user_profile(user_id, profile)
+		persistence.upsert_focus(user_id, {"focus": focus_points})
 	persistence.append_audit(user_id, {
 		"event": "module_completed",
 		"event_dict": event_dict,
@@ -1,6 +1,18 @@
 
 from typing import Optional, Tuple
 
+# Coefficients shared by the scalar updates and their array forms below
+ALPHA_BASE = 0.25
+ALPHA_PASSED = 0.15
+ALPHA_FAILED = -0.10
+ALPHA_SCORE = 0.40
+ALPHA_MIN, ALPHA_MAX = 0.05, 0.50
+LEVEL_MIN, LEVEL_MAX = 1, 5
+CONF_RATE = 0.5
+CONF_BASE = 0.5
+CONF_PASSED = 0.2
+CONF_SCORE = 0.3
+
 def clip(x: float, lo: float, hi: float) -> float:
 	"""
 	Clamp x to the range [lo, hi].
@@ -17,14 +29,14 @@ def compute_alpha(weight: float, completion_type: str, has_assessment: bool, sco
 		base += 0.40 * (score - pass_threshold)
 	alpha = clip(base * weight, 0.05, 0.50)
 	"""
-	base = 0.25
+	base = ALPHA_BASE
 	if completion_type == "passed":
-		base += 0.15
+		base += ALPHA_PASSED
 	elif completion_type == "failed":
-		base -= 0.10
+		base += ALPHA_FAILED
 	if has_assessment and score is not None and pass_threshold is not None:
-		base += 0.40 * (score - pass_threshold)
-	alpha = clip(base * weight, 0.05, 0.50)
+		base += ALPHA_SCORE * (score - pass_threshold)
+	alpha = clip(base * weight, ALPHA_MIN, ALPHA_MAX)
 	return alpha
 
 def update_skill(L_old: float, C_old: float, target_level: float, alpha: float, completion_type: str, score: Optional[float], has_assessment: bool) -> Tuple[float, float]:
@@ -35,10 +47,31 @@ def update_skill(L_old: float, C_old: float, target_level: float, alpha: float,
 	Returns (L_new, C_new)
 	"""
 	# Level update
-	L_new = clip(L_old + alpha * (target_level - L_old), 1, 5)
+	L_new = clip(L_old + alpha * (target_level - L_old), LEVEL_MIN, LEVEL_MAX)
 	# Confidence update
 	passed = completion_type == "passed"
 	score_val = score if (has_assessment and score is not None) else 0.0
-	conf_incr = 0.5 * alpha * (0.5 + (0.2 if passed else 0) + (0.3 * score_val))
+	conf_incr = CONF_RATE * alpha * (CONF_BASE + (CONF_PASSED if passed else 0) + (CONF_SCORE * score_val))
 	C_new = clip(C_old + conf_incr, 0, 1)
 	return L_new, C_new
+
+def compute_alpha_batch(weight, passed, failed, score_term):
+	"""
+	compute_alpha over numpy arrays. passed/failed are boolean arrays; score_term is
+	score - pass_threshold where an assessment score applies and 0 elsewhere.
+	"""
+	import numpy as np
+	base = ALPHA_BASE + np.where(passed, ALPHA_PASSED, np.where(failed, ALPHA_FAILED, 0.0))
+	base = base + ALPHA_SCORE * score_term
+	return np.clip(base * weight, ALPHA_MIN, ALPHA_MAX)
+
+def update_skill_batch(L_old, C_old, target_level, alpha, passed, score_val):
+	"""
+	update_skill over numpy arrays. score_val is the assessment score where one applies and 0 elsewhere.
+	Returns (L_new, C_new)
+	"""
+	import numpy as np
+	L_new = np.clip(L_old + alpha * (target_level - L_old), LEVEL_MIN, LEVEL_MAX)
+	conf_incr = CONF_RATE * alpha * (CONF_BASE + np.where(passed, CONF_PASSED, 0) + (CONF_SCORE * score_val))
+	C_new = np.clip(C_old + conf_incr, 0, 1)
+	return L_new, C_new
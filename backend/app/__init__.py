@@ -3,6 +3,7 @@ from flask import Flask
 from flask_cors import CORS
 from .routes import register_routes
 import atexit
+import os
 
 def create_app():
     app = Flask(__name__)
@@ -12,14 +13,27 @@ def create_app():
     # Register routes
     register_routes(app)
 
-    # Initialize job queue service
+    # Job queue worker starts with the first upload
     from .services.job_queue import job_queue
-    print("📋 Job queue service initialized and worker started")
+    print("📋 Job queue service initialized")
+
+    # Heavy services are built on first use. Unless SERVICE_WARMUP=0, build
+    # them in the background now and then load the busiest departments'
+    # knowledge bases, without delaying startup.
+    from .services.registry import services
+    if os.getenv("SERVICE_WARMUP", "1") != "0":
+        services.warm_up(
+            ["document_processor", "conversation_agent"],
+            then=lambda: services.get("document_processor").prewarm_vector_stores()
+        )
 
     # Register cleanup function
     def cleanup_job_queue():
         print("🛑 Shutting down job queue service...")
         job_queue.stop_worker()
+        processor = services.peek("document_processor")
+        if processor is not None:
+            processor.vector_stores.save_usage()
 
     atexit.register(cleanup_job_queue)
 
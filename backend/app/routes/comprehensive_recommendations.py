@@ -1,7 +1,9 @@
 from flask import Blueprint, jsonify, request
 import json
+import threading
 from datetime import datetime
 from ..services.data_access import get_data_file_path, _read_json, _write_json
+from ..services.recommendation_engine import recommendation_engine
 
 recommendations_bp = Blueprint('recommendations', __name__)
 
@@ -85,9 +87,16 @@ def get_ai_recommendations(user_id):
         recommendations_data = load_recommendations()
         ai_recs = recommendations_data.get("AI_RECOMMENDATIONS", {}).get(user_id, [])
 
+        # Precomputed LLM analysis with its freshness (generated_at); never generated inline
+        analysis = recommendation_engine.get(user_id)
+
         return jsonify({
             'recommendations': ai_recs,
-            'count': len(ai_recs)
+            'count': len(ai_recs),
+            'analysis': analysis['recommendations'],
+            'analysis_status': analysis['status'],
+            'generated_at': analysis['generated_at'],
+            'refreshing': analysis['refreshing']
         })
 
     except Exception as e:
@@ -282,6 +291,9 @@ def generate_ai_recommendations(user_id):
         recommendations_data["AI_RECOMMENDATIONS"][user_id] = ai_recommendations
         save_recommendations(recommendations_data)
 
+        # Regenerate the LLM analysis in the background rather than in this request
+        recommendation_engine.schedule(user_id, force=True)
+
         return jsonify({
             "success": True,
             "message": "AI recommendations generated successfully",
@@ -292,6 +304,64 @@ def generate_ai_recommendations(user_id):
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+_bulk_refresh_thread = None
+_bulk_refresh_lock = threading.Lock()
+
+@recommendations_bp.route('/ai/refresh-all', methods=['POST'])
+def refresh_all_ai_recommendations():
+    """Start a bulk refresh of every learner's AI recommendations in the background"""
+    global _bulk_refresh_thread
+    from ..services.recommendation_batch import refresh_all_recommendations, read_checkpoint
+    try:
+        data = request.get_json(silent=True) or {}
+        with _bulk_refresh_lock:
+            if _bulk_refresh_thread is not None and _bulk_refresh_thread.is_alive():
+                return jsonify({"success": False, "error": "A bulk refresh is already running",
+                                "progress": read_checkpoint()}), 409
+
+            def _run():
+                try:
+                    refresh_all_recommendations(
+                        max_concurrency=int(data.get('max_concurrency', 4)),
+                        use_llm=bool(data.get('use_llm', True)),
+                        force=bool(data.get('force', False)),
+                        resume=not data.get('restart', False)
+                    )
+                except Exception as e:
+                    print(f"❌ Bulk recommendation refresh failed: {e}")
+
+            _bulk_refresh_thread = threading.Thread(target=_run, name="recommendation-bulk-refresh", daemon=True)
+            _bulk_refresh_thread.start()
+
+        return jsonify({"success": True, "message": "Bulk refresh started"}), 202
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@recommendations_bp.route('/ai/refresh-all', methods=['GET'])
+def get_bulk_refresh_status():
+    """Progress of the current or last bulk refresh"""
+    from ..services.recommendation_batch import read_checkpoint
+    try:
+        checkpoint = read_checkpoint()
+        if checkpoint is None:
+            return jsonify({"status": "never_run"})
+        return jsonify({
+            "status": checkpoint["status"],
+            "run_id": checkpoint["run_id"],
+            "started_at": checkpoint["started_at"],
+            "updated_at": checkpoint.get("updated_at"),
+            "finished_at": checkpoint.get("finished_at"),
+            "total": checkpoint.get("total"),
+            "done": len(checkpoint["done"]),
+            "failed": len(checkpoint.get("failed", [])),
+            "counts": checkpoint["counts"],
+            "running": _bulk_refresh_thread is not None and _bulk_refresh_thread.is_alive()
+        })
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @recommendations_bp.route('/user/<user_id>/interaction/<recommendation_id>', methods=['POST'])
 def track_recommendation_interaction(user_id, recommendation_id):
     """Track user interaction with a recommendation"""
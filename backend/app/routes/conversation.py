@@ -1,11 +1,17 @@
-from flask import Blueprint, request, jsonify
-from ..services.conversation_agent import conversation_agent
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+from ..services.registry import services
+from agent.llm_gateway import peek_gateway
 import traceback
 import json
 import os
 
 conversation_bp = Blueprint('conversation', __name__)
 
+# Resolved on the first question, so registering this blueprint loads no ML libraries
+conversation_agent = services.lazy("conversation_agent")
+
+NOT_LOADED = "not loaded"
+
 def load_users() -> dict:
     """Load users from JSON file."""
     users_file = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'data', 'users.json')
@@ -83,6 +89,14 @@ def get_user_department(user_id: str) -> dict:
         print(f"ERROR: Exception getting user department: {e}")
         return {'name': '', 'id': '', 'found': False}
 
+def format_sse(event: str, data: dict) -> str:
+    """Encode one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def wants_stream(data: dict) -> bool:
+    """Stream when the body sets "stream" or the client accepts text/event-stream."""
+    return bool(data.get('stream')) or 'text/event-stream' in request.headers.get('Accept', '')
+
 def get_department_fallback_options() -> list:
     """Get list of available departments for fallback selection."""
     try:
@@ -152,6 +166,24 @@ def ask_question():
 
         print(f"DEBUG: User {user_id} | Dept: {department_name} | ID: {department_id} | Question: {question[:50]}...")
 
+        if wants_stream(data):
+            # Metadata goes out as soon as retrieval finishes, then answer tokens
+            # as the model produces them
+            def generate():
+                for event, payload in conversation_agent.stream_question(
+                    question=question,
+                    department_id=department_id,
+                    department_name=department_name
+                ):
+                    if event == 'metadata':
+                        payload = {**payload, 'department_id': department_id}
+                    yield format_sse(event, payload)
+
+            return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+                'Cache-Control': 'no-cache',
+                'X-Accel-Buffering': 'no'
+            })
+
         # Process the question using the conversation agent
         result = conversation_agent.process_question(
             question=question,
@@ -174,7 +206,10 @@ def ask_question():
             'chunks_found': result.get('chunks_found', 0),
             'department': result.get('department', department_name),
             'department_id': department_id,
-            'context_summary': result.get('context_summary', '')
+            'context_summary': result.get('context_summary', ''),
+            'summarized': result.get('summarized', True),
+            'timings': result.get('timings', {}),
+            'cache': result.get('cache', {'hit': False})
         })
 
     except Exception as e:
@@ -197,6 +232,9 @@ def conversation_health():
         total_jobs = len(job_queue.jobs)
         active_jobs = len([j for j in job_queue.jobs.values() if j.status == 'processing'])
         pending_jobs = job_queue.job_queue.qsize()
+        processor = services.peek("document_processor")
+        agent = services.peek("conversation_agent")
+        gateway = peek_gateway()
 
         return jsonify({
             'status': 'healthy',
@@ -207,7 +245,11 @@ def conversation_health():
                 'active_jobs': active_jobs,
                 'pending_jobs': pending_jobs,
                 'worker_running': job_queue.worker_thread.is_alive() if job_queue.worker_thread else False
-            }
+            },
+            # Only report on services that are already up; a health probe must not load them
+            'vector_stores': processor.vector_stores.stats() if processor is not None else NOT_LOADED,
+            'answer_cache': agent.get_answer_cache_stats() if agent is not None else NOT_LOADED,
+            'llm': gateway.metrics() if gateway is not None else NOT_LOADED
         })
     except Exception as e:
         return jsonify({
@@ -1,5 +1,6 @@
 from flask import Blueprint, jsonify, request
 from agent import supervisor
+from agent.orchestrator import Supervisor
 import json
 from datetime import datetime, timedelta
 from ..services.data_access import get_data_file_path
@@ -85,6 +86,17 @@ def events():
         except Exception as e:
             return jsonify({"error": str(e)}), 500
 
+@events_bp.route('/events/batch', methods=['POST'])
+def events_batch():
+    """Apply many learning events (e.g. a bulk LMS import); each user's state is written once"""
+    data = request.get_json(force=True)
+    events_list = data.get("events") if isinstance(data, dict) else data
+    if not isinstance(events_list, list):
+        return jsonify({"error": "Expected a list of events or {\"events\": [...]}"}), 400
+    results = Supervisor().handle_events(events_list)
+    failed = sum(1 for result in results if isinstance(result, dict) and "error" in result)
+    return jsonify({"processed": len(results), "failed": failed, "results": results})
+
 @events_bp.route('/<event_id>', methods=['GET', 'PUT', 'DELETE'])
 def event_detail(event_id):
     """Get, update, or delete a specific event"""
@@ -3,9 +3,10 @@ API Routes for AI Onboarding Agent
 Integrates the onboarding system with the existing Flask application
 """
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 import os
 import json
+import shutil
 import tempfile
 from werkzeug.utils import secure_filename
 from datetime import datetime
@@ -18,6 +19,12 @@ onboarding_bp = Blueprint('onboarding', __name__)
 UPLOAD_FOLDER = tempfile.gettempdir()
 ALLOWED_EXTENSIONS = {'pdf', 'docx', 'doc'}
 
+# Batch analysis limits; a JSON `source` must lie under BATCH_RESUME_ROOT
+BATCH_RESUME_ROOT = os.getenv('BATCH_RESUME_ROOT') or os.path.join(os.path.dirname(get_data_file_path('')), 'uploads', 'resumes')
+BATCH_MAX_WORKERS = int(os.getenv('BATCH_RESUME_MAX_WORKERS', '4'))
+BATCH_MAX_FILES = int(os.getenv('BATCH_RESUME_MAX_FILES', '2000'))
+BATCH_MAX_BYTES = int(os.getenv('BATCH_RESUME_MAX_MB', '500')) * 1024 * 1024
+
 def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
@@ -224,6 +231,97 @@ def analyze_user_onboarding():
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
+@onboarding_bp.route('/batch-analyze', methods=['POST'])
+def batch_analyze_resumes():
+    """
+    Score many resumes against one role, streaming one JSON line per resume
+    Expects: multipart form with an `archive` (.zip/.tar) or several `resumes` files,
+    or JSON with `source` (a directory or archive under BATCH_RESUME_ROOT); plus
+    `target_role` and `department`, or an explicit `role_skills` list. Optional
+    `workers` (capped at BATCH_MAX_WORKERS) and `ordered` (default true; false
+    streams results as they finish). Archives and uploads are limited to
+    BATCH_MAX_FILES files and BATCH_MAX_BYTES unpacked.
+    The last line is a summary with succeeded/failed counts.
+    """
+    from agent.batch_resume import analyze_source, resolve_role_skills, is_archive, check_archive
+
+    upload_dir = None
+
+    def _reject(error, status):
+        if upload_dir:
+            shutil.rmtree(upload_dir, ignore_errors=True)
+        return jsonify({"success": False, "error": error}), status
+
+    try:
+        if request.content_length and request.content_length > BATCH_MAX_BYTES:
+            return _reject("Upload is too large", 413)
+        if request.content_type and 'multipart/form-data' in request.content_type:
+            params = request.form
+            role_skills = [s.strip() for s in params.get('role_skills', '').split(',') if s.strip()]
+            upload_dir = tempfile.mkdtemp(prefix="batch_upload_")
+            archive = request.files.get('archive')
+            if archive and archive.filename:
+                filename = secure_filename(archive.filename)
+                if not is_archive(filename):
+                    return _reject("Archive must be .zip, .tar, .tar.gz or .tgz", 400)
+                source = os.path.join(upload_dir, filename)
+                archive.save(source)
+            else:
+                files = [f for f in request.files.getlist('resumes') if f.filename and allowed_file(f.filename)]
+                if not files:
+                    return _reject("No resume archive or files provided", 400)
+                if len(files) > BATCH_MAX_FILES:
+                    return _reject(f"At most {BATCH_MAX_FILES} resumes per batch", 413)
+                source = os.path.join(upload_dir, 'resumes')
+                os.makedirs(source)
+                for i, f in enumerate(files):
+                    # Prefix keeps same-named uploads apart and preserves upload order
+                    f.save(os.path.join(source, f"{i:05d}_{secure_filename(f.filename)}"))
+        else:
+            params = request.get_json() or {}
+            role_skills = params.get('role_skills') or []
+            source = params.get('source')
+            root = os.path.realpath(BATCH_RESUME_ROOT)
+            source = os.path.realpath(os.path.join(root, source)) if source else None
+            # Only files placed under the resume root can be read, never arbitrary server paths
+            if not source or os.path.commonpath([root, source]) != root or not os.path.exists(source):
+                return _reject("source must be an existing directory or archive under the resume root", 400)
+
+        target_role = params.get('target_role')
+        department = params.get('department')
+        if not role_skills:
+            if not target_role:
+                return _reject("Provide target_role or role_skills", 400)
+            try:
+                role_skills = resolve_role_skills(target_role, department)
+            except ValueError as e:
+                return _reject(str(e), 404)
+        if os.path.isfile(source):
+            try:
+                check_archive(source, BATCH_MAX_FILES, BATCH_MAX_BYTES)
+            except ValueError as e:
+                return _reject(str(e), 413)
+            except Exception:
+                return _reject("Archive could not be read", 400)
+        workers = min(max(int(params.get('workers') or BATCH_MAX_WORKERS), 1), BATCH_MAX_WORKERS)
+        ordered = str(params.get('ordered', 'true')).lower() not in ('false', '0', 'no')
+    except Exception as e:
+        return _reject(str(e), 500)
+
+    def generate():
+        try:
+            for record in analyze_source(source, role_skills, workers=workers, ordered=ordered,
+                                         max_members=BATCH_MAX_FILES, max_bytes=BATCH_MAX_BYTES):
+                yield json.dumps(record) + "\n"
+        except Exception as e:
+            yield json.dumps({"type": "error", "error": str(e)}) + "\n"
+        finally:
+            if upload_dir:
+                shutil.rmtree(upload_dir, ignore_errors=True)
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson',
+                    headers={'X-Accel-Buffering': 'no'})
+
 @onboarding_bp.route('/status/<user_id>', methods=['GET'])
 def get_onboarding_status(user_id):
     """Get onboarding status for a specific user"""
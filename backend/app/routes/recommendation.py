@@ -3,6 +3,10 @@ import json
 import os
 from datetime import datetime
 from ..services.ai_recommendations import AIRecommendationsService
+from ..services.recommendation_engine import recommendation_engine
+
+# How long a first request waits for a user's recommendations to be generated
+AI_RECOMMENDATION_WAIT_SECONDS = float(os.getenv("AI_RECOMMENDATION_WAIT_SECONDS", "20"))
 
 recommendation_bp = Blueprint('recommendation', __name__)
 
@@ -40,24 +44,31 @@ def get_recommendations():
 def get_ai_recommendations(user_id):
     """
     Get AI-powered personalized recommendations for a user
+
+    Served from the recommendation engine's precomputed results; a refresh
+    is queued in the background when the user's data may have changed.
     """
     try:
-        # Initialize AI recommendations service
-        ai_service = AIRecommendationsService()
+        result = recommendation_engine.get(user_id)
+        if result['status'] == 'pending':
+            # Nothing generated for this user yet: wait a bounded time for the first run
+            recommendation_engine.wait(user_id, AI_RECOMMENDATION_WAIT_SECONDS)
+            result = recommendation_engine.get(user_id)
 
-        # Generate recommendations
-        recommendations = ai_service.generate_recommendations(user_id)
+        if result['status'] == 'error':
+            return jsonify({
+                'success': False,
+                'error': result['error']
+            }), 400
 
         return jsonify({
             'success': True,
-            'data': recommendations
-        })
+            'data': result['recommendations'],
+            'status': result['status'],
+            'generated_at': result['generated_at'],
+            'refreshing': result['refreshing']
+        }), 200 if result['status'] == 'ready' else 202
 
-    except ValueError as e:
-        return jsonify({
-            'success': False,
-            'error': str(e)
-        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -1,11 +1,12 @@
 from flask import Blueprint, jsonify, request
 import os
 from werkzeug.security import generate_password_hash, check_password_hash
-from ..services.data_access import _read_json, _write_json
+from ..services.data_access import _read_json, _write_json, UserDirectory
+from ..services.session_store import SessionStore
+from ..services.rate_limiter import SlidingWindowRateLimiter, create_rate_limiter
 from datetime import datetime, timedelta
 import uuid
 from typing import Any, Dict, Optional, List
-import time
 import re
 import html
 from ..services.department import add_manager_to_department
@@ -18,11 +19,16 @@ user_auth_bp = Blueprint('user_auth', __name__)
 DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))), 'data')
 USERS_FILE = os.path.join(DATA_DIR, 'users.json')
 SESSIONS_FILE = os.path.join(DATA_DIR, 'sessions.json')
-RATE_LIMIT_FILE = os.path.join(DATA_DIR, 'rate_limits.json')
+
+# Sessions expire this long after sign-in
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", str(7 * 24 * 3600)))
 
 # Rate limiting configuration
 MAX_LOGIN_ATTEMPTS = 5
 RATE_LIMIT_WINDOW = 300  # 5 minutes in seconds
+# "memory" limits each process on its own; "sqlite" shares limits between processes
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_DB = os.getenv("RATE_LIMIT_DB", os.path.join(DATA_DIR, 'state', 'rate_limits.sqlite3'))
 
 # Helper functions
 
@@ -35,58 +41,46 @@ def load_users() -> Dict[str, Any]:
 def save_users(data: Dict[str, Any]) -> None:
     _write_json(USERS_FILE, data)
 
-def load_sessions() -> Dict[str, Any]:
-    return _read_json(SESSIONS_FILE, {})
-
-def save_sessions(data: Dict[str, Any]) -> None:
-    _write_json(SESSIONS_FILE, data)
-
-def load_rate_limits() -> Dict[str, Any]:
-    return _read_json(RATE_LIMIT_FILE, {})
-
-def save_rate_limits(data: Dict[str, Any]) -> None:
-    _write_json(RATE_LIMIT_FILE, data)
+_user_directory: Optional[UserDirectory] = None
+_session_store: Optional[SessionStore] = None
+
+def get_user_directory() -> UserDirectory:
+    """Indexed, change-only-writes view of USERS_FILE."""
+    global _user_directory
+    if _user_directory is None or _user_directory.path != USERS_FILE:
+        _user_directory = UserDirectory(USERS_FILE)
+    return _user_directory
+
+def get_session_store() -> SessionStore:
+    """Process-wide session store, logged next to SESSIONS_FILE (imported from it once)."""
+    global _session_store
+    log_path = os.path.join(os.path.dirname(SESSIONS_FILE), 'sessions.log')
+    if _session_store is None or _session_store.log_path != log_path:
+        if _session_store is not None:
+            _session_store.close()
+        _session_store = SessionStore(log_path, ttl_seconds=SESSION_TTL_SECONDS, legacy_path=SESSIONS_FILE)
+    return _session_store
+
+_login_limiter: Optional[SlidingWindowRateLimiter] = None
+
+def get_login_limiter() -> SlidingWindowRateLimiter:
+    global _login_limiter
+    if _login_limiter is None:
+        _login_limiter = create_rate_limiter(MAX_LOGIN_ATTEMPTS, RATE_LIMIT_WINDOW,
+                                             backend=RATE_LIMIT_BACKEND, db_path=RATE_LIMIT_DB)
+    return _login_limiter
 
 def check_rate_limit(ip_address: str) -> bool:
     """Check if IP address has exceeded rate limit for login attempts"""
-    rate_limits = load_rate_limits()
-    current_time = time.time()
-    
-    # Clean old entries
-    rate_limits = {
-        ip: data for ip, data in rate_limits.items()
-        if current_time - data.get('first_attempt', 0) < RATE_LIMIT_WINDOW
-    }
-    
-    ip_data = rate_limits.get(ip_address, {'attempts': 0, 'first_attempt': current_time})
-    
-    if ip_data['attempts'] >= MAX_LOGIN_ATTEMPTS:
-        return False
-    
-    return True
+    return get_login_limiter().allowed(ip_address)
 
 def record_failed_attempt(ip_address: str) -> None:
     """Record a failed login attempt"""
-    rate_limits = load_rate_limits()
-    current_time = time.time()
-    
-    if ip_address not in rate_limits:
-        rate_limits[ip_address] = {'attempts': 1, 'first_attempt': current_time}
-    else:
-        # If outside rate limit window, reset
-        if current_time - rate_limits[ip_address].get('first_attempt', 0) >= RATE_LIMIT_WINDOW:
-            rate_limits[ip_address] = {'attempts': 1, 'first_attempt': current_time}
-        else:
-            rate_limits[ip_address]['attempts'] += 1
-    
-    save_rate_limits(rate_limits)
+    get_login_limiter().hit(ip_address)
 
 def reset_rate_limit(ip_address: str) -> None:
     """Reset rate limit for IP on successful login"""
-    rate_limits = load_rate_limits()
-    if ip_address in rate_limits:
-        del rate_limits[ip_address]
-        save_rate_limits(rate_limits)
+    get_login_limiter().reset(ip_address)
 
 def sanitize_input(value: str) -> str:
     """Sanitize user input to prevent XSS and other attacks"""
@@ -573,13 +567,7 @@ def create_user_dashboard_entry(user_id: str) -> None:
     dashboard_data.append(new_dashboard_entry)
     _write_json(dashboard_file, dashboard_data)
 
-def verify_user(email: str, password: str) -> bool:
-    users = load_users()
-    key = email.strip().lower()
-    u = users.get(key)
-    if not u:
-        return False
-    
+def check_user_password(u: Dict[str, Any], password: str) -> bool:
     # Check if user has a plain text password field
     if "password" in u and u["password"] == password:
         return True
@@ -594,25 +582,28 @@ def verify_user(email: str, password: str) -> bool:
     
     return False
 
+def password_needs_rehash(u: Dict[str, Any]) -> bool:
+    """True for records still holding a plain text password."""
+    return "password" in u or not str(u.get("password_hash", "")).startswith(("scrypt:", "pbkdf2:"))
+
+def verify_user(email: str, password: str) -> bool:
+    _, u = get_user_directory().find(email)
+    return bool(u) and check_user_password(u, password)
+
 def new_session(email: str) -> str:
-    sessions = load_sessions()
-    token = uuid.uuid4().hex
-    sessions[token] = {
-        "email": email.strip().lower(),
-        "created_at": now_iso(),
-    }
-    save_sessions(sessions)
-    return token
+    return get_session_store().create(email)
 
 def get_session_user(token: str) -> Optional[Dict[str, Any]]:
     if not token:
         return None
-    sessions = load_sessions()
-    info = sessions.get(token)
+    info = get_session_store().get(token)
     if not info:
         return None
-    users = load_users()
-    return users.get(info["email"])
+    _, user = get_user_directory().find(info["email"])
+    return dict(user) if user else None
+
+def end_session(token: str) -> bool:
+    return get_session_store().revoke(token)
 
 @user_auth_bp.route('/sign-in', methods=['POST'])
 def sign_in():
@@ -644,40 +635,25 @@ def sign_in():
     if name:
         name = sanitize_input(name)
     
-    users = load_users()
-
-    # Primary lookup by normalized email key
-    user = users.get(email)
-
-    # Secondary lookup: some legacy/admin records may be stored under a
-    # different key; search values by their embedded email field and
-    # re-key the user to the normalized email to avoid duplicate creation.
-    if user is None:
-        found_key = None
-        for k, u in list(users.items()):
-            try:
-                if (u.get("email") or "").strip().lower() == email:
-                    user = u
-                    found_key = k
-                    break
-            except Exception:
-                continue
-        if user is not None and found_key is not None and found_key != email:
-            users[email] = user
-            del users[found_key]
-            save_users(users)
+    # One indexed lookup: by normalized email key, or by the embedded email
+    # field for legacy/admin records stored under a different key
+    directory = get_user_directory()
+    key, user = directory.find(email)
 
     if user is None:
         # Only auto-create for specific endpoints like get-started, not general sign-in
         record_failed_attempt(client_ip)
         return jsonify({"error": "Invalid email or password"}), 401
-    else:
-        # Ensure users file is up-to-date before verifying
-        save_users(users)
-        if not verify_user(email, password):
-            record_failed_attempt(client_ip)
-            return jsonify({"error": "Invalid email or password"}), 401
-        reset_rate_limit(client_ip)  # Reset on successful login
+    if not check_user_password(user, password):
+        record_failed_attempt(client_ip)
+        return jsonify({"error": "Invalid email or password"}), 401
+    reset_rate_limit(client_ip)  # Reset on successful login
+
+    # users.json is only rewritten when the record changes: re-keying a legacy
+    # record to the normalized email, or replacing a plain text password
+    if key != email or password_needs_rehash(user):
+        changes = {"password_hash": generate_password_hash(password)} if password_needs_rehash(user) else {}
+        directory.update(key, changes, new_key=email, remove=["password"])
     
     token = new_session(email)
     # Ensure manager is listed in department managers array for both new and existing users
@@ -815,6 +791,15 @@ def me():
         return jsonify({"error": "Unauthorized"}), 401
     return jsonify({"user": user})
 
+@user_auth_bp.route('/sign-out', methods=['POST'])
+def sign_out():
+    auth = request.headers.get("Authorization", "")
+    token = auth.replace("Bearer", "").strip()
+    if not token:
+        return jsonify({"error": "Authorization token is required"}), 400
+    end_session(token)
+    return jsonify({"message": "Signed out"})
+
 @user_auth_bp.route('/learning-style', methods=['POST'])
 def save_learning_style():
     """Save user's learning style (simplified)"""
@@ -3,28 +3,51 @@ AI Recommendations Service using Groq
 Analyzes learning paths progress, user progress, deadlines, and skill gaps to provide personalized recommendations
 """
 
-import groq
 import json
 import os
 from typing import Dict, List, Optional, Any
 from datetime import datetime, timedelta
-from .data_access import get_data_file_path, _read_json
+from .data_access import get_data_file_path, read_json_cached
+from agent.llm_gateway import get_gateway
+
+
+def deadline_urgency(days_remaining: int) -> str:
+    """Days to a deadline as the urgency the prompt needs; it changes only at the bucket edges."""
+    if days_remaining < 0:
+        return "overdue"
+    for limit in (3, 7, 14):
+        if days_remaining <= limit:
+            return f"due within {limit} days"
+    return "due later"
+
+
+def stalled_for(days_stalled: int) -> str:
+    """Days since a stalled path was last opened, bucketed like deadline_urgency."""
+    if days_stalled <= 14:
+        return "1-2 weeks"
+    if days_stalled <= 30:
+        return "2-4 weeks"
+    return "over a month"
 
 
 class AIRecommendationsService:
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, require_api_key: bool = True):
         """
         Initialize AI Recommendations Service
         Args:
             api_key: Groq API key. If None, will try to read from GROQ_API_KEY environment variable
+            require_api_key: If False, a missing key is allowed and only fallback recommendations are produced
         """
         if api_key is None:
             api_key = os.getenv('GROQ_API_KEY')
 
-        if not api_key:
+        if not api_key and require_api_key:
             raise ValueError("Groq API key is required. Set GROQ_API_KEY environment variable or pass api_key parameter.")
 
-        self.client = groq.Groq(api_key=api_key)
+        self.llm_enabled = bool(api_key)
+        self.gateway = get_gateway()
+        if api_key:
+            self.gateway.use_api_key("groq", api_key)
         self.model = "llama-3.1-8b-instant"
 
     def get_user_learning_data(self, user_id: str) -> Dict[str, Any]:
@@ -56,11 +79,51 @@ class AIRecommendationsService:
             "timestamp": datetime.now().isoformat()
         }
 
+    def get_all_users_learning_data(self) -> Dict[str, Dict[str, Any]]:
+        """
+        get_user_learning_data for every user (registered, or with progress, a dashboard
+        or a skill gap analysis), loading each data file once instead of once per user
+        """
+        progress_by_user: Dict[str, List[Dict]] = {}
+        for item in read_json_cached(get_data_file_path('LearningPathProgress.json'), []):
+            progress_by_user.setdefault(item.get('attributes', {}).get('user_id'), []).append(item)
+
+        # First match wins, as in the per-user lookups
+        dashboards: Dict[str, Dict] = {}
+        for dashboard in read_json_cached(get_data_file_path('UserDashboard.json'), []):
+            attrs = dashboard.get('attributes', {})
+            dashboards.setdefault(attrs.get('user_id'), attrs)
+
+        gaps_by_user: Dict[str, List[Dict]] = {}
+        for gap_entry in read_json_cached(get_data_file_path('SkillGapAnalysis.json'), []):
+            attrs = gap_entry.get('attributes', {})
+            gaps_by_user.setdefault(attrs.get('user_id'), attrs.get('gaps', []))
+
+        learning_paths = self._get_learning_paths()
+        timestamp = datetime.now().isoformat()
+        user_ids = {u.get('user_id') for u in read_json_cached(get_data_file_path('users.json'), {}).values()
+                    if isinstance(u, dict)}
+        user_ids = (user_ids | set(progress_by_user) | set(dashboards) | set(gaps_by_user)) - {None}
+
+        all_data = {}
+        for user_id in sorted(user_ids):
+            progress = progress_by_user.get(user_id, [])
+            all_data[user_id] = {
+                "user_id": user_id,
+                "learning_path_progress": progress,
+                "user_dashboard": dashboards.get(user_id),
+                "learning_paths": learning_paths,
+                "skill_gaps": gaps_by_user.get(user_id, []),
+                "progress_analysis": self._analyze_progress(progress, learning_paths),
+                "timestamp": timestamp
+            }
+        return all_data
+
     def _get_learning_path_progress(self, user_id: str) -> List[Dict]:
         """Get learning path progress for a specific user"""
         try:
             progress_file = get_data_file_path('LearningPathProgress.json')
-            all_progress = _read_json(progress_file, [])
+            all_progress = read_json_cached(progress_file, [])
 
             user_progress = [
                 item for item in all_progress
@@ -76,7 +139,7 @@ class AIRecommendationsService:
         """Get user dashboard data"""
         try:
             dashboard_file = get_data_file_path('UserDashboard.json')
-            all_dashboards = _read_json(dashboard_file, [])
+            all_dashboards = read_json_cached(dashboard_file, [])
 
             for dashboard in all_dashboards:
                 if dashboard.get('attributes', {}).get('user_id') == user_id:
@@ -91,12 +154,12 @@ class AIRecommendationsService:
         """Get all learning paths data"""
         try:
             paths_file = get_data_file_path('LearningPaths.json')
-            learning_paths = _read_json(paths_file, {})
+            learning_paths = read_json_cached(paths_file, {}).copy()
 
             # Also get LearningPath.json if it exists
             try:
                 lp_file = get_data_file_path('LearningPath.json')
-                lp_data = _read_json(lp_file, [])
+                lp_data = read_json_cached(lp_file, [])
                 for item in lp_data:
                     if 'id' in item:
                         learning_paths[item['id']] = item
@@ -112,7 +175,7 @@ class AIRecommendationsService:
         """Get skill gap analysis for a specific user"""
         try:
             skill_gap_file = get_data_file_path('SkillGapAnalysis.json')
-            all_gaps = _read_json(skill_gap_file, [])
+            all_gaps = read_json_cached(skill_gap_file, [])
 
             user_gaps = []
             for gap_entry in all_gaps:
@@ -208,28 +271,27 @@ class AIRecommendationsService:
 
         return analysis
 
-    def generate_recommendations(self, user_id: str) -> Dict[str, Any]:
+    def generate_recommendations(self, user_id: str, user_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         Generate AI-powered recommendations for a user based on their learning data and skill gaps
         """
-        # Get user learning data
-        user_data = self.get_user_learning_data(user_id)
+        # Get user learning data (unless the caller already loaded it)
+        if user_data is None:
+            user_data = self.get_user_learning_data(user_id)
+
+        if not self.llm_enabled:
+            return self._create_fallback_recommendations(user_data)
 
         # Create comprehensive prompt for Groq
         prompt = self._create_recommendations_prompt(user_data)
 
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=4000
-            )
+            # Deterministic, so a cached answer is the one the model would give again
+            response = self.gateway.complete("groq", prompt, model=self.model, temperature=0, max_tokens=4000,
+                                             cache=True)
 
             # Clean and parse response
-            response_text = response.choices[0].message.content.strip()
+            response_text = response.text.strip()
 
             # Remove markdown code blocks if present
             if response_text.startswith('```json'):
@@ -242,6 +304,13 @@ class AIRecommendationsService:
             # Parse JSON response
             recommendations = json.loads(response_text.strip())
 
+            # Exact day counts come from today's data, not from the (possibly cached) answer
+            days_stalled = {p.get('path_id'): p.get('days_stalled')
+                            for p in (user_data.get('progress_analysis') or {}).get('stalled_paths', [])}
+            for path in recommendations.get('stalled_paths_recovery', []):
+                if isinstance(path, dict) and path.get('path_id') in days_stalled:
+                    path['days_stalled'] = days_stalled[path['path_id']]
+
             # Add metadata
             recommendations['metadata'] = {
                 'user_id': user_id,
@@ -254,13 +323,38 @@ class AIRecommendationsService:
 
         except json.JSONDecodeError as e:
             print(f"JSON parsing error: {e}")
-            print(f"Response was: {response.choices[0].message.content}")
+            print(f"Response was: {response.text}")
+            self.gateway.forget(response)
             return self._create_fallback_recommendations(user_data)
 
         except Exception as e:
             print(f"Groq API error: {e}")
             return self._create_fallback_recommendations(user_data)
 
+    def _prompt_data(self, user_data: Dict[str, Any]) -> Dict[str, Any]:
+        """user_data without the values that change with the clock alone.
+
+        The prompt is the cache key, so the analysis timestamp is left out and
+        day counts are given as buckets (deadline_urgency, stalled_for): the
+        model still sees what is urgent or long stalled, and unchanged
+        learning data gives the same prompt until a bucket changes.
+        """
+        data = {k: v for k, v in user_data.items() if k != 'timestamp'}
+        analysis = dict(data.get('progress_analysis') or {})
+        analysis['upcoming_deadlines'] = [self._bucketed(d, 'days_remaining', 'urgency', deadline_urgency)
+                                          for d in analysis.get('upcoming_deadlines', [])]
+        analysis['stalled_paths'] = [self._bucketed(s, 'days_stalled', 'stalled_for', stalled_for)
+                                     for s in analysis.get('stalled_paths', [])]
+        data['progress_analysis'] = analysis
+        return data
+
+    @staticmethod
+    def _bucketed(item: Dict[str, Any], days_key: str, bucket_key: str, bucket) -> Dict[str, Any]:
+        out = {k: v for k, v in item.items() if k != days_key}
+        if item.get(days_key) is not None:
+            out[bucket_key] = bucket(item[days_key])
+        return out
+
     def _create_recommendations_prompt(self, user_data: Dict[str, Any]) -> str:
         """Create a comprehensive prompt for GROQ to generate recommendations"""
 
@@ -280,7 +374,7 @@ class AIRecommendationsService:
 You are an expert learning advisor AI. Analyze the following user learning data and provide personalized recommendations to help them succeed in their learning journey.
 
 USER LEARNING DATA:
-{json.dumps(user_data, indent=2)}
+{json.dumps(self._prompt_data(user_data), indent=2)}
 
 {skill_gaps_text}
 
@@ -347,7 +441,7 @@ Respond in this exact JSON format:
     "stalled_paths_recovery": [
         {{
             "path_id": "learning_path_id",
-            "days_stalled": X,
+            "stalled_for": "1-2 weeks|2-4 weeks|over a month",
             "recovery_strategy": "Specific plan to restart progress",
             "motivation_tip": "Encouraging message to restart"
         }}
@@ -468,7 +562,8 @@ Respond in this exact JSON format:
                 "user_id": user_data['user_id'],
                 "generated_at": datetime.now().isoformat(),
                 "analysis_timestamp": user_data['timestamp'],
-                "ai_model": "llama-3.1-8b-instant"
+                "ai_model": "llama-3.1-8b-instant",
+                "fallback": True
             }
         }
 
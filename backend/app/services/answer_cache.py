@@ -0,0 +1,103 @@
+import re
+import time
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+
+def normalize_question(question: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace before embedding."""
+    return " ".join(re.findall(r"\w+", question.lower()))
+
+
+class AnswerCache:
+    """Per-department semantic cache of conversation answers.
+
+    Entries are keyed by the L2-normalised embedding of the normalised
+    question; a lookup returns the closest entry whose cosine similarity is
+    at least ``similarity_threshold`` and which is younger than
+    ``ttl_seconds``. Ingesting a document invalidates the department, and
+    answers computed against the old knowledge base are not stored.
+    """
+
+    def __init__(self, similarity_threshold: float = 0.95, ttl_seconds: float = 86400,
+                 max_entries_per_department: int = 256):
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries_per_department = max_entries_per_department
+        self.lock = threading.Lock()
+        self.entries: Dict[str, List[Dict[str, Any]]] = {}
+        self.generations: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _unit(vector: List[float]) -> np.ndarray:
+        v = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(v)
+        return v / norm if norm else v
+
+    def generation(self, department_id: str) -> int:
+        with self.lock:
+            return self.generations.get(department_id, 0)
+
+    def lookup(self, department_id: str, vector: List[float]) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """Return ``(result, metadata)`` for the closest fresh entry, or None."""
+        query = self._unit(vector)
+        now = time.time()
+        with self.lock:
+            entries = [e for e in self.entries.get(department_id, []) if now - e["created_at"] < self.ttl_seconds]
+            self.entries[department_id] = entries
+            if entries:
+                similarities = np.stack([e["vector"] for e in entries]) @ query
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.similarity_threshold:
+                    entry = entries[best]
+                    entry["hits"] += 1
+                    self.hits += 1
+                    return dict(entry["result"]), {
+                        "hit": True,
+                        "similarity": round(float(similarities[best]), 4),
+                        "matched_question": entry["question"],
+                        "age_seconds": round(now - entry["created_at"], 1)
+                    }
+            self.misses += 1
+            return None
+
+    def put(self, department_id: str, question: str, vector: List[float], result: Dict[str, Any],
+            generation: Optional[int] = None) -> bool:
+        """Store an answer unless the department was invalidated since ``generation``."""
+        with self.lock:
+            if generation is not None and generation != self.generations.get(department_id, 0):
+                return False
+            entries = self.entries.setdefault(department_id, [])
+            entries.append({
+                "question": question,
+                "vector": self._unit(vector),
+                "result": dict(result),
+                "created_at": time.time(),
+                "hits": 0
+            })
+            if len(entries) > self.max_entries_per_department:
+                # Drop the oldest entry
+                entries.pop(0)
+            return True
+
+    def invalidate(self, department_id: str) -> None:
+        with self.lock:
+            self.generations[department_id] = self.generations.get(department_id, 0) + 1
+            if self.entries.pop(department_id, None):
+                self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "entries": sum(len(e) for e in self.entries.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "similarity_threshold": self.similarity_threshold,
+                "ttl_seconds": self.ttl_seconds
+            }
@@ -0,0 +1,99 @@
+import re
+import hashlib
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+
+
+def estimate_tokens(text: str) -> int:
+    """Fast local token estimate: words and punctuation marks, plus a share for long words.
+
+    Tracks BPE tokenizers closely enough for budgeting English prose
+    without loading a tokenizer.
+    """
+    pieces = _TOKEN_PATTERN.findall(text)
+    return sum(1 + len(p) // 8 for p in pieces)
+
+
+class MinHasher:
+    """MinHash signatures over word shingles for near-duplicate detection."""
+
+    def __init__(self, num_perm: int = 64, shingle_size: int = 3, seed: int = 1):
+        self.shingle_size = shingle_size
+        rng = np.random.RandomState(seed)
+        self.a = rng.randint(1, 2 ** 31 - 1, size=num_perm).astype(np.uint64)
+        self.b = rng.randint(0, 2 ** 31 - 1, size=num_perm).astype(np.uint64)
+
+    def _shingles(self, text: str) -> List[str]:
+        words = re.findall(r"\w+", text.lower())
+        if len(words) <= self.shingle_size:
+            return [" ".join(words)] if words else [""]
+        return [" ".join(words[i:i + self.shingle_size]) for i in range(len(words) - self.shingle_size + 1)]
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = np.array([
+            int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=4).digest(), 'big')
+            for s in set(self._shingles(text))
+        ], dtype=np.uint64)
+        return ((self.a[:, None] * hashes[None, :] + self.b[:, None]) % _MERSENNE_PRIME).min(axis=1)
+
+    @staticmethod
+    def similarity(sig_a: np.ndarray, sig_b: np.ndarray) -> float:
+        """Estimated Jaccard similarity of the two shingle sets."""
+        return float(np.mean(sig_a == sig_b))
+
+
+class ContextBuilder:
+    """Turn retrieved chunks into a prompt context within a token budget.
+
+    Chunks are ranked by retrieval score, near-duplicates (estimated
+    Jaccard similarity at or above ``dedup_threshold``) are dropped in
+    favour of the better-ranked copy, and the rest are packed in rank
+    order until ``token_budget`` is reached.
+    """
+
+    def __init__(self, token_budget: int = 3000, dedup_threshold: float = 0.8, num_perm: int = 64):
+        self.token_budget = token_budget
+        self.dedup_threshold = dedup_threshold
+        self.hasher = MinHasher(num_perm=num_perm)
+
+    def deduplicate(self, chunks: List[str]) -> List[str]:
+        kept, signatures = [], []
+        for chunk in chunks:
+            signature = self.hasher.signature(chunk)
+            if any(self.hasher.similarity(signature, s) >= self.dedup_threshold for s in signatures):
+                continue
+            kept.append(chunk)
+            signatures.append(signature)
+        return kept
+
+    def build(self, chunks: List[str], scores: Optional[List[float]] = None) -> Dict[str, Any]:
+        """Rank, deduplicate and pack ``chunks``.
+
+        Returns the packed ``context`` with its ``tokens``, the ranked
+        ``chunks`` that survived deduplication, how many ``duplicates`` were
+        removed and how many chunks were ``dropped`` for lack of budget.
+        """
+        if scores is not None:
+            order = sorted(range(len(chunks)), key=lambda i: -scores[i])
+            chunks = [chunks[i] for i in order]
+        unique = self.deduplicate(chunks)
+
+        packed, tokens = [], 0
+        for chunk in unique:
+            cost = estimate_tokens(chunk)
+            if tokens + cost > self.token_budget:
+                continue
+            packed.append(chunk)
+            tokens += cost
+
+        return {
+            "context": "\n\n".join(packed),
+            "tokens": tokens,
+            "chunks": unique,
+            "duplicates": len(chunks) - len(unique),
+            "dropped": len(unique) - len(packed)
+        }
@@ -1,154 +1,137 @@
 import os
-import ast
-import asyncio
-from typing import List, Dict, Any
+import time
+from typing import List, Dict, Any, Tuple, Iterator
+import numpy as np
 from langchain.schema import Document
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from langchain_community.vectorstores import FAISS
-from langchain.chat_models import init_chat_model
 from .document_processor import document_processor
-from langchain_groq import ChatGroq
-from transformers import AutoModel
-from sentence_transformers import SentenceTransformer
-model_name = "BAAI/bge-small-en-v1.5"  
-model = SentenceTransformer(model_name)
+from .answer_cache import normalize_question
+from .keyword_index import reciprocal_rank_fusion
+from .context_builder import ContextBuilder
+from .registry import services
+from agent.llm_gateway import ChatModel
+
+def dense_search(vector_store: FAISS, query_vector: List[float], k: int) -> List[Tuple[str, float]]:
+    """Top ``k`` (docstore id, distance) pairs for one query vector."""
+    if vector_store.index.ntotal == 0:
+        return []
+    vector = np.asarray([query_vector], dtype=np.float32)
+    if vector_store._normalize_L2:
+        import faiss
+        faiss.normalize_L2(vector)
+    scores, indices = vector_store.index.search(vector, min(k, vector_store.index.ntotal))
+    return [
+        (vector_store.index_to_docstore_id[i], float(score))
+        for score, i in zip(scores[0], indices[0]) if i != -1
+    ]
 
 class ConversationAgent:
-    def __init__(self):
-        self.llm = ChatGroq(model_name="llama-3.3-70b-versatile", temperature=0)
-        self.embeddings = model
+    def __init__(self, llm=None, embeddings=None, answer_cache=None):
+        # Calls go through the shared LLM gateway (pooling, concurrency limits, retries)
+        self.llm = llm or ChatModel("groq", "llama-3.3-70b-versatile", temperature=0)
+        # Queries are embedded by the same provider and cache as ingest, so both
+        # sides stay in one vector space (see embedding_providers.py)
+        self.embeddings = embeddings or document_processor.embeddings
+        # Retrieved chunks are deduplicated and packed into this many tokens; the
+        # summarization call only runs when they do not fit
+        self.context_builder = ContextBuilder(
+            token_budget=int(os.getenv("CONVERSATION_CONTEXT_TOKENS", "3000")),
+            dedup_threshold=float(os.getenv("CONTEXT_DEDUP_THRESHOLD", "0.8"))
+        )
+        # Hybrid retrieval: dense and BM25 candidates per side, fused top-k
+        self.retrieval_candidates = int(os.getenv("RETRIEVAL_CANDIDATES", "20"))
+        self.retrieval_top_k = int(os.getenv("RETRIEVAL_TOP_K", "8"))
+        # Repeated questions are answered from the semantic answer cache
+        # (ANSWER_CACHE_THRESHOLD / ANSWER_CACHE_TTL_SECONDS, see document_processor.py)
+        self.answer_cache = answer_cache or document_processor.answer_cache
 
     def get_department_vector_store(self, department_id: str) -> FAISS:
         """Get vector store for a specific department."""
         print(f"DEBUG: Getting vector store for department: {department_id}")
         return document_processor.get_vector_store(department_id)
 
-    def search_by_chunks(self, query: str, department_id: str, k: int = 3) -> List[str]:
-        """Search for relevant chunks in department's vector store."""
-        try:
-            vector_store = self.get_department_vector_store(department_id)
-            results = vector_store.similarity_search_with_score(query=query, k=k)
-
-            chunks = []
-            for result in results:
-                doc = result[0]
-                # Accept any document type, not just "chunk"
-                if doc.page_content and len(doc.page_content.strip()) > 0:
-                    chunks.append(doc.page_content)
-
-            print(f"DEBUG: Found {len(chunks)} chunks for query: {query[:50]}...")
-            return chunks
-        except Exception as e:
-            print(f"Error searching chunks: {e}")
-            return []
+    def get_vector_store_stats(self) -> Dict[str, Any]:
+        """Resident vector store sizes and cache counters."""
+        return document_processor.vector_stores.stats()
 
-    def search_by_nodes(self, keywords: List[str], department_id: str, k: int = 2) -> List[str]:
-        """Search for relevant nodes in department's vector store."""
-        try:
-            vector_store = self.get_department_vector_store(department_id)
-            chunks = []
-
-            for keyword in keywords:
-                results = vector_store.similarity_search_with_score(query=keyword, k=k)
-                for result in results:
-                    doc = result[0]
-                    # Accept any document with content
-                    if doc.page_content and len(doc.page_content.strip()) > 0:
-                        chunks.append(doc.page_content)
-
-            return list(set(chunks))  # Remove duplicates
-        except Exception as e:
-            print(f"Error searching nodes: {e}")
-            return []
+    def get_answer_cache_stats(self) -> Dict[str, Any]:
+        """Semantic answer cache counters."""
+        return self.answer_cache.stats()
 
-    def search_by_relationships(self, keywords: List[str], department_id: str, k: int = 2) -> List[str]:
-        """Search for relevant relationships in department's vector store."""
+    def lookup_cached_answer(self, question: str, department_id: str):
+        """Return (cached result or None, question vector, cache generation)."""
+        generation = self.answer_cache.generation(department_id)
         try:
-            vector_store = self.get_department_vector_store(department_id)
-            chunks = []
-
-            # Create relationship patterns
-            relationships = [f"{keywords[i].lower()} -> {keywords[i+1].lower()}"
-                           for i in range(len(keywords)-1)]
-
-            for relationship in relationships:
-                results = vector_store.similarity_search_with_score(query=relationship, k=k)
-                for result in results:
-                    doc = result[0]
-                    # Accept any document with content
-                    if doc.page_content and len(doc.page_content.strip()) > 0:
-                        chunks.append(doc.page_content)
-
-            return list(set(chunks))  # Remove duplicates
+            question_vector = self.embeddings.embed_query(normalize_question(question))
         except Exception as e:
-            print(f"Error searching relationships: {e}")
-            return []
-
-    def extract_keywords(self, query: str) -> List[str]:
-        """Extract keywords from user query using LLM."""
-        try:
-            keyword_extract_prompt = f"""
-            Role - You are an expert in extracting keywords from a given text. Your task is to extract the keywords from the provided text.
-            Just return the keywords in a list format like ['keyword1', 'keyword2', 'keyword3']. Don't return it as JSON.
-
-            Input: {query}
-            """
-
-            response = self.llm.invoke(keyword_extract_prompt)
-            keywords = ast.literal_eval(response.content.strip())
-            return [keyword.lower() for keyword in keywords if keyword]
-        except Exception as e:
-            print(f"Error extracting keywords: {e}")
-            # Fallback: simple keyword extraction
-            return [word.lower() for word in query.split() if len(word) > 3]
-
-    def get_relevant_chunks(self, query: str, department_id: str) -> List[str]:
-        """Get all relevant chunks for a query from department's documents."""
+            print(f"Warning: answer cache lookup skipped: {e}")
+            return None, None, generation
+        return self.answer_cache.lookup(department_id, question_vector), question_vector, generation
+
+    def hybrid_search(self, query: str, department_id: str, k: int = None,
+                      query_vector: List[float] = None) -> List[Tuple[Document, float]]:
+        """Dense and BM25 retrieval fused by reciprocal rank, with one query embedding."""
+        k = k or self.retrieval_top_k
+        vector_store = self.get_department_vector_store(department_id)
+        keyword_index = document_processor.get_keyword_index(department_id)
+        if query_vector is None:
+            query_vector = self.embeddings.embed_query(query)
+
+        dense_ids = [doc_id for doc_id, _ in dense_search(vector_store, query_vector, self.retrieval_candidates)]
+        keyword_ids = [doc_id for doc_id, _ in keyword_index.search(query, self.retrieval_candidates)]
+        print(f"DEBUG: Hybrid search: {len(dense_ids)} dense, {len(keyword_ids)} keyword candidates")
+
+        results = []
+        for doc_id, score in reciprocal_rank_fusion([dense_ids, keyword_ids]):
+            doc = vector_store.docstore.search(doc_id)
+            if isinstance(doc, Document):
+                results.append((doc, score))
+            if len(results) >= k:
+                break
+        return results
+
+    def get_scored_chunks(self, query: str, department_id: str,
+                          query_vector: List[float] = None) -> List[Tuple[str, float]]:
+        """Relevant chunks for a query with their fused retrieval scores, best first."""
         print(f"DEBUG: Getting relevant chunks for department: {department_id}")
-        
-        keywords = self.extract_keywords(query)
-        print(f"DEBUG: Extracted keywords: {keywords}")
 
-        chunks = []
-        
-        # Try different search strategies
-        try:
-            # Primary search: direct query similarity
-            direct_chunks = self.search_by_chunks(query, department_id, k=5)
-            chunks.extend(direct_chunks)
-            print(f"DEBUG: Direct search found {len(direct_chunks)} chunks")
-        except Exception as e:
-            print(f"DEBUG: Direct search failed: {e}")
-        
-        try:
-            # Secondary search: keyword-based
-            if keywords:
-                keyword_chunks = self.search_by_nodes(keywords, department_id, k=3)
-                chunks.extend(keyword_chunks)
-                print(f"DEBUG: Keyword search found {len(keyword_chunks)} chunks")
-        except Exception as e:
-            print(f"DEBUG: Keyword search failed: {e}")
-        
+        results = []
+
         try:
-            # Tertiary search: relationship-based
-            if len(keywords) > 1:
-                relationship_chunks = self.search_by_relationships(keywords, department_id, k=2)
-                chunks.extend(relationship_chunks)
-                print(f"DEBUG: Relationship search found {len(relationship_chunks)} chunks")
+            # Dense similarity and exact-term (BM25) matches, fused in one pass
+            results = self.hybrid_search(query, department_id, query_vector=query_vector)
         except Exception as e:
-            print(f"DEBUG: Relationship search failed: {e}")
+            print(f"DEBUG: Hybrid search failed: {e}")
 
         # Remove duplicates while preserving order
         seen = set()
         unique_chunks = []
-        for chunk in chunks:
+        for doc, score in results:
+            chunk = doc.page_content
             if chunk not in seen and len(chunk.strip()) > 50:  # Filter out very short chunks
                 seen.add(chunk)
-                unique_chunks.append(chunk)
+                unique_chunks.append((chunk, score))
 
         print(f"DEBUG: Total unique chunks found: {len(unique_chunks)}")
         return unique_chunks
 
+    def get_relevant_chunks(self, query: str, department_id: str, query_vector: List[float] = None) -> List[str]:
+        """Get all relevant chunks for a query from department's documents."""
+        return [chunk for chunk, _ in self.get_scored_chunks(query, department_id, query_vector=query_vector)]
+
+    def build_context(self, chunks: List[str], scores: List[float] = None) -> Tuple[str, bool]:
+        """Return (context, summarized).
+
+        Near-duplicate chunks are dropped and the rest packed by score into
+        the token budget; only if they do not all fit are they summarized.
+        """
+        packed = self.context_builder.build(chunks, scores)
+        print(f"DEBUG: Context: {packed['tokens']} tokens, {packed['duplicates']} duplicates removed, "
+              f"{packed['dropped']} chunks over budget")
+        if packed["context"] and not packed["dropped"]:
+            return packed["context"], False
+        return self.summarize_chunks(packed["chunks"]), True
+
     def summarize_chunks(self, chunks: List[str]) -> str:
         """Summarize relevant chunks for context."""
         if not chunks:
@@ -177,9 +160,9 @@ class ConversationAgent:
             print(f"Error summarizing chunks: {e}")
             return text[:1000] + "..." if len(text) > 1000 else text
 
-    def answer_question(self, context: str, question: str, department_name: str) -> str:
-        """Answer user question based on department context."""
-        qa_prompt = f"""Role - You are an experienced person in a banking organization who is going to act as an Onboarding Mentor for New Joiners in the {department_name} department. Your task is to answer the question based on the context provided.
+    def build_answer_prompt(self, context: str, question: str, department_name: str) -> str:
+        """Prompt for the final answer, shared by the blocking and streaming paths."""
+        return f"""Role - You are an experienced person in a banking organization who is going to act as an Onboarding Mentor for New Joiners in the {department_name} department. Your task is to answer the question based on the context provided.
 
         Here's how you should format your response:
         1. The response should be concise and informative.
@@ -195,44 +178,83 @@ class ConversationAgent:
 
         Answer:"""
 
-        try:
-            response = self.llm.invoke(qa_prompt)
-            return response.content
-        except Exception as e:
-            print(f"Error answering question: {e}")
-            return "I'm sorry, I encountered an error while processing your question. Please try again."
+    def answer_question(self, context: str, question: str, department_name: str) -> str:
+        """Answer user question based on department context.
+
+        LLM failures propagate, so callers never mistake (or cache) an apology for an answer.
+        """
+        qa_prompt = self.build_answer_prompt(context, question, department_name)
+        response = self.llm.invoke(qa_prompt)
+        return response.content
+
+    def stream_answer(self, context: str, question: str, department_name: str) -> Iterator[str]:
+        """Yield answer text as the model produces it."""
+        qa_prompt = self.build_answer_prompt(context, question, department_name)
+        for chunk in self.llm.stream(qa_prompt):
+            text = chunk.content if hasattr(chunk, "content") else str(chunk)
+            if text:
+                yield text
+
+    @staticmethod
+    def no_documents_answer(department_name: str) -> str:
+        return f"I don't have specific documentation for the {department_name} department yet. However, I can help you with general onboarding questions or guide you to the right resources. Here are some common topics I can assist with:\n\n• General onboarding processes\n• Learning path recommendations\n• Department overview\n• Best practices for new joiners\n\nPlease ask me a specific question, or contact your manager to have department-specific documents uploaded to our knowledge base."
 
     def process_question(self, question: str, department_id: str, department_name: str) -> Dict[str, Any]:
         """Main method to process a user question and return an answer."""
         print(f"DEBUG: Processing question for department_id: {department_id}, department_name: {department_name}")
         try:
+            timings = {}
+            started = time.perf_counter()
+
+            # Near-identical questions asked before are answered from the cache
+            cached, question_vector, generation = self.lookup_cached_answer(question, department_id)
+            if cached:
+                result, cache_info = cached
+                result["cache"] = cache_info
+                result["timings"] = {"total_ms": round((time.perf_counter() - started) * 1000, 1)}
+                print(f"DEBUG: Answer cache hit (similarity {cache_info['similarity']}) for department {department_id}")
+                return result
+
             # Get relevant chunks
-            relevant_chunks = self.get_relevant_chunks(question, department_id)
+            scored_chunks = self.get_scored_chunks(question, department_id, query_vector=question_vector)
+            relevant_chunks = [chunk for chunk, _ in scored_chunks]
+            timings["retrieval_ms"] = round((time.perf_counter() - started) * 1000, 1)
 
             if not relevant_chunks:
                 print(f"WARNING: No relevant chunks found for department {department_id}")
                 return {
-                    "answer": f"I don't have specific documentation for the {department_name} department yet. However, I can help you with general onboarding questions or guide you to the right resources. Here are some common topics I can assist with:\n\n• General onboarding processes\n• Learning path recommendations\n• Department overview\n• Best practices for new joiners\n\nPlease ask me a specific question, or contact your manager to have department-specific documents uploaded to our knowledge base.",
+                    "answer": self.no_documents_answer(department_name),
                     "chunks_found": 0,
                     "department": department_name
                 }
 
             print(f"SUCCESS: Found {len(relevant_chunks)} relevant chunks")
             
-            # Summarize chunks for context
-            context = self.summarize_chunks(relevant_chunks)
-            print(f"DEBUG: Context summary length: {len(context)} characters")
+            # Build context, summarizing only when the chunks exceed the token budget
+            stage_started = time.perf_counter()
+            context, summarized = self.build_context(relevant_chunks, [score for _, score in scored_chunks])
+            timings["context_ms"] = round((time.perf_counter() - stage_started) * 1000, 1)
+            print(f"DEBUG: Context length: {len(context)} characters (summarized: {summarized})")
 
             # Generate answer
+            stage_started = time.perf_counter()
             answer = self.answer_question(context, question, department_name)
+            timings["answer_ms"] = round((time.perf_counter() - stage_started) * 1000, 1)
+            timings["total_ms"] = round((time.perf_counter() - started) * 1000, 1)
             print(f"DEBUG: Generated answer length: {len(answer)} characters")
 
-            return {
+            result = {
                 "answer": answer,
                 "chunks_found": len(relevant_chunks),
                 "department": department_name,
-                "context_summary": context[:200] + "..." if len(context) > 200 else context
+                "context_summary": context[:200] + "..." if len(context) > 200 else context,
+                "summarized": summarized
             }
+            if question_vector is not None:
+                self.answer_cache.put(department_id, question, question_vector, result, generation=generation)
+            result["timings"] = timings
+            result["cache"] = {"hit": False}
+            return result
 
         except Exception as e:
             print(f"Error processing question: {e}")
@@ -245,5 +267,85 @@ class ConversationAgent:
                 "error": str(e)
             }
 
-# Global conversation agent instance
-conversation_agent = ConversationAgent()
+    def stream_question(self, question: str, department_id: str, department_name: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Answer a question as a sequence of (event, data) pairs.
+
+        A "metadata" event is emitted as soon as retrieval finishes, then one
+        "token" event per piece of generated text and a final "done" event
+        with stage timings (or an "error" event).
+        """
+        print(f"DEBUG: Streaming question for department_id: {department_id}, department_name: {department_name}")
+        timings = {}
+        started = time.perf_counter()
+        try:
+            cached, question_vector, generation = self.lookup_cached_answer(question, department_id)
+            if cached:
+                result, cache_info = cached
+                yield "metadata", {
+                    "chunks_found": result.get("chunks_found", 0),
+                    "department": result.get("department", department_name),
+                    "context_summary": result.get("context_summary", ""),
+                    "cache": cache_info
+                }
+                yield "token", {"text": result.get("answer", "")}
+                yield "done", {
+                    "summarized": result.get("summarized", False),
+                    "timings": {"total_ms": round((time.perf_counter() - started) * 1000, 1)}
+                }
+                return
+
+            scored_chunks = self.get_scored_chunks(question, department_id, query_vector=question_vector)
+            relevant_chunks = [chunk for chunk, _ in scored_chunks]
+            timings["retrieval_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            yield "metadata", {
+                "chunks_found": len(relevant_chunks),
+                "department": department_name,
+                "cache": {"hit": False},
+                "timings": dict(timings)
+            }
+
+            if not relevant_chunks:
+                yield "token", {"text": self.no_documents_answer(department_name)}
+                yield "done", {"summarized": False, "timings": timings}
+                return
+
+            stage_started = time.perf_counter()
+            context, summarized = self.build_context(relevant_chunks, [score for _, score in scored_chunks])
+            timings["context_ms"] = round((time.perf_counter() - stage_started) * 1000, 1)
+
+            stage_started = time.perf_counter()
+            parts = []
+            for text in self.stream_answer(context, question, department_name):
+                if not parts:
+                    timings["first_token_ms"] = round((time.perf_counter() - started) * 1000, 1)
+                parts.append(text)
+                yield "token", {"text": text}
+            timings["answer_ms"] = round((time.perf_counter() - stage_started) * 1000, 1)
+            timings["total_ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+            result = {
+                "answer": "".join(parts),
+                "chunks_found": len(relevant_chunks),
+                "department": department_name,
+                "context_summary": context[:200] + "..." if len(context) > 200 else context,
+                "summarized": summarized
+            }
+            if question_vector is not None and parts:
+                self.answer_cache.put(department_id, question, question_vector, result, generation=generation)
+            yield "done", {
+                "summarized": summarized,
+                "context_summary": result["context_summary"],
+                "timings": timings
+            }
+
+        except Exception as e:
+            print(f"Error streaming question: {e}")
+            import traceback
+            print(f"Traceback: {traceback.format_exc()}")
+            yield "error", {
+                "error": str(e),
+                "answer": "I'm sorry, I encountered an error while processing your question. Please try again."
+            }
+
+# Global conversation agent instance, built on first use (see registry.py)
+conversation_agent = services.lazy("conversation_agent")
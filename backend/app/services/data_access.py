@@ -1,6 +1,7 @@
 import os
 import json
-from typing import Any, Dict
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple
 
 # Standard data directory resolution
 def get_data_dir():
@@ -25,6 +26,25 @@ def _read_json(path: str, default: Any) -> Any:
         print(f"Error reading JSON file {path}: {e}")
         return default
 
+_json_cache: Dict[str, Any] = {}
+
+def read_json_cached(path: str, default: Any) -> Any:
+    """Like _read_json, but only re-parses the file when its mtime or size changes.
+
+    The returned object is shared between callers and must not be mutated.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return default
+    key = (stat.st_mtime_ns, stat.st_size)
+    cached = _json_cache.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    data = _read_json(path, default)
+    _json_cache[path] = (key, data)
+    return data
+
 def _write_json(path: str, data: Any) -> None:
     try:
         # Ensure directory exists
@@ -37,6 +57,67 @@ def _write_json(path: str, data: Any) -> None:
         print(f"Error writing JSON file {path}: {e}")
         raise
 
+class UserDirectory:
+    """users.json with an email index and change-only writes.
+
+    Lookups reuse one parse of the file until it changes on disk and
+    resolve both the normalized-email key and records stored under a
+    legacy key by their embedded ``email``. ``update`` rewrites the file
+    only when a record actually differs, so a login that changes nothing
+    writes nothing.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self._indexed = None
+        self._by_email: Dict[str, str] = {}
+
+    def _users(self) -> Dict[str, Any]:
+        users = read_json_cached(self.path, {})
+        if users is not self._indexed:
+            index = {}
+            for key, user in users.items():
+                email = (user.get("email") or "").strip().lower() if isinstance(user, dict) else ""
+                if email:
+                    index.setdefault(email, key)
+            self._by_email = index
+            self._indexed = users
+        return users
+
+    def find(self, email: str) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """(key, record) for ``email``, or (None, None). The record must not be mutated."""
+        email = email.strip().lower()
+        with self.lock:
+            users = self._users()
+            key = email if email in users else self._by_email.get(email)
+            return (key, users[key]) if key is not None else (None, None)
+
+    def update(self, key: str, changes: Optional[Dict[str, Any]] = None, new_key: Optional[str] = None,
+               remove: Iterable[str] = ()) -> bool:
+        """Apply ``changes``/``remove`` to the record at ``key``, moving it to ``new_key``.
+
+        Returns True if users.json was rewritten.
+        """
+        changes = changes or {}
+        with self.lock:
+            users = _read_json(self.path, {})
+            user = users.get(key)
+            if user is None:
+                return False
+            target = new_key or key
+            remove = [f for f in remove if f in user]
+            if target == key and not remove and all(user.get(f) == v for f, v in changes.items()):
+                return False
+            user = {f: v for f, v in user.items() if f not in remove}
+            user.update(changes)
+            if target != key:
+                del users[key]
+            users[target] = user
+            _write_json(self.path, users)
+            return True
+
+
 def load_users(users_file: str = None) -> Dict[str, Any]:
     if users_file is None:
         users_file = get_data_file_path('users.json')
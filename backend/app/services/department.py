@@ -1,7 +1,7 @@
 import os
 import uuid
 from typing import Any, Dict, List, Optional
-from .data_access import get_data_file_path, _read_json, _write_json
+from .data_access import get_data_file_path, _read_json, _write_json, read_json_cached
 
 
 DEPT_FILE = get_data_file_path('department.json')
@@ -90,12 +90,24 @@ def delete_department(dept_id: str) -> bool:
     return False
 
 
+def _manager_missing(department_name: str, manager_name: str) -> bool:
+    """Read-only check against the cached department.json (every manager login asks this)."""
+    name = department_name.strip().lower()
+    for d in read_json_cached(DEPT_FILE, {"departments": []}).get('departments', []):
+        if (d.get('name') or '').strip().lower() == name or (d.get('id') or '').strip().lower() == name:
+            managers = d.get('managers') if isinstance(d.get('managers'), list) else []
+            return manager_name.strip().lower() not in [m.strip().lower() for m in managers if isinstance(m, str)]
+    return False
+
+
 def add_manager_to_department(department_name: str, manager_name: str) -> bool:
     """Append manager_name to the department.managers array if not present.
     Returns True if modified, False otherwise.
     """
     if not department_name or not manager_name:
         return False
+    if not _manager_missing(department_name, manager_name):
+        return False
     data = load_departments()
     modified = False
     for d in data.get('departments', []):
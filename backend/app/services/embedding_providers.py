@@ -0,0 +1,146 @@
+import os
+import re
+import math
+import hashlib
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+from langchain_core.embeddings import Embeddings
+
+from .embedding_service import EmbeddingService
+
+# Embedding configuration, read from the environment (main_server.py loads .env first):
+#   EMBEDDING_PROVIDER    google | local | hashing   (default: google)
+#   EMBEDDING_MODEL       model name for the provider
+#   EMBEDDING_BATCH_SIZE  texts per backend call    (default: 64)
+#   EMBEDDING_DIM         vector size for the hashing provider (default: 384)
+DEFAULT_PROVIDER = "google"
+DEFAULT_MODELS = {
+    "google": "models/gemini-embedding-001",
+    "local": "BAAI/bge-small-en-v1.5",
+    "hashing": "hashing",
+}
+BGE_QUERY_INSTRUCTION = "Represent this sentence for searching relevant passages: "
+
+
+class SentenceTransformerEmbeddings(Embeddings):
+    """CPU-local sentence-transformers backend.
+
+    The model is loaded on the first call, and texts are encoded in
+    batches of ``batch_size`` with normalised output so inner product and
+    L2 distance rank the same way.
+    """
+
+    def __init__(self, model_name: str, batch_size: int = 64, device: str = "cpu",
+                 query_instruction: str = ""):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.device = device
+        self.query_instruction = query_instruction
+        self._model = None
+
+    @property
+    def model(self):
+        if self._model is None:
+            from sentence_transformers import SentenceTransformer
+            print(f"DEBUG: Loading sentence-transformers model {self.model_name} on {self.device}")
+            self._model = SentenceTransformer(self.model_name, device=self.device)
+        return self._model
+
+    def _encode(self, texts: List[str]) -> List[List[float]]:
+        vectors = self.model.encode(
+            texts,
+            batch_size=self.batch_size,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+            show_progress_bar=False
+        )
+        return vectors.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._encode(list(texts))
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._encode([self.query_instruction + text])[0]
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        return self._encode([self.query_instruction + t for t in texts])
+
+
+class HashingEmbeddings(Embeddings):
+    """Deterministic, dependency-free stand-in for tests and benchmarks.
+
+    Word unigrams and bigrams are signed-hashed into ``dim`` buckets and
+    the result is L2-normalised, so texts sharing terms land close together.
+    Needs no model download and no network.
+    """
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def _features(self, text: str) -> List[str]:
+        words = re.findall(r"\w+", text.lower())
+        return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.dim
+        for feature in self._features(text):
+            h = int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'big')
+            vector[h % self.dim] += 1.0 if (h >> 63) & 1 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector))
+        return [v / norm for v in vector] if norm else vector
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+def get_embedding_config() -> Dict[str, Any]:
+    """Resolve the embedding configuration shared by ingest and query."""
+    provider = os.getenv("EMBEDDING_PROVIDER", DEFAULT_PROVIDER).strip().lower()
+    if provider not in DEFAULT_MODELS:
+        print(f"Warning: unknown EMBEDDING_PROVIDER '{provider}', falling back to {DEFAULT_PROVIDER}")
+        provider = DEFAULT_PROVIDER
+    model = os.getenv("EMBEDDING_MODEL") or DEFAULT_MODELS[provider]
+    dim = int(os.getenv("EMBEDDING_DIM", "384"))
+    if provider == "hashing":
+        model = f"hashing-{dim}"
+
+    # Filesystem-safe name for the cache and for keeping stores of different
+    # vector spaces apart. The default provider keeps the original store paths.
+    namespace = re.sub(r"[^A-Za-z0-9_.-]+", "-", f"{provider}-{model}").strip("-")
+    return {
+        "provider": provider,
+        "model": model,
+        "batch_size": int(os.getenv("EMBEDDING_BATCH_SIZE", "64")),
+        "dim": dim,
+        "namespace": namespace,
+        "store_suffix": "" if provider == DEFAULT_PROVIDER and model == DEFAULT_MODELS[DEFAULT_PROVIDER] else f"_{namespace}",
+    }
+
+
+def create_embedding_provider(config: Optional[Dict[str, Any]] = None) -> Embeddings:
+    """Build the raw embeddings backend described by ``config``."""
+    config = config or get_embedding_config()
+    provider = config["provider"]
+    if provider == "local":
+        instruction = BGE_QUERY_INSTRUCTION if "bge" in config["model"].lower() else ""
+        return SentenceTransformerEmbeddings(config["model"], batch_size=config["batch_size"],
+                                             query_instruction=instruction)
+    if provider == "hashing":
+        return HashingEmbeddings(dim=config["dim"])
+    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+    return GoogleGenerativeAIEmbeddings(model=config["model"])
+
+
+def build_embedding_service(cache_root: Path, config: Optional[Dict[str, Any]] = None) -> EmbeddingService:
+    """Build the cached embedding service for ``config`` with its cache under ``cache_root``."""
+    config = config or get_embedding_config()
+    print(f"DEBUG: Embedding provider: {config['provider']} ({config['model']})")
+    return EmbeddingService(
+        create_embedding_provider(config),
+        cache_dir=Path(cache_root) / config["namespace"],
+        batch_size=config["batch_size"]
+    )
@@ -0,0 +1,212 @@
+import os
+import json
+import hashlib
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List, Dict, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process use only
+    fcntl = None
+
+
+@contextmanager
+def _dir_lock(cache_dir: Path):
+    """Cross-process exclusive lock held while rows are allocated and written."""
+    if fcntl is None:
+        yield
+        return
+    with open(cache_dir / "cache.lock", 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class EmbeddingCache:
+    """Persistent content-hash -> vector cache backed by a numpy memmap.
+
+    Vectors live in ``vectors.f32`` as fixed-width float32 rows and the row
+    for each key is given by its line number in ``keys.txt``. Rows are
+    flushed before their keys are appended, so after a crash a key never
+    points at a row that was not written; a torn last line is dropped.
+    The file is grown by doubling, so inserts are amortised O(1).
+
+    Several processes may share one cache directory: writers take an
+    ``flock`` on ``cache.lock`` and pick up keys appended by others before
+    allocating rows, so two writers never claim the same row.
+    """
+
+    def __init__(self, cache_dir: Path, initial_capacity: int = 1024):
+        self.cache_dir = Path(cache_dir)
+        self.initial_capacity = initial_capacity
+        self.vectors_path = self.cache_dir / "vectors.f32"
+        self.keys_path = self.cache_dir / "keys.txt"
+        self.meta_path = self.cache_dir / "meta.json"
+        self.lock = threading.Lock()
+        self.dim: Optional[int] = None
+        self.rows: Dict[str, int] = {}
+        self.capacity = 0
+        self.vectors = None
+        self.keys_offset = 0
+        self._open()
+
+    def _open(self, repair: bool = False) -> None:
+        """Load keys appended since the last call, remapping the vectors if they grew.
+
+        With ``repair`` (only under the directory lock) a torn last line is
+        cut off so the next append starts on a fresh line.
+        """
+        if self.dim is None:
+            if not self.meta_path.exists():
+                return
+            with open(self.meta_path, 'r', encoding='utf-8') as f:
+                self.dim = json.load(f)["dim"]
+        capacity = os.path.getsize(self.vectors_path) // (4 * self.dim) if self.vectors_path.exists() else 0
+        if capacity != self.capacity:
+            if self.vectors is not None:
+                self.vectors.flush()
+            self.capacity = capacity
+            self.vectors = np.memmap(self.vectors_path, dtype=np.float32, mode='r+',
+                                     shape=(self.capacity, self.dim)) if capacity else None
+        if not self.keys_path.exists():
+            return
+        with open(self.keys_path, 'rb') as f:
+            f.seek(self.keys_offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # torn write
+                if len(self.rows) >= self.capacity:
+                    break
+                self.rows[line.decode('utf-8').rstrip("\n")] = len(self.rows)
+                self.keys_offset += len(line)
+        if repair and os.path.getsize(self.keys_path) > self.keys_offset:
+            with open(self.keys_path, 'r+b') as f:
+                f.truncate(self.keys_offset)
+
+    def _ensure_capacity(self, needed: int) -> None:
+        if needed <= self.capacity:
+            return
+        new_capacity = max(self.initial_capacity, self.capacity)
+        while new_capacity < needed:
+            new_capacity *= 2
+        if self.vectors is not None:
+            self.vectors.flush()
+            self.vectors = None
+        with open(self.vectors_path, 'ab') as f:
+            f.truncate(new_capacity * self.dim * 4)
+        self.capacity = new_capacity
+        self.vectors = np.memmap(self.vectors_path, dtype=np.float32, mode='r+', shape=(self.capacity, self.dim))
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        with self.lock:
+            return {k: self.vectors[self.rows[k]].tolist() for k in keys if k in self.rows}
+
+    def put_many(self, keys: List[str], vectors: List[List[float]]) -> None:
+        if not keys:
+            return
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        with self.lock, _dir_lock(self.cache_dir):
+            # Another process may have appended rows since we last looked
+            self._open(repair=True)
+            fresh = {k: v for k, v in zip(keys, vectors) if k not in self.rows}
+            if not fresh:
+                return
+            fresh = list(fresh.items())
+            if self.dim is None:
+                self.dim = len(fresh[0][1])
+                with open(self.meta_path, 'w', encoding='utf-8') as f:
+                    json.dump({"dim": self.dim}, f)
+
+            start = len(self.rows)
+            self._ensure_capacity(start + len(fresh))
+            self.vectors[start:start + len(fresh)] = np.asarray([v for _, v in fresh], dtype=np.float32)
+            self.vectors.flush()
+
+            written = "".join(f"{k}\n" for k, _ in fresh).encode('utf-8')
+            with open(self.keys_path, 'ab') as f:
+                f.write(written)
+                f.flush()
+                os.fsync(f.fileno())
+            self.keys_offset += len(written)
+            for offset, (k, _) in enumerate(fresh):
+                self.rows[k] = start + offset
+
+
+class EmbeddingService(Embeddings):
+    """Batched, cached front for a langchain ``Embeddings`` backend.
+
+    Texts are keyed by the SHA-256 of their content (documents and queries
+    are keyed separately, since some backends embed them differently).
+    Only cache misses are sent to the backend, de-duplicated and in
+    batches of ``batch_size``. The service is itself an ``Embeddings``, so
+    it can be handed straight to FAISS.
+    """
+
+    def __init__(self, backend: Embeddings, cache_dir: Optional[Path] = None, batch_size: int = 64):
+        self.backend = backend
+        self.batch_size = batch_size
+        self.cache = EmbeddingCache(cache_dir) if cache_dir else None
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def content_key(text: str, kind: str = "document") -> str:
+        return hashlib.sha256(f"{kind}\0{text}".encode('utf-8')).hexdigest()
+
+    def _embed(self, texts: List[str], kind: str) -> List[List[float]]:
+        keys = [self.content_key(t, kind) for t in texts]
+        found = self.cache.get_many(keys) if self.cache is not None else {}
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+        cached = sum(1 for k in keys if k in found)
+        self.hits += cached
+        self.misses += len(keys) - cached
+
+        if missing:
+            miss_keys = list(missing.keys())
+            miss_texts = list(missing.values())
+            computed = []
+            for i in range(0, len(miss_texts), self.batch_size):
+                batch = miss_texts[i:i + self.batch_size]
+                if kind == "query" and hasattr(self.backend, "embed_queries"):
+                    computed.extend(self.backend.embed_queries(batch))
+                elif kind == "query":
+                    computed.extend(self.backend.embed_query(t) for t in batch)
+                else:
+                    computed.extend(self.backend.embed_documents(batch))
+            computed = [list(map(float, v)) for v in computed]
+            found.update(zip(miss_keys, computed))
+            if self.cache is not None:
+                self.cache.put_many(miss_keys, computed)
+
+        return [found[k] for k in keys]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embed(list(texts), "document")
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed([text], "query")[0]
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed several search queries in one batched, cached pass."""
+        return self._embed(list(texts), "query")
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "cached_vectors": len(self.cache) if self.cache is not None else 0
+        }
@@ -78,8 +78,7 @@ class JobQueue:
         self.running = False
         self.lock = threading.Lock()
 
-        # Start the worker thread
-        self.start_worker()
+        # The worker thread starts with the first submitted job
 
     def start_worker(self):
         """Start the background worker thread."""
@@ -402,6 +401,7 @@ class JobQueue:
                 'department_id': department_id
             }
             self.job_queue.put(job_data)
+            self.start_worker()
 
         print(f"📋 Submitted job {job_id} for department {department_id}, file: {filename}")
         return job_id
@@ -0,0 +1,177 @@
+import os
+import re
+import json
+import math
+from collections import Counter
+from pathlib import Path
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+
+from langchain.schema import Document
+
+INDEX_FILE = "keyword_index.json"
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for", "from", "how",
+    "i", "in", "is", "it", "my", "of", "on", "or", "the", "to", "was", "we", "what", "when",
+    "where", "which", "who", "why", "will", "with", "you", "your"
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased terms for BM25.
+
+    Compound tokens such as policy codes ("KYC-2024.7") are kept whole and
+    also split into their parts, so both exact and partial matches score.
+    """
+    terms = []
+    for token in re.findall(r"\w+(?:[-./]\w+)*", text.lower()):
+        parts = re.split(r"[-./]", token)
+        if len(parts) > 1:
+            terms.append(token)
+        terms.extend(p for p in parts if p and p not in STOPWORDS)
+    return terms
+
+
+def reciprocal_rank_fusion(rankings: Iterable[List[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """Fuse ranked id lists: score(id) = sum of 1 / (k + rank) over the lists."""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: -item[1])
+
+
+class KeywordIndex:
+    """BM25 inverted index over one department's docstore.
+
+    Keyed by the same docstore ids as the FAISS store so keyword and dense
+    results can be fused. Saved in full as ``keyword_index.json`` next to the
+    vector store's base snapshot; each ingest in between only writes the
+    postings of its documents as a delta beside its vector segment
+    (``VectorStorePersistence``), merged back in when the index is loaded.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.doc_lengths: Dict[str, int] = {}
+        self.total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def add(self, doc_id: str, text: str) -> None:
+        if doc_id in self.doc_lengths:
+            return
+        terms = tokenize(text)
+        for term, tf in Counter(terms).items():
+            self.postings.setdefault(term, {})[doc_id] = tf
+        self.doc_lengths[doc_id] = len(terms)
+        self.total_length += len(terms)
+
+    def add_documents(self, ids: List[str], documents: List[Document]) -> Dict[str, Any]:
+        """Index documents and return their postings, the delta to persist."""
+        delta = {"doc_lengths": {}, "postings": {}}
+        for doc_id, doc in zip(ids, documents):
+            terms = tokenize(doc.page_content)
+            for term, tf in Counter(terms).items():
+                delta["postings"].setdefault(term, {})[doc_id] = tf
+            delta["doc_lengths"][doc_id] = len(terms)
+        self.merge(delta)
+        return delta
+
+    def merge(self, delta: Dict[str, Any]) -> None:
+        """Add a delta's documents; ones already indexed are left as they are."""
+        new = {doc_id: n for doc_id, n in delta.get("doc_lengths", {}).items() if doc_id not in self.doc_lengths}
+        for term, docs in delta.get("postings", {}).items():
+            for doc_id, tf in docs.items():
+                if doc_id in new:
+                    self.postings.setdefault(term, {})[doc_id] = tf
+        self.doc_lengths.update(new)
+        self.total_length += sum(new.values())
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[str, float]]:
+        """Top ``k`` (doc_id, score) pairs by BM25."""
+        if not self.doc_lengths:
+            return []
+        n = len(self.doc_lengths)
+        avg_length = self.total_length / n or 1.0
+        scores: Dict[str, float] = {}
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, tf in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda item: -item[1])[:k]
+
+    def estimated_bytes(self) -> int:
+        """Rough resident size, for the vector store memory budget."""
+        return 100 * sum(len(p) for p in self.postings.values()) + 80 * len(self.doc_lengths)
+
+    # Persistence
+
+    @classmethod
+    def build(cls, vector_store) -> "KeywordIndex":
+        """Index every document in a FAISS store's docstore."""
+        index = cls()
+        for doc_id, doc in vector_store.docstore._dict.items():
+            index.add(doc_id, doc.page_content)
+        return index
+
+    def save(self, store_path: Path) -> None:
+        store_path.mkdir(parents=True, exist_ok=True)
+        path = store_path / INDEX_FILE
+        tmp = path.with_name(INDEX_FILE + ".tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({"doc_lengths": self.doc_lengths, "postings": self.postings}, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    @staticmethod
+    def save_delta(path: Path, delta: Dict[str, Any]) -> None:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(delta, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+
+    @staticmethod
+    def _read(path: Path) -> Optional[Dict[str, Any]]:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Warning: unreadable keyword index at {path}: {e}")
+            return None
+
+    @classmethod
+    def load(cls, store_path: Path, deltas: Iterable[Path] = ()) -> Optional["KeywordIndex"]:
+        """The saved index with the given ingest deltas merged in, in order."""
+        path = store_path / INDEX_FILE
+        if not path.exists():
+            return None
+        data = cls._read(path)
+        if data is None:
+            return None
+        index = cls()
+        index.doc_lengths = data.get("doc_lengths", {})
+        index.postings = data.get("postings", {})
+        index.total_length = sum(index.doc_lengths.values())
+        for delta_path in deltas:
+            delta = cls._read(delta_path)
+            if delta is None:
+                return None
+            index.merge(delta)
+        return index
+
+    @classmethod
+    def load_or_build(cls, store_path: Path, vector_store, deltas: Iterable[Path] = ()) -> "KeywordIndex":
+        """Load the saved index and deltas, rebuilding it if it disagrees with the docstore."""
+        index = cls.load(store_path, deltas)
+        if index is None or set(index.doc_lengths) != set(vector_store.docstore._dict):
+            print(f"DEBUG: Rebuilding keyword index at {store_path}")
+            index = cls.build(vector_store)
+            index.save(store_path)
+        return index
@@ -0,0 +1,122 @@
+import os
+import json
+import threading
+from pathlib import Path
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Iterable
+
+from langchain.schema import Document
+
+CATALOG_FILE = "catalog.json"
+
+
+def _empty_catalog() -> Dict[str, Any]:
+    return {
+        "total_documents": 0,
+        "counts_by_type": {},
+        "concepts": [],
+        "files": {},
+        "updated_at": None
+    }
+
+
+def _file_key(metadata: Dict[str, Any]) -> Optional[str]:
+    if metadata.get("filename"):
+        return metadata["filename"]
+    if metadata.get("file_path"):
+        return os.path.basename(metadata["file_path"])
+    return None
+
+
+class KnowledgeCatalog:
+    """Per-department metadata catalog kept next to the vector store.
+
+    Updated incrementally at ingest time so knowledge-base statistics are a
+    small JSON read instead of enumerating the index. Stores that predate
+    the catalog are backfilled from the docstore in one pass.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+
+    def _path(self, store_path: Path) -> Path:
+        return store_path / CATALOG_FILE
+
+    def load(self, store_path: Path) -> Optional[Dict[str, Any]]:
+        path = self._path(store_path)
+        if not path.exists():
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Warning: unreadable catalog at {path}: {e}")
+            return None
+
+    def _save(self, store_path: Path, catalog: Dict[str, Any]) -> None:
+        catalog["updated_at"] = datetime.now().isoformat()
+        store_path.mkdir(parents=True, exist_ok=True)
+        path = self._path(store_path)
+        tmp = path.with_name(CATALOG_FILE + ".tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(catalog, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    @staticmethod
+    def _add_documents(catalog: Dict[str, Any], documents: Iterable[Document]) -> None:
+        concepts = set(catalog["concepts"])
+        for doc in documents:
+            metadata = doc.metadata or {}
+            doc_type = metadata.get("type", "unknown")
+            catalog["total_documents"] += 1
+            catalog["counts_by_type"][doc_type] = catalog["counts_by_type"].get(doc_type, 0) + 1
+            if doc_type == "node" and metadata.get("label"):
+                concepts.add(metadata["label"])
+
+            file_key = _file_key(metadata)
+            if file_key and doc_type in ("chunk", "node", "relationship"):
+                entry = catalog["files"].setdefault(file_key, {"chunks": 0, "nodes": 0, "relationships": 0})
+                entry[doc_type + "s"] = entry.get(doc_type + "s", 0) + 1
+                entry["ingested_at"] = datetime.now().isoformat()
+        catalog["concepts"] = sorted(concepts)
+
+    def rebuild(self, store_path: Path, vector_store) -> Dict[str, Any]:
+        """Recreate the catalog from every document in the store's docstore."""
+        with self.lock:
+            catalog = _empty_catalog()
+            self._add_documents(catalog, vector_store.docstore._dict.values())
+            self._save(store_path, catalog)
+            return catalog
+
+    def record(self, store_path: Path, vector_store, documents: List[Document]) -> Dict[str, Any]:
+        """Fold newly ingested documents into the catalog."""
+        catalog = self.load(store_path)
+        if catalog is None:
+            # First ingest (or a store from before the catalog): count everything once
+            return self.rebuild(store_path, vector_store)
+        with self.lock:
+            self._add_documents(catalog, documents)
+            self._save(store_path, catalog)
+            return catalog
+
+    def ensure_consistent(self, store_path: Path, vector_store) -> None:
+        """Rebuild the catalog if it disagrees with a freshly loaded store."""
+        catalog = self.load(store_path)
+        if catalog is None or catalog.get("total_documents") != len(vector_store.docstore._dict):
+            print(f"DEBUG: Rebuilding knowledge catalog at {store_path}")
+            self.rebuild(store_path, vector_store)
+
+    @staticmethod
+    def to_stats(catalog: Dict[str, Any]) -> Dict[str, Any]:
+        """Shape a catalog into the department stats returned by the API."""
+        counts = catalog.get("counts_by_type", {})
+        return {
+            "total_documents": catalog.get("total_documents", 0),
+            "chunks": counts.get("chunk", 0),
+            "nodes": counts.get("node", 0),
+            "relationships": counts.get("relationship", 0),
+            "concepts": catalog.get("concepts", []),
+            "unique_concepts": len(catalog.get("concepts", [])),
+            "files": catalog.get("files", {}),
+            "updated_at": catalog.get("updated_at")
+        }
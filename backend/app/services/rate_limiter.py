@@ -0,0 +1,135 @@
+import os
+import time
+import sqlite3
+import threading
+from collections import deque
+from typing import Deque, Dict, Optional
+
+
+class SlidingWindowRateLimiter:
+    """Per-key sliding-window limiter held in process memory.
+
+    A key is blocked once ``max_attempts`` attempts were recorded within
+    the last ``window_seconds``. Keys whose attempts have all aged out are
+    evicted on a periodic sweep, so memory stays bounded by the number of
+    keys active in one window.
+    """
+
+    def __init__(self, max_attempts: int = 5, window_seconds: float = 300, sweep_interval: float = 60):
+        self.max_attempts = max_attempts
+        self.window_seconds = window_seconds
+        self.sweep_interval = sweep_interval
+        self.attempts: Dict[str, Deque[float]] = {}
+        self.lock = threading.Lock()
+        self._last_sweep = time.time()
+
+    def _recent(self, key: str, now: float) -> Optional[Deque[float]]:
+        attempts = self.attempts.get(key)
+        if attempts is None:
+            return None
+        cutoff = now - self.window_seconds
+        while attempts and attempts[0] <= cutoff:
+            attempts.popleft()
+        if not attempts:
+            del self.attempts[key]
+            return None
+        return attempts
+
+    def _maybe_sweep(self, now: float) -> None:
+        if now - self._last_sweep < self.sweep_interval:
+            return
+        self._last_sweep = now
+        for key in list(self.attempts):
+            self._recent(key, now)
+
+    def allowed(self, key: str) -> bool:
+        """True if ``key`` may make another attempt (does not record one)."""
+        now = time.time()
+        with self.lock:
+            self._maybe_sweep(now)
+            attempts = self._recent(key, now)
+            return attempts is None or len(attempts) < self.max_attempts
+
+    def hit(self, key: str) -> int:
+        """Record an attempt for ``key``; returns the attempts now in the window."""
+        now = time.time()
+        with self.lock:
+            self._maybe_sweep(now)
+            attempts = self._recent(key, now)
+            if attempts is None:
+                attempts = self.attempts[key] = deque()
+            attempts.append(now)
+            return len(attempts)
+
+    def reset(self, key: str) -> None:
+        with self.lock:
+            self.attempts.pop(key, None)
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            return {"backend": "memory", "tracked_keys": len(self.attempts)}
+
+
+class SQLiteRateLimiter(SlidingWindowRateLimiter):
+    """Sliding-window limiter stored in SQLite so several processes share limits.
+
+    main_server.py runs the auth, session-tracking and main apps as
+    separate processes; pointing them at one database makes an attacker's
+    attempts count once, whichever process serves them. Expired rows are
+    deleted on the periodic sweep.
+    """
+
+    def __init__(self, db_path: str, max_attempts: int = 5, window_seconds: float = 300, sweep_interval: float = 60):
+        super().__init__(max_attempts, window_seconds, sweep_interval)
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.conn = sqlite3.connect(db_path, timeout=5, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS attempts (key TEXT NOT NULL, ts REAL NOT NULL)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS attempts_key_ts ON attempts (key, ts)")
+
+    def _count(self, key: str, now: float) -> int:
+        row = self.conn.execute("SELECT COUNT(*) FROM attempts WHERE key = ? AND ts > ?",
+                                (key, now - self.window_seconds)).fetchone()
+        return row[0]
+
+    def _maybe_sweep(self, now: float) -> None:
+        if now - self._last_sweep < self.sweep_interval:
+            return
+        self._last_sweep = now
+        self.conn.execute("DELETE FROM attempts WHERE ts <= ?", (now - self.window_seconds,))
+
+    def allowed(self, key: str) -> bool:
+        now = time.time()
+        with self.lock:
+            self._maybe_sweep(now)
+            return self._count(key, now) < self.max_attempts
+
+    def hit(self, key: str) -> int:
+        now = time.time()
+        with self.lock:
+            self._maybe_sweep(now)
+            self.conn.execute("INSERT INTO attempts (key, ts) VALUES (?, ?)", (key, now))
+            return self._count(key, now)
+
+    def reset(self, key: str) -> None:
+        with self.lock:
+            self.conn.execute("DELETE FROM attempts WHERE key = ?", (key,))
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            row = self.conn.execute("SELECT COUNT(DISTINCT key) FROM attempts WHERE ts > ?",
+                                    (time.time() - self.window_seconds,)).fetchone()
+            return {"backend": "sqlite", "tracked_keys": row[0]}
+
+
+def create_rate_limiter(max_attempts: int, window_seconds: float, backend: str = "memory",
+                        db_path: Optional[str] = None) -> SlidingWindowRateLimiter:
+    """Limiter for ``backend`` ("memory" or "sqlite"; sqlite needs ``db_path``)."""
+    if backend == "sqlite":
+        if not db_path:
+            raise ValueError("db_path is required for the sqlite rate limiter backend")
+        return SQLiteRateLimiter(db_path, max_attempts, window_seconds)
+    if backend != "memory":
+        raise ValueError(f"Unknown rate limiter backend: {backend}")
+    return SlidingWindowRateLimiter(max_attempts, window_seconds)
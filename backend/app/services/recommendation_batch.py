@@ -0,0 +1,132 @@
+import os
+import time
+import uuid
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Optional
+
+from .data_access import get_data_dir, _read_json, _write_json, read_json_cached
+from .recommendation_engine import (
+    RecommendationEngine, STORE_KEY, learning_data_fingerprint, make_entry, recommendation_engine
+)
+
+
+def default_checkpoint_file() -> str:
+    return os.path.join(get_data_dir(), 'state', 'recommendation_refresh.json')
+
+
+def read_checkpoint(checkpoint_file: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    return _read_json(checkpoint_file or default_checkpoint_file(), None)
+
+
+def refresh_all_recommendations(engine: Optional[RecommendationEngine] = None, service=None,
+                                max_concurrency: int = 4, use_llm: bool = True, force: bool = False,
+                                resume: bool = True, checkpoint_file: Optional[str] = None,
+                                flush_every: int = 25,
+                                progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """Refresh stored recommendations for every learner in one pass.
+
+    Every data file is loaded once and all users' learning data is built
+    together. Users whose fingerprint is unchanged are skipped. New and
+    changed users get fallback recommendations immediately. Those users
+    then go to the LLM, with at most ``max_concurrency`` calls in flight.
+    Results and the list of finished users are saved every
+    ``flush_every`` completions. With ``resume``, a run that was
+    interrupted skips the users it already finished; users whose LLM call
+    failed are not finished, so they are retried.
+    """
+    if engine is None:
+        engine = recommendation_engine
+    if service is None:
+        from .ai_recommendations import AIRecommendationsService
+        service = AIRecommendationsService(require_api_key=False)
+    checkpoint_file = checkpoint_file or default_checkpoint_file()
+
+    checkpoint = read_checkpoint(checkpoint_file) if resume else None
+    if not checkpoint or checkpoint.get("status") != "running":
+        checkpoint = {
+            "run_id": uuid.uuid4().hex[:12],
+            "status": "running",
+            "started_at": datetime.now().isoformat(),
+            "done": [],
+            "failed": [],
+            "counts": {"unchanged": 0, "fallback": 0, "generated": 0, "failed": 0}
+        }
+    done = set(checkpoint["done"])
+    failed = set(checkpoint.get("failed", []))
+    counts = checkpoint["counts"]
+    started = time.perf_counter()
+
+    def _save(status: str = "running") -> None:
+        checkpoint.update(status=status, done=sorted(done), failed=sorted(failed),
+                          updated_at=datetime.now().isoformat())
+        if status != "running":
+            checkpoint["finished_at"] = checkpoint["updated_at"]
+        _write_json(checkpoint_file, checkpoint)
+        if progress is not None:
+            progress(checkpoint)
+
+    all_data = service.get_all_users_learning_data()
+    stored = read_json_cached(engine.path, {}).get(STORE_KEY, {})
+    checkpoint["total"] = len(all_data)
+
+    fallback_entries = {}
+    to_generate = []
+    for user_id, user_data in all_data.items():
+        if user_id in done:
+            continue
+        fingerprint = learning_data_fingerprint(user_data)
+        entry = stored.get(user_id)
+        if not force and engine.is_current(entry, fingerprint):
+            counts["unchanged"] += 1
+            done.add(user_id)
+            continue
+        # Changed or new users get fallback recommendations right away; an
+        # unchanged result that only aged out is kept until it is regenerated
+        if entry is None or entry["fingerprint"] != fingerprint:
+            fallback_entries[user_id] = make_entry(fingerprint, service._create_fallback_recommendations(user_data))
+            counts["fallback"] += 1
+        if use_llm and service.llm_enabled:
+            to_generate.append((user_id, fingerprint))
+        else:
+            done.add(user_id)
+    if fallback_entries:
+        engine.store_many(fallback_entries)
+    _save()
+
+    pending_entries = {}
+    with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as pool:
+        futures = {
+            pool.submit(service.generate_recommendations, user_id, user_data=all_data[user_id]): (user_id, fingerprint)
+            for user_id, fingerprint in to_generate
+        }
+        for future in as_completed(futures):
+            user_id, fingerprint = futures[future]
+            if user_id in failed:
+                # Retried after failing in the interrupted run; counted again below
+                failed.discard(user_id)
+                counts["failed"] -= 1
+            try:
+                entry = make_entry(fingerprint, future.result())
+            except Exception as e:
+                print(f"❌ Recommendation refresh failed for {user_id}: {e}")
+                entry = None
+            else:
+                pending_entries[user_id] = entry
+            if entry is None or entry["fallback"]:
+                # Not done: a resumed run retries it, and it keeps its fallback meanwhile
+                failed.add(user_id)
+                counts["failed"] += 1
+            else:
+                counts["generated"] += 1
+                done.add(user_id)
+            if len(pending_entries) >= flush_every:
+                engine.store_many(pending_entries)
+                pending_entries = {}
+                _save()
+    if pending_entries:
+        engine.store_many(pending_entries)
+
+    checkpoint["elapsed_seconds"] = round(time.perf_counter() - started, 2)
+    _save("completed")
+    return checkpoint
@@ -0,0 +1,204 @@
+import time
+import json
+import hashlib
+import threading
+from queue import Queue, Empty
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+from .data_access import get_data_file_path, _read_json, _write_json, read_json_cached
+from .ai_recommendations import deadline_urgency, stalled_for
+
+STORE_KEY = "AI_GENERATED"
+# Kept apart from recommendations.json, which request handlers rewrite without
+# this engine's lock; sharing the file lost updates on both sides
+STORE_FILE = 'ai_generated_recommendations.json'
+
+
+def _bucket(days: Optional[int], bucket: Callable[[int], str]) -> Optional[str]:
+    return bucket(days) if days is not None else None
+
+
+def learning_data_fingerprint(user_data: Dict[str, Any]) -> str:
+    """Hash of the inputs that should change a user's recommendations.
+
+    Covers learning path progress, skill gaps and deadlines. Values that
+    drift on their own (the analysis timestamp) are left out and day counts
+    enter as the prompt's buckets, so an untouched profile keeps its
+    fingerprint until a deadline or stalled path becomes more urgent.
+    """
+    analysis = user_data.get("progress_analysis") or {}
+    relevant = {
+        "progress": [p.get("attributes", {}) for p in user_data.get("learning_path_progress") or []],
+        "skill_gaps": user_data.get("skill_gaps") or [],
+        "deadlines": [[d.get("path_id"), d.get("deadline"), _bucket(d.get("days_remaining"), deadline_urgency)]
+                      for d in analysis.get("upcoming_deadlines", [])],
+        "high_priority": analysis.get("high_priority_paths", []),
+        "stalled": [[s.get("path_id"), _bucket(s.get("days_stalled"), stalled_for)]
+                    for s in analysis.get("stalled_paths", [])],
+    }
+    encoded = json.dumps(relevant, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:16]
+
+
+def make_entry(fingerprint: str, recommendations: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "fingerprint": fingerprint,
+        "generated_at": datetime.now().isoformat(),
+        "generated_ts": time.time(),
+        "fallback": bool(recommendations.get("metadata", {}).get("fallback")),
+        "recommendations": recommendations
+    }
+
+
+class RecommendationEngine:
+    """Precomputes AI recommendations in a background thread.
+
+    Reads never wait on the LLM: ``get`` returns the stored result with its
+    ``generated_at`` timestamp and, at most once per ``check_interval``,
+    queues a check. The worker reloads the user's learning data and only
+    calls the model when its fingerprint changed, the result is older than
+    ``max_age_seconds``, or the stored result is a fallback.
+    """
+
+    def __init__(self, service_factory: Optional[Callable[[], Any]] = None, store_file: Optional[str] = None,
+                 max_age_seconds: float = 24 * 3600, check_interval: float = 300):
+        self.service_factory = service_factory or _default_service
+        self.store_file = store_file
+        self.max_age_seconds = max_age_seconds
+        self.check_interval = check_interval
+        self.service = None
+        self.queue: Queue = Queue()
+        self.pending = set()
+        self.done = {}
+        self.last_checked: Dict[str, float] = {}
+        self.errors: Dict[str, str] = {}
+        self.counts = {"generated": 0, "unchanged": 0, "failed": 0}
+        self.lock = threading.Lock()
+        self.store_lock = threading.Lock()
+        self.worker_thread = None
+        self.running = False
+
+    @property
+    def path(self) -> str:
+        return self.store_file or get_data_file_path(STORE_FILE)
+
+    def stored(self, user_id: str) -> Optional[Dict[str, Any]]:
+        return read_json_cached(self.path, {}).get(STORE_KEY, {}).get(user_id)
+
+    def get(self, user_id: str) -> Dict[str, Any]:
+        """The precomputed result for ``user_id`` with its freshness; never calls the model."""
+        entry = self.stored(user_id)
+        if time.time() - self.last_checked.get(user_id, 0) >= self.check_interval:
+            self.schedule(user_id)
+        with self.lock:
+            refreshing = user_id in self.pending
+            error = self.errors.get(user_id)
+        if entry is None:
+            return {"status": "error" if error and not refreshing else "pending", "recommendations": None,
+                    "generated_at": None, "refreshing": refreshing, "error": error}
+        return {
+            "status": "ready",
+            "recommendations": entry["recommendations"],
+            "generated_at": entry["generated_at"],
+            "fingerprint": entry["fingerprint"],
+            "fallback": entry.get("fallback", False),
+            "refreshing": refreshing
+        }
+
+    def wait(self, user_id: str, timeout: float) -> bool:
+        """Block until the queued refresh for ``user_id`` finishes; False on timeout."""
+        with self.lock:
+            event = self.done.get(user_id)
+        return event is None or event.wait(timeout)
+
+    def schedule(self, user_id: str, force: bool = False) -> bool:
+        """Queue a refresh for ``user_id``; False if one is already queued."""
+        with self.lock:
+            if user_id in self.pending:
+                return False
+            self.pending.add(user_id)
+            self.done[user_id] = threading.Event()
+        self.start_worker()
+        self.queue.put((user_id, force))
+        return True
+
+    def refresh(self, user_id: str, force: bool = False) -> bool:
+        """Recompute recommendations for ``user_id`` if its data changed; True if regenerated."""
+        if self.service is None:
+            self.service = self.service_factory()
+        user_data = self.service.get_user_learning_data(user_id)
+        fingerprint = learning_data_fingerprint(user_data)
+        entry = self.stored(user_id)
+        self.last_checked[user_id] = time.time()
+        if not force and self.is_current(entry, fingerprint):
+            self.counts["unchanged"] += 1
+            return False
+
+        recommendations = self.service.generate_recommendations(user_id, user_data=user_data)
+        self.store_many({user_id: make_entry(fingerprint, recommendations)})
+        self.counts["generated"] += 1
+        return True
+
+    def is_current(self, entry: Optional[Dict[str, Any]], fingerprint: str) -> bool:
+        """True if ``entry`` is a non-fallback result for ``fingerprint`` within max_age_seconds."""
+        return entry is not None and not entry.get("fallback") and entry["fingerprint"] == fingerprint \
+            and time.time() - entry.get("generated_ts", 0) < self.max_age_seconds
+
+    def store_many(self, entries: Dict[str, Dict[str, Any]]) -> None:
+        """Save several users' entries in one read-modify-write of the store file."""
+        with self.store_lock:
+            data = _read_json(self.path, {})
+            data.setdefault(STORE_KEY, {}).update(entries)
+            _write_json(self.path, data)
+
+    def start_worker(self):
+        with self.lock:
+            if self.worker_thread is None or not self.worker_thread.is_alive():
+                self.running = True
+                self.worker_thread = threading.Thread(target=self._worker_loop, name="recommendation-engine",
+                                                      daemon=True)
+                self.worker_thread.start()
+
+    def stop_worker(self):
+        self.running = False
+        if self.worker_thread and self.worker_thread.is_alive():
+            self.worker_thread.join(timeout=5)
+
+    def _worker_loop(self):
+        while self.running:
+            try:
+                user_id, force = self.queue.get(timeout=1)
+            except Empty:
+                continue
+            try:
+                self.refresh(user_id, force)
+                self.errors.pop(user_id, None)
+            except Exception as e:
+                print(f"❌ Recommendation refresh failed for {user_id}: {e}")
+                self.counts["failed"] += 1
+                self.last_checked[user_id] = time.time()
+                self.errors[user_id] = str(e)
+            finally:
+                with self.lock:
+                    self.pending.discard(user_id)
+                    event = self.done.pop(user_id, None)
+                if event is not None:
+                    event.set()
+                self.queue.task_done()
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                **self.counts,
+                "queued": len(self.pending),
+                "worker_running": bool(self.worker_thread and self.worker_thread.is_alive())
+            }
+
+
+def _default_service():
+    from .ai_recommendations import AIRecommendationsService
+    return AIRecommendationsService()
+
+
+recommendation_engine = RecommendationEngine()
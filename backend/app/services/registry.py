@@ -0,0 +1,116 @@
+import time
+import threading
+from typing import Callable, Dict, Any, List, Optional
+
+
+class ServiceRegistry:
+    """Lazily constructed, process-wide service singletons.
+
+    Heavy components (embedding models, vector stores, LLM clients) are
+    registered as factories and built on first use, or ahead of time by
+    ``warm_up`` in a background thread, so importing the app and
+    registering blueprints never pays for them.
+    """
+
+    def __init__(self):
+        self.factories: Dict[str, Callable[[], Any]] = {}
+        self.instances: Dict[str, Any] = {}
+        self.load_times: Dict[str, float] = {}
+        self.lock = threading.Lock()
+        self.build_locks: Dict[str, threading.Lock] = {}
+
+    def register(self, name: str, factory: Callable[[], Any]) -> None:
+        with self.lock:
+            self.factories[name] = factory
+            self.build_locks.setdefault(name, threading.Lock())
+
+    def get(self, name: str) -> Any:
+        """Return the service, building it on first call (once, even under concurrency)."""
+        instance = self.instances.get(name)
+        if instance is not None:
+            return instance
+        with self.lock:
+            if name not in self.factories:
+                raise KeyError(f"Unknown service: {name}")
+            build_lock = self.build_locks[name]
+        with build_lock:
+            if name not in self.instances:
+                started = time.perf_counter()
+                print(f"DEBUG: Building service {name}")
+                self.instances[name] = self.factories[name]()
+                self.load_times[name] = time.perf_counter() - started
+                print(f"DEBUG: Service {name} ready in {self.load_times[name]:.2f}s")
+            return self.instances[name]
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self.instances
+
+    def peek(self, name: str) -> Optional[Any]:
+        """The service if it has already been built, without building it."""
+        return self.instances.get(name)
+
+    def lazy(self, name: str) -> "LazyService":
+        return LazyService(self, name)
+
+    def reset(self, name: str) -> None:
+        with self.lock:
+            self.instances.pop(name, None)
+            self.load_times.pop(name, None)
+
+    def warm_up(self, names: List[str], then: Optional[Callable[[], None]] = None) -> threading.Thread:
+        """Build ``names`` in a daemon thread, then run ``then``; failures are logged."""
+        def _run():
+            for name in names:
+                try:
+                    self.get(name)
+                except Exception as e:
+                    print(f"⚠️  Warm-up of {name} failed: {e}")
+                    return
+            if then is not None:
+                try:
+                    then()
+                except Exception as e:
+                    print(f"⚠️  Warm-up hook failed: {e}")
+
+        thread = threading.Thread(target=_run, name="service-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            name: {"loaded": name in self.instances, "load_seconds": round(self.load_times.get(name, 0.0), 3)}
+            for name in self.factories
+        }
+
+
+class LazyService:
+    """Module-level stand-in that resolves a registered service on first attribute access."""
+
+    def __init__(self, registry: ServiceRegistry, name: str):
+        object.__setattr__(self, "_registry", registry)
+        object.__setattr__(self, "_name", name)
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._registry.get(self._name), attr)
+
+    def __setattr__(self, attr: str, value: Any) -> None:
+        setattr(self._registry.get(self._name), attr, value)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._registry.is_loaded(self._name) else "not loaded"
+        return f"<LazyService {self._name} ({state})>"
+
+
+def _build_document_processor():
+    from .document_processor import DocumentProcessor
+    return DocumentProcessor()
+
+
+def _build_conversation_agent():
+    from .conversation_agent import ConversationAgent
+    return ConversationAgent()
+
+
+services = ServiceRegistry()
+services.register("document_processor", _build_document_processor)
+services.register("conversation_agent", _build_conversation_agent)
@@ -0,0 +1,243 @@
+import os
+import json
+import time
+import uuid
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process use only
+    fcntl = None
+
+
+def _parse_iso(value: str) -> Optional[float]:
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except (AttributeError, ValueError):
+        return None
+
+
+@contextmanager
+def _log_lock(log_path: str, exclusive: bool):
+    """Cross-process lock: appends share it, compaction takes it exclusively."""
+    if fcntl is None:
+        yield
+        return
+    os.makedirs(os.path.dirname(log_path), exist_ok=True)
+    with open(log_path + ".lock", 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class SessionStore:
+    """Bearer-token sessions held in memory and persisted as an append-only log.
+
+    Every login appends one ``create`` line and every sign-out one
+    ``revoke`` line to ``log_path``; validating a token is a dictionary
+    lookup. Sessions expire ``ttl_seconds`` after creation, expired entries
+    are purged by a background thread, and the log is compacted once it
+    holds mostly dead records.
+
+    Several processes (main_server runs the auth and main apps separately)
+    can share one log: every lookup stats the log and applies whatever other
+    processes appended since the last read, so a sign-out in one process
+    takes effect in the others, and a compaction by another process is
+    detected by the log's inode changing.
+    """
+
+    def __init__(self, log_path: str, ttl_seconds: float = 7 * 24 * 3600,
+                 purge_interval: float = 300, legacy_path: Optional[str] = None):
+        self.log_path = log_path
+        self.ttl_seconds = ttl_seconds
+        self.purge_interval = purge_interval
+        self.legacy_path = legacy_path
+        self.sessions: Dict[str, Dict[str, Any]] = {}
+        self.lock = threading.RLock()
+        self._offset = 0
+        self._inode = None
+        self._log_records = 0
+        self._purge_thread = None
+        self._stop = threading.Event()
+
+        with self.lock:
+            if not os.path.exists(self.log_path) and self.legacy_path and os.path.exists(self.legacy_path):
+                self._import_legacy()
+            self._refresh()
+
+    # Log replay
+
+    def _apply(self, record: Dict[str, Any]) -> None:
+        token = record.get("token")
+        if not token:
+            return
+        if record.get("op") == "create":
+            self.sessions[token] = {
+                "email": record["email"],
+                "created_at": record["created_at"],
+                "expires_at": record["expires_at"]
+            }
+        elif record.get("op") == "revoke":
+            self.sessions.pop(token, None)
+        self._log_records += 1
+
+    def _refresh(self) -> None:
+        """Apply records appended to the log since the last read."""
+        try:
+            stat = os.stat(self.log_path)
+        except FileNotFoundError:
+            return
+        if stat.st_ino != self._inode or stat.st_size < self._offset:
+            # First read, or the log was compacted by another process
+            self.sessions.clear()
+            self._offset = 0
+            self._log_records = 0
+            self._inode = stat.st_ino
+        if stat.st_size == self._offset:
+            return
+
+        with open(self.log_path, 'rb') as f:
+            f.seek(self._offset)
+            data = f.read()
+        # Leave a partially written last line for the next read
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            try:
+                self._apply(json.loads(line))
+            except (ValueError, KeyError):
+                continue
+        self._offset += end
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
+        line = (json.dumps(record) + "\n").encode("utf-8")
+        with _log_lock(self.log_path, exclusive=False):
+            fd = os.open(self.log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+            try:
+                os.write(fd, line)
+            finally:
+                os.close(fd)
+        # Pick up our own line (and anything another process appended before it)
+        self._refresh()
+
+    def _import_legacy(self) -> None:
+        """One-time import of the old sessions.json map, dropping expired entries."""
+        try:
+            with open(self.legacy_path, 'r', encoding='utf-8') as f:
+                legacy = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Warning: could not import legacy sessions from {self.legacy_path}: {e}")
+            return
+        now = time.time()
+        for token, info in legacy.items():
+            created_at = _parse_iso(info.get("created_at", "")) or now
+            if created_at + self.ttl_seconds > now and info.get("email"):
+                self.sessions[token] = {
+                    "email": info["email"],
+                    "created_at": created_at,
+                    "expires_at": created_at + self.ttl_seconds
+                }
+        self._write_compacted()
+        print(f"📋 Imported {len(self.sessions)} live sessions from {self.legacy_path}")
+
+    def _write_compacted(self) -> None:
+        with _log_lock(self.log_path, exclusive=True):
+            # Include anything appended by other processes up to now
+            self._refresh()
+            now = time.time()
+            tmp = self.log_path + ".tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                for token, info in self.sessions.items():
+                    if info["expires_at"] > now:
+                        f.write(json.dumps({"op": "create", "token": token, **info}) + "\n")
+            os.replace(tmp, self.log_path)
+        self._inode = None
+        self._offset = 0
+        self._refresh()
+
+    # Public API
+
+    def create(self, email: str) -> str:
+        now = time.time()
+        token = uuid.uuid4().hex
+        with self.lock:
+            self._append({
+                "op": "create",
+                "token": token,
+                "email": email.strip().lower(),
+                "created_at": now,
+                "expires_at": now + self.ttl_seconds
+            })
+        self._ensure_purge_thread()
+        return token
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        """Session for ``token`` or None if unknown, revoked or expired."""
+        if not token:
+            return None
+        with self.lock:
+            # Creates and revokes by other processes since our last read; a
+            # single stat when nothing was appended
+            self._refresh()
+            info = self.sessions.get(token)
+        if info is None:
+            return None
+        if info["expires_at"] <= time.time():
+            with self.lock:
+                self.sessions.pop(token, None)
+            return None
+        return info
+
+    def revoke(self, token: str) -> bool:
+        with self.lock:
+            self._refresh()
+            if token not in self.sessions:
+                return False
+            self._append({"op": "revoke", "token": token})
+            return True
+
+    def purge_expired(self) -> int:
+        """Drop expired sessions; compact the log when it is mostly dead records."""
+        now = time.time()
+        with self.lock:
+            self._refresh()
+            expired = [t for t, info in self.sessions.items() if info["expires_at"] <= now]
+            for token in expired:
+                del self.sessions[token]
+            if self._log_records > 2 * len(self.sessions) + 100:
+                self._write_compacted()
+        return len(expired)
+
+    def _ensure_purge_thread(self) -> None:
+        if self._purge_thread is not None or self.purge_interval <= 0:
+            return
+
+        def _run():
+            while not self._stop.wait(self.purge_interval):
+                try:
+                    purged = self.purge_expired()
+                    if purged:
+                        print(f"🧹 Purged {purged} expired sessions")
+                except Exception as e:
+                    print(f"Warning: session purge failed: {e}")
+
+        with self.lock:
+            if self._purge_thread is None:
+                self._purge_thread = threading.Thread(target=_run, name="session-purge", daemon=True)
+                self._purge_thread.start()
+
+    def close(self) -> None:
+        self._stop.set()
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "active_sessions": len(self.sessions),
+                "log_records": self._log_records,
+                "ttl_seconds": self.ttl_seconds
+            }
@@ -0,0 +1,195 @@
+import os
+import json
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Any, List, Optional
+
+
+def estimate_store_bytes(vector_store) -> int:
+    """Approximate resident size of a langchain FAISS store.
+
+    Counts the raw vectors of the FAISS index plus the docstore text, a
+    flat per-document overhead for metadata and Python objects, and the
+    attached keyword index if there is one.
+    """
+    index = vector_store.index
+    vector_bytes = index.ntotal * index.d * 4
+    docs = vector_store.docstore._dict.values()
+    text_bytes = sum(len(doc.page_content.encode('utf-8')) for doc in docs)
+    keyword_index = getattr(vector_store, "keyword_index", None)
+    keyword_bytes = keyword_index.estimated_bytes() if keyword_index is not None else 0
+    return vector_bytes + text_bytes + 512 * len(vector_store.docstore._dict) + keyword_bytes
+
+
+class VectorStoreManager:
+    """Bounded LRU of per-department vector stores.
+
+    Stores are loaded on first use and the least recently used ones are
+    dropped once the estimated resident size passes ``memory_budget_bytes``
+    (the store just requested is always kept). Per-department query counts
+    are persisted so the busiest departments can be prewarmed in a
+    background thread at startup.
+    """
+
+    def __init__(self, memory_budget_bytes: int, usage_file: Optional[Path] = None,
+                 usage_flush_every: int = 25):
+        self.memory_budget_bytes = memory_budget_bytes
+        self.usage_file = Path(usage_file) if usage_file else None
+        self.usage_flush_every = usage_flush_every
+        self.stores: "OrderedDict[str, Any]" = OrderedDict()
+        self.sizes: Dict[str, int] = {}
+        self.lock = threading.RLock()
+        self.load_locks: Dict[str, threading.Lock] = {}
+        self.query_counts: Dict[str, int] = self._load_usage()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._unsaved_queries = 0
+        self.prewarm_thread = None
+
+    # Dict-style access used by callers and tests
+
+    def __contains__(self, department_id: str) -> bool:
+        with self.lock:
+            return department_id in self.stores
+
+    def __getitem__(self, department_id: str):
+        with self.lock:
+            return self.stores[department_id]
+
+    def __len__(self) -> int:
+        with self.lock:
+            return len(self.stores)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.stores.clear()
+            self.sizes.clear()
+
+    # LRU
+
+    def get(self, department_id: str, loader: Callable[[str], Any], count_query: bool = True):
+        """Return the cached store for a department, loading it on a miss."""
+        if count_query:
+            self._record_query(department_id)
+
+        with self.lock:
+            if department_id in self.stores:
+                self.stores.move_to_end(department_id)
+                self.hits += 1
+                return self.stores[department_id]
+            load_lock = self.load_locks.setdefault(department_id, threading.Lock())
+
+        # Load outside the main lock so other departments stay available
+        with load_lock:
+            with self.lock:
+                if department_id in self.stores:
+                    self.stores.move_to_end(department_id)
+                    self.hits += 1
+                    return self.stores[department_id]
+            self.misses += 1
+            vector_store = loader(department_id)
+            self.put(department_id, vector_store)
+            return vector_store
+
+    def put(self, department_id: str, vector_store) -> None:
+        """Insert or refresh a store and evict down to the memory budget."""
+        size = estimate_store_bytes(vector_store)
+        with self.lock:
+            self.stores[department_id] = vector_store
+            self.stores.move_to_end(department_id)
+            self.sizes[department_id] = size
+            self._evict(keep=department_id)
+
+    def invalidate(self, department_id: str) -> None:
+        with self.lock:
+            self.stores.pop(department_id, None)
+            self.sizes.pop(department_id, None)
+
+    def _evict(self, keep: str) -> None:
+        while self.resident_bytes() > self.memory_budget_bytes and len(self.stores) > 1:
+            victim = next(iter(self.stores))
+            if victim == keep:
+                self.stores.move_to_end(victim)
+                victim = next(iter(self.stores))
+            self.stores.pop(victim)
+            freed = self.sizes.pop(victim, 0)
+            self.evictions += 1
+            print(f"DEBUG: Evicted vector store for {victim} ({freed / 1e6:.1f} MB)")
+
+    def resident_bytes(self) -> int:
+        with self.lock:
+            return sum(self.sizes.values())
+
+    # Usage tracking and prewarm
+
+    def _load_usage(self) -> Dict[str, int]:
+        if not self.usage_file or not self.usage_file.exists():
+            return {}
+        try:
+            with open(self.usage_file, 'r', encoding='utf-8') as f:
+                return {k: int(v) for k, v in json.load(f).items()}
+        except Exception as e:
+            print(f"Warning: could not read vector store usage from {self.usage_file}: {e}")
+            return {}
+
+    def save_usage(self) -> None:
+        if not self.usage_file or not self._unsaved_queries:
+            return
+        with self.lock:
+            counts = dict(self.query_counts)
+            self._unsaved_queries = 0
+        try:
+            self.usage_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.usage_file.with_name(self.usage_file.name + ".tmp")
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(counts, f, indent=2)
+            os.replace(tmp, self.usage_file)
+        except Exception as e:
+            print(f"Warning: could not save vector store usage: {e}")
+
+    def _record_query(self, department_id: str) -> None:
+        with self.lock:
+            self.query_counts[department_id] = self.query_counts.get(department_id, 0) + 1
+            self._unsaved_queries += 1
+            flush = self._unsaved_queries >= self.usage_flush_every
+        if flush:
+            self.save_usage()
+
+    def most_queried(self, limit: int) -> List[str]:
+        with self.lock:
+            ranked = sorted(self.query_counts.items(), key=lambda item: -item[1])
+        return [department_id for department_id, _ in ranked[:limit]]
+
+    def prewarm(self, loader: Callable[[str], Any], limit: int,
+                exists: Optional[Callable[[str], bool]] = None) -> Optional[threading.Thread]:
+        """Load the ``limit`` most-queried departments in a background thread."""
+        departments = [d for d in self.most_queried(limit) if exists is None or exists(d)]
+        if not departments:
+            return None
+
+        def _run():
+            for department_id in departments:
+                try:
+                    self.get(department_id, loader, count_query=False)
+                    if self.resident_bytes() >= self.memory_budget_bytes:
+                        break
+                except Exception as e:
+                    print(f"Warning: prewarm failed for {department_id}: {e}")
+            print(f"🔥 Prewarmed vector stores: {[d for d in departments if d in self]}")
+
+        self.prewarm_thread = threading.Thread(target=_run, daemon=True)
+        self.prewarm_thread.start()
+        return self.prewarm_thread
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "resident_departments": {d: self.sizes.get(d, 0) for d in self.stores},
+                "resident_bytes": sum(self.sizes.values()),
+                "memory_budget_bytes": self.memory_budget_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
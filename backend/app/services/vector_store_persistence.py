@@ -0,0 +1,225 @@
+import os
+import json
+import shutil
+import threading
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+from langchain.schema import Document
+from langchain_community.vectorstores import FAISS
+
+MANIFEST_FILE = "manifest.json"
+SEGMENTS_DIR = "segments"
+KEYWORD_DELTA_SUFFIX = ".bm25.json"
+LEGACY_BASE = "."
+
+
+def _fsync_file(path: Path) -> None:
+    with open(path, 'rb') as f:
+        os.fsync(f.fileno())
+
+
+def _fsync_dir(path: Path) -> None:
+    """Flush directory entries so renames survive a crash (no-op where unsupported)."""
+    try:
+        fd = os.open(str(path), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class VectorStorePersistence:
+    """Append-friendly on-disk layout for a department's FAISS store.
+
+    A store directory holds one base snapshot (the regular ``save_local``
+    output) plus a list of small delta segments, one per ingest. The
+    ``manifest.json`` file is the only commit point: it is replaced
+    atomically after the segment files are fully written, so a crash
+    mid-save leaves either the old or the new manifest and any half-written
+    segment is simply ignored. Once enough segments pile up they are merged
+    into a new base snapshot.
+
+    Directories written before this layout existed (``index.faiss`` and
+    ``index.pkl`` directly in the store directory) are read as the base.
+
+    A store's BM25 ``keyword_index`` follows the same scheme: the full index
+    is saved with each snapshot and each segment carries the postings of
+    its documents (``<segment>.bm25.json``).
+    """
+
+    def __init__(self, max_segments: int = 16):
+        self.max_segments = max_segments
+        self.lock = threading.Lock()
+
+    # Manifest handling
+
+    def _manifest_path(self, store_path: Path) -> Path:
+        return store_path / MANIFEST_FILE
+
+    def read_manifest(self, store_path: Path) -> Optional[Dict[str, Any]]:
+        """Return the committed manifest, synthesising one for legacy stores."""
+        manifest_path = self._manifest_path(store_path)
+        if manifest_path.exists():
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        if (store_path / "index.faiss").exists() and (store_path / "index.pkl").exists():
+            return {"base": LEGACY_BASE, "generation": 0, "next_segment": 1, "segments": []}
+        return None
+
+    def _write_manifest(self, store_path: Path, manifest: Dict[str, Any]) -> None:
+        manifest_path = self._manifest_path(store_path)
+        tmp = manifest_path.with_name(MANIFEST_FILE + ".tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, manifest_path)
+        _fsync_dir(store_path)
+
+    def keyword_deltas(self, store_path: Path) -> List[Path]:
+        """Keyword index deltas of the committed segments, oldest first."""
+        manifest = self.read_manifest(store_path) or {}
+        segments_dir = store_path / SEGMENTS_DIR
+        return [segments_dir / f"{segment}{KEYWORD_DELTA_SUFFIX}" for segment in manifest.get("segments", [])
+                if (segments_dir / f"{segment}{KEYWORD_DELTA_SUFFIX}").exists()]
+
+    # Loading
+
+    def load(self, store_path: Path, embeddings) -> Optional[FAISS]:
+        """Load the base snapshot and replay committed segments on top of it."""
+        with self.lock:
+            manifest = self.read_manifest(store_path)
+            if manifest is None:
+                return None
+
+            vector_store = FAISS.load_local(
+                str(store_path / manifest["base"]),
+                embeddings,
+                allow_dangerous_deserialization=True
+            )
+
+            segments_dir = store_path / SEGMENTS_DIR
+            for segment in manifest.get("segments", []):
+                vectors = np.load(segments_dir / f"{segment}.npy")
+                with open(segments_dir / f"{segment}.json", 'r', encoding='utf-8') as f:
+                    records = json.load(f)
+                vector_store.add_embeddings(
+                    [(r["page_content"], vectors[i].tolist()) for i, r in enumerate(records)],
+                    metadatas=[r["metadata"] for r in records],
+                    ids=[r["id"] for r in records]
+                )
+
+            self._remove_orphans(store_path, manifest)
+            return vector_store
+
+    def _remove_orphans(self, store_path: Path, manifest: Dict[str, Any]) -> None:
+        """Delete files left behind by an interrupted save or merge."""
+        try:
+            committed = set(manifest.get("segments", []))
+            segments_dir = store_path / SEGMENTS_DIR
+            if segments_dir.exists():
+                for entry in segments_dir.iterdir():
+                    if entry.name.split('.')[0] not in committed:
+                        entry.unlink()
+            for entry in store_path.iterdir():
+                if entry.is_dir() and entry.name.startswith("base_") and entry.name != manifest["base"]:
+                    shutil.rmtree(entry, ignore_errors=True)
+            tmp_manifest = store_path / (MANIFEST_FILE + ".tmp")
+            if tmp_manifest.exists():
+                tmp_manifest.unlink()
+        except Exception as e:
+            print(f"Warning: could not clean up vector store at {store_path}: {e}")
+
+    # Writing
+
+    def append(self, store_path: Path, vector_store: FAISS, documents: List[Document],
+               vectors: List[List[float]]) -> List[str]:
+        """Add pre-embedded documents to ``vector_store`` and persist only the delta.
+
+        The first write to a fresh store (and every ``max_segments``-th
+        append) writes a full snapshot instead of a segment.
+        """
+        with self.lock:
+            ids = vector_store.add_embeddings(
+                [(doc.page_content, vector) for doc, vector in zip(documents, vectors)],
+                metadatas=[doc.metadata for doc in documents]
+            )
+            keyword_index = getattr(vector_store, "keyword_index", None)
+            keyword_delta = keyword_index.add_documents(ids, documents) if keyword_index is not None else None
+
+            manifest = self.read_manifest(store_path)
+            if manifest is None or len(manifest.get("segments", [])) >= self.max_segments:
+                self._write_snapshot(store_path, vector_store, manifest)
+                return ids
+
+            segment = f"seg_{manifest.get('next_segment', 1):06d}"
+            segments_dir = store_path / SEGMENTS_DIR
+            segments_dir.mkdir(parents=True, exist_ok=True)
+
+            vectors_path = segments_dir / f"{segment}.npy"
+            np.save(vectors_path, np.asarray(vectors, dtype=np.float32))
+            _fsync_file(vectors_path)
+
+            records_path = segments_dir / f"{segment}.json"
+            with open(records_path, 'w', encoding='utf-8') as f:
+                json.dump([
+                    {"id": doc_id, "page_content": doc.page_content, "metadata": doc.metadata}
+                    for doc_id, doc in zip(ids, documents)
+                ], f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            if keyword_delta is not None:
+                keyword_index.save_delta(segments_dir / f"{segment}{KEYWORD_DELTA_SUFFIX}", keyword_delta)
+            _fsync_dir(segments_dir)
+
+            manifest["segments"] = manifest.get("segments", []) + [segment]
+            manifest["next_segment"] = manifest.get("next_segment", 1) + 1
+            self._write_manifest(store_path, manifest)
+            return ids
+
+    def compact(self, store_path: Path, vector_store: FAISS) -> None:
+        """Merge all segments into a new base snapshot."""
+        with self.lock:
+            self._write_snapshot(store_path, vector_store, self.read_manifest(store_path))
+
+    def _write_snapshot(self, store_path: Path, vector_store: FAISS,
+                        manifest: Optional[Dict[str, Any]]) -> None:
+        store_path.mkdir(parents=True, exist_ok=True)
+        generation = (manifest or {}).get("generation", 0) + 1
+        base = f"base_{generation:06d}"
+
+        tmp_dir = store_path / f"{base}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        vector_store.save_local(str(tmp_dir))
+        for name in ("index.faiss", "index.pkl"):
+            _fsync_file(tmp_dir / name)
+        os.replace(tmp_dir, store_path / base)
+        keyword_index = getattr(vector_store, "keyword_index", None)
+        if keyword_index is not None:
+            keyword_index.save(store_path)
+        _fsync_dir(store_path)
+
+        new_manifest = {
+            "base": base,
+            "generation": generation,
+            "next_segment": (manifest or {}).get("next_segment", 1),
+            "segments": []
+        }
+        self._write_manifest(store_path, new_manifest)
+
+        # The new manifest is committed; everything the old one referenced can go
+        if manifest:
+            if manifest["base"] == LEGACY_BASE:
+                for name in ("index.faiss", "index.pkl"):
+                    try:
+                        (store_path / name).unlink()
+                    except FileNotFoundError:
+                        pass
+        self._remove_orphans(store_path, new_manifest)
+        print(f"DEBUG: Wrote vector store snapshot {base} at {store_path}")
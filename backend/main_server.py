@@ -77,6 +77,9 @@ def main():
     print("🌟 Starting AdaptaLearn Backend Services...")
     print("=" * 60)
     
+    # The servers run in separate processes; share login rate limits between them
+    os.environ.setdefault("RATE_LIMIT_BACKEND", "sqlite")
+
     # Create processes for each server
     processes = []
     
@@ -138,5 +141,14 @@ def main():
             process.join()
         print("✅ All servers stopped successfully!")
 
+def profile_startup(extra_args):
+    """Profile the startup of each process main() launches, then exit."""
+    import subprocess
+    script = os.path.join(project_root, 'scripts', 'profile_startup.py')
+    return subprocess.call([sys.executable, script, '--target', 'auth', 'session', 'app', *extra_args])
+
 if __name__ == "__main__":
+    if '--profile-startup' in sys.argv[1:]:
+        # e.g. python backend/main_server.py --profile-startup --budget-ms 1500
+        sys.exit(profile_startup([a for a in sys.argv[1:] if a != '--profile-startup']))
     main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Batch Resume Analysis CLI
+Scores a directory or archive of resumes against one role and writes JSONL.
+
+    python scripts/batch_analyze_resumes.py resumes.zip --role "Data Analyst" --department "Data Science"
+    python scripts/batch_analyze_resumes.py ./resumes --skills Python,SQL,Tableau --workers 8 -o results.jsonl
+
+One line is written per resume ({"type": "result", "index", "file",
+"status": "ok"|"error", ...}) followed by a summary line. Exits with
+status 1 if any resume failed.
+"""
+
+import os
+import sys
+import json
+import argparse
+from typing import List, Optional
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from agent.batch_resume import analyze_source, resolve_role_skills
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Analyze many resumes against one role")
+    parser.add_argument("source", help="directory of resumes or a .zip/.tar archive")
+    parser.add_argument("--role", help="target role name (skills looked up from the role catalog)")
+    parser.add_argument("--department", help="department of the target role")
+    parser.add_argument("--skills", default="", help="comma-separated skills (instead of --role)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--unordered", action="store_true", help="write results as they finish")
+    parser.add_argument("-o", "--output", help="JSONL output file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    role_skills = [s.strip() for s in args.skills.split(",") if s.strip()]
+    if not role_skills:
+        if not args.role:
+            parser.error("either --role or --skills is required")
+        role_skills = resolve_role_skills(args.role, args.department)
+
+    if not os.path.exists(args.source):
+        parser.error(f"source not found: {args.source}")
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    failed = 0
+    try:
+        for record in analyze_source(args.source, role_skills, workers=args.workers, ordered=not args.unordered):
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+            if record["type"] == "summary":
+                failed = record["failed"]
+                print(f"✅ {record['succeeded']}/{record['total']} resumes analyzed in "
+                      f"{record['elapsed_ms'] / 1000:.1f}s ({record['failed']} failed)", file=sys.stderr)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
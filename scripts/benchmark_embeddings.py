@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Embedding Throughput Benchmark
+Measures how fast the configured embedding provider embeds document chunks.
+
+Runs offline with EMBEDDING_PROVIDER=hashing (deterministic stand-in) or
+EMBEDDING_PROVIDER=local (CPU sentence-transformers), e.g.:
+
+    EMBEDDING_PROVIDER=local python scripts/benchmark_embeddings.py --chunks 2000 --batch-sizes 16,32,64
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.app.services.embedding_providers import get_embedding_config, create_embedding_provider, build_embedding_service
+
+
+def make_chunks(count: int, words: int) -> list:
+    """Generate distinct pseudo-document chunks of roughly ``words`` words."""
+    vocabulary = ("customer account onboarding policy compliance risk review "
+                  "transaction verification document identity process team").split()
+    return [
+        " ".join(vocabulary[(i * 7 + j) % len(vocabulary)] for j in range(words)) + f" section {i}"
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark embedding ingest throughput")
+    parser.add_argument("--chunks", type=int, default=1000, help="number of chunks to embed")
+    parser.add_argument("--words", type=int, default=150, help="words per chunk")
+    parser.add_argument("--batch-sizes", default="", help="comma-separated batch sizes to compare")
+    args = parser.parse_args()
+
+    config = get_embedding_config()
+    chunks = make_chunks(args.chunks, args.words)
+    batch_sizes = [int(b) for b in args.batch_sizes.split(",") if b] or [config["batch_size"]]
+
+    print(f"📐 Provider: {config['provider']} ({config['model']})")
+    print(f"📄 {len(chunks)} chunks x ~{args.words} words")
+    print("=" * 50)
+
+    for batch_size in batch_sizes:
+        run_config = dict(config, batch_size=batch_size)
+        # Warm up once so model loading is not counted
+        create_embedding_provider(run_config).embed_documents(chunks[:1])
+
+        with tempfile.TemporaryDirectory() as cache_root:
+            service = build_embedding_service(cache_root, run_config)
+            start = time.perf_counter()
+            service.embed_documents(chunks)
+            cold = time.perf_counter() - start
+
+            start = time.perf_counter()
+            service.embed_documents(chunks)
+            warm = time.perf_counter() - start
+
+        print(f"batch={batch_size:4d}  cold: {len(chunks) / cold:10.1f} chunks/s   "
+              f"cached: {len(chunks) / warm:10.1f} chunks/s")
+
+
+if __name__ == "__main__":
+    main()
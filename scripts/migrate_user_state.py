@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+User State Migration
+Imports the per-user profile, focus and idempotency JSON files in data/state
+into the consolidated state database (data/state/user_state.sqlite3).
+
+    python scripts/migrate_user_state.py            # import, keep the JSON files
+    python scripts/migrate_user_state.py --remove   # import, then delete them
+
+Users not migrated are imported on their first read anyway; this does all of
+them at once so the files can be removed. Audit logs stay as they are.
+"""
+
+import os
+import sys
+import argparse
+from typing import List, Optional
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from agent import persistence
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Move per-user state files into the state database")
+    parser.add_argument("--remove", action="store_true", help="delete each JSON file once imported")
+    args = parser.parse_args(argv)
+
+    store = persistence.state_store()
+    found = store.migrate(remove=args.remove)
+    action = "imported and removed" if args.remove else "imported"
+    print(f"✅ {found} state files {action} into {store.path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Startup Profiler
+Reports which imports and blueprints make the backend slow to boot.
+
+Each target is started in a fresh interpreter under ``python -X importtime``
+with Flask.register_blueprint timed. The report lists the slowest imports
+(cumulative and self time) and each blueprint's import + registration cost.
+Background warm-up is disabled (SERVICE_WARMUP=0) so only the synchronous
+startup path is measured.
+
+    python scripts/profile_startup.py --target app unified auth session
+    python scripts/profile_startup.py --target app --budget-ms 1500 --blueprint-budget-ms 300 --forbid torch,langchain
+
+Exits with status 1 when a budget is exceeded or a forbidden module is
+imported, so it can gate deployments. ``python backend/main_server.py
+--profile-startup`` runs it for the three processes main_server starts.
+"""
+
+import os
+import re
+import sys
+import json
+import argparse
+import subprocess
+from typing import List, Dict, Any, Optional
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+BACKEND = os.path.join(ROOT, 'backend')
+
+# target -> (working directory, startup code)
+TARGETS = {
+    "app": (ROOT, "from backend.app import create_app\napp = create_app()"),
+    "run": (BACKEND, "import run"),
+    "unified": (BACKEND, "import unified_server"),
+    "auth": (BACKEND, "import auth_server"),
+    "session": (BACKEND, "import session_tracking"),
+}
+
+RESULT_MARKER = "STARTUP_PROFILE "
+
+CHILD_TEMPLATE = """
+import sys, time, json
+sys.path.insert(0, {cwd!r})
+started = time.perf_counter()
+import flask
+registrations = []
+_register_blueprint = flask.Flask.register_blueprint
+
+def _timed_register_blueprint(self, blueprint, **options):
+    t = time.perf_counter()
+    try:
+        return _register_blueprint(self, blueprint, **options)
+    finally:
+        registrations.append({{"name": blueprint.name, "import_name": blueprint.import_name,
+                               "register_ms": (time.perf_counter() - t) * 1000}})
+
+flask.Flask.register_blueprint = _timed_register_blueprint
+{code}
+total_ms = (time.perf_counter() - started) * 1000
+sys.stdout.flush()
+print({marker!r} + json.dumps({{"total_ms": total_ms, "blueprints": registrations,
+                                 "modules": sorted(sys.modules)}}))
+"""
+
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+
+def parse_importtime(stderr: str) -> Dict[str, Dict[str, float]]:
+    """Map module -> {"self_ms", "cumulative_ms", "depth"} from ``-X importtime`` output."""
+    modules = {}
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        modules[name] = {
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000,
+            "depth": (len(indent) - 1) // 2
+        }
+    return modules
+
+
+def profile_target(target: str) -> Dict[str, Any]:
+    cwd, code = TARGETS[target]
+    script = CHILD_TEMPLATE.format(cwd=cwd, code=code, marker=RESULT_MARKER)
+    env = dict(os.environ, SERVICE_WARMUP="0", PYTHONDONTWRITEBYTECODE="1")
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", script],
+                         cwd=cwd, env=env, capture_output=True, text=True)
+    lines = [l for l in out.stdout.splitlines() if l.startswith(RESULT_MARKER)]
+    if out.returncode != 0 or not lines:
+        errors = [l for l in out.stderr.splitlines() if not l.startswith("import time:")]
+        raise RuntimeError(f"{target} failed to start:\n" + "\n".join(errors[-20:]))
+
+    result = json.loads(lines[-1][len(RESULT_MARKER):])
+    modules = parse_importtime(out.stderr)
+    for bp in result["blueprints"]:
+        bp["import_ms"] = modules.get(bp["import_name"], {}).get("cumulative_ms", 0.0)
+        bp["total_ms"] = bp["import_ms"] + bp["register_ms"]
+    result["target"] = target
+    result["imports"] = modules
+    return result
+
+
+def check_budgets(result: Dict[str, Any], budget_ms: Optional[float] = None,
+                  blueprint_budget_ms: Optional[float] = None, forbid: List[str] = ()) -> List[str]:
+    """Human-readable budget violations for one profiled target (empty if none)."""
+    violations = []
+    if budget_ms is not None and result["total_ms"] > budget_ms:
+        violations.append(f"{result['target']}: startup took {result['total_ms']:.0f} ms (budget {budget_ms:.0f} ms)")
+    if blueprint_budget_ms is not None:
+        for bp in result["blueprints"]:
+            if bp["total_ms"] > blueprint_budget_ms:
+                violations.append(f"{result['target']}: blueprint {bp['name']} took {bp['total_ms']:.0f} ms "
+                                  f"(budget {blueprint_budget_ms:.0f} ms)")
+    loaded = {m.split('.')[0] for m in result["modules"]}
+    for name in forbid:
+        if name in loaded:
+            violations.append(f"{result['target']}: forbidden module {name} was imported")
+    return violations
+
+
+def format_report(result: Dict[str, Any], top: int = 20) -> str:
+    imports = result["imports"]
+    lines = [
+        f"Startup profile: {result['target']}  "
+        f"(total {result['total_ms']:.0f} ms, {len(imports)} modules imported)",
+        "",
+        f"Slowest imports (top {top} by cumulative time):",
+        f"  {'cum ms':>9} {'self ms':>9}  module",
+    ]
+    ranked = sorted(imports.items(), key=lambda item: -item[1]["cumulative_ms"])
+    for name, timing in ranked[:top]:
+        lines.append(f"  {timing['cumulative_ms']:9.1f} {timing['self_ms']:9.1f}  {name}")
+
+    lines += ["", f"Heaviest modules by self time (top {top}):"]
+    for name, timing in sorted(imports.items(), key=lambda item: -item[1]["self_ms"])[:top]:
+        lines.append(f"  {timing['self_ms']:9.1f}  {name}")
+
+    if result["blueprints"]:
+        lines += ["", "Blueprints (import + registration):",
+                  f"  {'total ms':>9} {'import ms':>9} {'reg ms':>7}  blueprint"]
+        for bp in sorted(result["blueprints"], key=lambda bp: -bp["total_ms"]):
+            lines.append(f"  {bp['total_ms']:9.1f} {bp['import_ms']:9.1f} {bp['register_ms']:7.1f}  "
+                         f"{bp['name']} ({bp['import_name']})")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Profile backend startup imports and blueprint registration")
+    parser.add_argument("--target", nargs="+", choices=sorted(TARGETS), default=["app"],
+                        help="entry points to profile")
+    parser.add_argument("--top", type=int, default=20, help="number of imports to list")
+    parser.add_argument("--budget-ms", type=float,
+                        default=float(os.environ["STARTUP_BUDGET_MS"]) if os.getenv("STARTUP_BUDGET_MS") else None,
+                        help="fail if a target's startup exceeds this (default: $STARTUP_BUDGET_MS)")
+    parser.add_argument("--blueprint-budget-ms", type=float, default=None,
+                        help="fail if any blueprint's import + registration exceeds this")
+    parser.add_argument("--forbid", default="", help="comma-separated top-level modules that must not be imported")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results instead of a report")
+    args = parser.parse_args(argv)
+
+    forbid = [m.strip() for m in args.forbid.split(",") if m.strip()]
+    results, violations = [], []
+    for target in args.target:
+        try:
+            result = profile_target(target)
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            return 1
+        results.append(result)
+        violations += check_budgets(result, args.budget_ms, args.blueprint_budget_ms, forbid)
+
+    if args.json:
+        print(json.dumps([{k: v for k, v in r.items() if k != "modules"} for r in results], indent=2))
+    else:
+        for result in results:
+            print(format_report(result, top=args.top))
+            print("=" * 60)
+
+    if violations:
+        print("❌ Startup budget exceeded:")
+        for violation in violations:
+            print(f"   • {violation}")
+        return 1
+    print("✅ Startup within budget" if (args.budget_ms or args.blueprint_budget_ms or forbid) else "✅ Profile complete")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
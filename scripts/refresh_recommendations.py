@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Bulk Recommendation Refresh
+Refreshes stored AI recommendations for every learner; meant to run nightly.
+
+    python scripts/refresh_recommendations.py --concurrency 4
+    python scripts/refresh_recommendations.py --no-llm        # fallback recommendations only
+    python scripts/refresh_recommendations.py --restart       # ignore an interrupted run's checkpoint
+
+An interrupted run resumes from its checkpoint
+(data/state/recommendation_refresh.json) unless --restart is given.
+"""
+
+import os
+import sys
+import argparse
+from typing import List, Optional
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from backend.app.services.recommendation_batch import refresh_all_recommendations
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Refresh AI recommendations for all learners")
+    parser.add_argument("--concurrency", type=int, default=4, help="LLM calls in flight (default: 4)")
+    parser.add_argument("--no-llm", action="store_true", help="only write fallback recommendations")
+    parser.add_argument("--force", action="store_true", help="regenerate users whose data did not change")
+    parser.add_argument("--restart", action="store_true", help="start over instead of resuming")
+    args = parser.parse_args(argv)
+
+    def _progress(checkpoint):
+        print(f"… {len(checkpoint['done'])}/{checkpoint.get('total', '?')} users", file=sys.stderr)
+
+    result = refresh_all_recommendations(max_concurrency=args.concurrency, use_llm=not args.no_llm,
+                                         force=args.force, resume=not args.restart, progress=_progress)
+    counts = result["counts"]
+    print(f"✅ Run {result['run_id']}: {result['total']} users, {counts['generated']} generated, "
+          f"{counts['fallback']} fallback, {counts['unchanged']} unchanged, {counts['failed']} failed "
+          f"in {result['elapsed_seconds']}s")
+    return 1 if counts["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
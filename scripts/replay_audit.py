@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Audit Log Replay
+Rebuilds every learner's skill profile from data/state/*_audit.jsonl with the
+current agent/update_math, e.g. after changing its coefficients.
+
+    python scripts/replay_audit.py --dry-run          # report what would change
+    python scripts/replay_audit.py --workers 8
+    python scripts/replay_audit.py --users u1 u2
+
+Pause event ingestion while it runs. Logs written before bootstrap snapshots
+were audited have no baseline and are reported, not rebuilt.
+"""
+
+import os
+import sys
+import argparse
+from typing import List, Optional
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from agent.replay import replay_all
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Rebuild skill profiles from the audit log")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=200, help="users per worker task (default: 200)")
+    parser.add_argument("--users", nargs="+", help="only these user ids")
+    parser.add_argument("--dry-run", action="store_true", help="report changes without writing profiles")
+    parser.add_argument("--show", type=int, default=10, help="changed users to list (default: 10)")
+    args = parser.parse_args(argv)
+
+    def _progress(done, total):
+        print(f"… {done}/{total} users", file=sys.stderr)
+
+    summary = replay_all(user_ids=args.users, workers=args.workers, chunk_size=args.chunk_size,
+                         write=not args.dry_run, progress=_progress)
+    verb = "would change" if args.dry_run else "changed"
+    print(f"✅ {summary['users']} users: {summary['changed']} {verb}, {summary['unchanged']} unchanged, "
+          f"{summary['no_baseline']} without a baseline, {summary['failed']} failed "
+          f"({summary['skills_changed']} skills, max level change {summary['max_level_delta']}) "
+          f"in {summary['elapsed_seconds']}s")
+    for result in summary["results"][:args.show]:
+        if result["status"] == "changed":
+            for skill, change in result["changes"].items():
+                old = change["old"] or {}
+                new = change["new"] or {}
+                print(f"  {result['user_id']} {skill}: level {old.get('level')} → {new.get('level')}, "
+                      f"confidence {old.get('confidence')} → {new.get('confidence')}")
+        else:
+            print(f"  {result['user_id']}: {result['status']} {result.get('error', '')}".rstrip())
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
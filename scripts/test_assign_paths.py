@@ -56,7 +56,6 @@ print(f"patched user_auth.DATA_DIR -> {ua.DATA_DIR}")
 # Patch module-level file constants so writes go to the temp data directory as well
 ua.USERS_FILE = os.path.join(tmp, 'users.json')
 ua.SESSIONS_FILE = os.path.join(tmp, 'sessions.json')
-ua.RATE_LIMIT_FILE = os.path.join(tmp, 'rate_limits.json')
 print(f"patched user_auth.USERS_FILE -> {ua.USERS_FILE}")
 
 # Helper to read temp data
@@ -0,0 +1,50 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.app.services.answer_cache import AnswerCache, normalize_question
+
+
+def test_normalize_question():
+    assert normalize_question("  What is KYC?? ") == normalize_question("what is kyc")
+
+
+def test_similar_question_hits_and_dissimilar_misses():
+    cache = AnswerCache(similarity_threshold=0.9)
+    cache.put("D1", "q", [1.0, 0.0, 0.0], {"answer": "a"})
+
+    result, info = cache.lookup("D1", [0.99, 0.05, 0.0])
+    assert result == {"answer": "a"}
+    assert info["hit"] and info["matched_question"] == "q" and info["similarity"] >= 0.9
+
+    assert cache.lookup("D1", [0.0, 1.0, 0.0]) is None
+    assert cache.lookup("D2", [1.0, 0.0, 0.0]) is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 2
+
+
+def test_entries_expire_after_ttl():
+    cache = AnswerCache(ttl_seconds=0)
+    cache.put("D1", "q", [1.0, 0.0], {"answer": "a"})
+    assert cache.lookup("D1", [1.0, 0.0]) is None
+
+
+def test_invalidation_drops_entries_and_stale_writes():
+    cache = AnswerCache()
+    generation = cache.generation("D1")
+    cache.put("D1", "q", [1.0, 0.0], {"answer": "a"}, generation=generation)
+    cache.invalidate("D1")
+    assert cache.lookup("D1", [1.0, 0.0]) is None
+
+    # An answer computed before the ingest must not repopulate the cache
+    assert cache.put("D1", "q", [1.0, 0.0], {"answer": "old"}, generation=generation) is False
+    assert cache.put("D1", "q", [1.0, 0.0], {"answer": "new"}, generation=cache.generation("D1"))
+    assert cache.lookup("D1", [1.0, 0.0])[0] == {"answer": "new"}
+
+
+def test_oldest_entry_is_dropped_over_capacity():
+    cache = AnswerCache(max_entries_per_department=2)
+    for i, vector in enumerate([[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0]]):
+        cache.put("D1", f"q{i}", vector, {"answer": i})
+    assert cache.lookup("D1", [1.0, 0.0, 0.0]) is None
+    assert cache.stats()["entries"] == 2
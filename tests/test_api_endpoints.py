@@ -27,4 +27,16 @@ def test_onboarding_departments(client: FlaskClient):
     assert resp.json.get('success') is True
     assert isinstance(resp.json.get('data'), list)
 
+def test_conversation_health_does_not_load_services(client: FlaskClient, monkeypatch):
+    from agent import llm_gateway
+    from backend.app.services.registry import services
+
+    monkeypatch.setattr(services, "instances", {})
+    monkeypatch.setattr(services, "get", lambda name: pytest.fail(f"health check built {name}"))
+    monkeypatch.setattr(llm_gateway, "_gateway", None)
+    resp = client.get('/api/conversation/health')
+    assert resp.status_code == 200
+    assert resp.json['vector_stores'] == resp.json['answer_cache'] == resp.json['llm'] == 'not loaded'
+    assert llm_gateway.peek_gateway() is None
+
 # Add more tests for each endpoint as needed
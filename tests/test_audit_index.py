@@ -0,0 +1,87 @@
+import os
+import sys
+import json
+import hashlib
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from agent import persistence
+from agent.orchestrator import Supervisor
+
+
+@pytest.fixture
+def state_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(persistence, "STATE_DIR", str(tmp_path))
+    persistence._audit_indexes.clear()
+    return tmp_path
+
+
+def _audit(user_id, key, event_type="module_completed", deltas=None):
+    return persistence.append_audit(user_id, {"event_type": event_type, "payload": {
+        "payload": {"module_id": "m1"}, "deltas": deltas, "idempotency_key": key}})
+
+
+def test_find_audit_reads_indexed_entries(state_dir, monkeypatch):
+    for i in range(50):
+        _audit("u1", f"k{i}", deltas=[{"skill": f"s{i}"}])
+    persistence.append_audit("u1", {"event": "no key here"})
+    _audit("u1", "k7", deltas=[{"skill": "replayed"}])
+
+    monkeypatch.setattr(persistence, "load_audit", lambda user_id: pytest.fail("full log was parsed"))
+    found = list(persistence.find_audit("u1", "k7", "module_completed"))
+    assert [e["payload"]["deltas"][0]["skill"] for e in found] == ["s7", "replayed"]
+    assert list(persistence.find_audit("u1", "k7", "user_created")) == []
+    assert list(persistence.find_audit("u1", "missing")) == []
+
+
+def test_index_is_built_for_a_log_that_predates_it(state_dir):
+    with open(state_dir / "u1_audit.jsonl", "w", encoding="utf-8") as f:
+        for key in ("a", "b"):
+            f.write(json.dumps({"ts": "t", "event_type": "module_completed",
+                                "payload": {"idempotency_key": key, "deltas": [key]}}) + "\n")
+
+    assert [e["payload"]["deltas"] for e in persistence.find_audit("u1", "b")] == [["b"]]
+    _audit("u1", "c", deltas=["c"])
+    assert [e["payload"]["deltas"] for e in persistence.find_audit("u1", "c")] == [["c"]]
+
+
+def test_stale_index_falls_back_to_a_scan(state_dir):
+    _audit("u1", "a", deltas=["a"])
+    _audit("u1", "b", deltas=["b"])
+    # Rewrite the log under the index (e.g. restored from a backup)
+    with open(state_dir / "u1_audit.jsonl", "w", encoding="utf-8") as f:
+        f.write(json.dumps({"ts": "t", "event_type": "module_completed",
+                            "payload": {"idempotency_key": "b", "deltas": ["b"]}}) + "\n")
+    assert [e["payload"]["deltas"] for e in persistence.find_audit("u1", "b")] == [["b"]]
+
+
+def test_idempotency_store_is_bounded(state_dir, monkeypatch):
+    monkeypatch.setattr(persistence, "IDEMPOTENCY_MAX_KEYS", 3)
+    for i in range(5):
+        persistence.save_idempotency("u1", f"k{i}", "hash", {"n": i})
+    assert persistence.load_idempotency("u1", "k0") is None
+    assert persistence.load_idempotency("u1", "k4")["result"] == {"n": 4}
+    assert persistence.idempotency_keys("u1") == ["k2", "k3", "k4"]
+
+    monkeypatch.setattr(persistence, "IDEMPOTENCY_TTL_SECONDS", -1)
+    assert persistence.load_idempotency("u1", "k4") is None
+
+
+def test_module_replay_uses_indexed_deltas(state_dir, monkeypatch):
+    event = {"type": "module_completed", "user_id": "u1", "skill": "Python", "module_id": "m1",
+             "target_level": 4, "completion_type": "passed", "idempotency_key": "mod-1"}
+    unkeyed = {k: v for k, v in event.items() if k != "idempotency_key"}
+    payload_hash = hashlib.sha256(json.dumps(unkeyed, sort_keys=True).encode("utf-8")).hexdigest()
+    persistence.save_idempotency("u1", "mod-1", payload_hash, {"profile": "cached"})
+    for i in range(20):
+        _audit("u1", f"other-{i}", deltas=[])
+    _audit("u1", "mod-1", deltas=[{"skill": "Python", "delta_level": 0.5}])
+
+    monkeypatch.setattr(persistence, "load_audit", lambda user_id: pytest.fail("full log was parsed"))
+    assert Supervisor().handle_event(dict(event)) == {"profile": "cached"}
+
+    replays = list(persistence.find_audit("u1", "mod-1"))
+    # The pre-routing audit of this call, then the replay entry carrying the original deltas
+    assert replays[-1]["payload"]["deltas"] == [{"skill": "Python", "delta_level": 0.5}]
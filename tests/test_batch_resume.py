@@ -0,0 +1,105 @@
+import os
+import sys
+import json
+import zipfile
+
+import pytest
+from flask import Flask
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from agent.batch_resume import analyze_source, extract_archive
+from backend.app.routes import onboarding
+from backend.app.routes.onboarding import onboarding_bp
+
+ROLE_SKILLS = ["Python", "SQL", "Docker"]
+
+
+@pytest.fixture
+def resume_dir(tmp_path):
+    folder = tmp_path / "resumes"
+    folder.mkdir()
+    (folder / "a_senior.txt").write_text("Senior engineer. 6 years of Python and SQL. Built Docker pipelines.")
+    (folder / "b_junior.txt").write_text("Basic Python, learning SQL.")
+    (folder / "c_empty.txt").write_text("   ")
+    (folder / "notes.md").write_text("not a resume")
+    return folder
+
+
+def _results(records):
+    return [r for r in records if r["type"] == "result"]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_directory_batch_is_ordered_and_reports_failures(resume_dir, workers):
+    records = list(analyze_source(str(resume_dir), ROLE_SKILLS, workers=workers))
+    results, summary = _results(records), records[-1]
+
+    assert [r["file"] for r in results] == ["a_senior.txt", "b_junior.txt", "c_empty.txt"]
+    assert [r["index"] for r in results] == [0, 1, 2]
+    assert [r["status"] for r in results] == ["ok", "ok", "error"]
+    assert results[0]["skills"]["Python"]["years_experience"] == 6
+    assert results[1]["skills"]["Docker"]["evidence"] == "Skill not mentioned in resume"
+    assert summary == {**summary, "type": "summary", "total": 3, "succeeded": 2, "failed": 1}
+
+
+def test_zip_archive_and_unordered_results(resume_dir, tmp_path):
+    archive = tmp_path / "drive.zip"
+    with zipfile.ZipFile(archive, "w") as zf:
+        for name in os.listdir(resume_dir):
+            zf.write(resume_dir / name, f"campus/{name}")
+
+    records = list(analyze_source(str(archive), ROLE_SKILLS, workers=2, ordered=False))
+    results = _results(records)
+    assert sorted(r["index"] for r in results) == [0, 1, 2]
+    assert {r["file"] for r in results} == {"campus/a_senior.txt", "campus/b_junior.txt", "campus/c_empty.txt"}
+
+
+def test_archive_members_cannot_escape(tmp_path):
+    archive = tmp_path / "evil.zip"
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("../escape.txt", "x")
+    with pytest.raises(ValueError):
+        extract_archive(str(archive), str(tmp_path / "out"))
+    assert not (tmp_path / "escape.txt").exists()
+
+
+def _client():
+    app = Flask(__name__)
+    app.register_blueprint(onboarding_bp, url_prefix="/api/onboarding")
+    return app.test_client()
+
+
+def test_batch_endpoint_streams_jsonl(resume_dir, monkeypatch):
+    monkeypatch.setattr(onboarding, "BATCH_RESUME_ROOT", str(resume_dir.parent))
+    resp = _client().post("/api/onboarding/batch-analyze", json={
+        "source": "resumes", "role_skills": ROLE_SKILLS, "workers": 1
+    })
+
+    assert resp.status_code == 200
+    assert resp.mimetype == "application/x-ndjson"
+    lines = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+    assert [l["type"] for l in lines] == ["result", "result", "result", "summary"]
+    assert lines[-1]["failed"] == 1
+
+
+def test_batch_endpoint_only_reads_under_the_resume_root(resume_dir, tmp_path, monkeypatch):
+    root = tmp_path / "root"
+    root.mkdir()
+    monkeypatch.setattr(onboarding, "BATCH_RESUME_ROOT", str(root))
+    for source in (str(resume_dir), "../resumes", "/etc/passwd"):
+        resp = _client().post("/api/onboarding/batch-analyze", json={"source": source, "role_skills": ROLE_SKILLS})
+        assert resp.status_code == 400
+
+
+def test_batch_endpoint_caps_archive_members(resume_dir, tmp_path, monkeypatch):
+    archive = resume_dir / "many.zip"
+    with zipfile.ZipFile(archive, "w") as zf:
+        for i in range(5):
+            zf.writestr(f"r{i}.txt", "Python")
+    monkeypatch.setattr(onboarding, "BATCH_RESUME_ROOT", str(resume_dir))
+    monkeypatch.setattr(onboarding, "BATCH_MAX_FILES", 3)
+    resp = _client().post("/api/onboarding/batch-analyze", json={"source": "many.zip", "role_skills": ROLE_SKILLS})
+    assert resp.status_code == 413
+    with pytest.raises(ValueError):
+        extract_archive(str(archive), str(tmp_path / "out"), max_members=3)
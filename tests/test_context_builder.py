@@ -0,0 +1,36 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.app.services.context_builder import ContextBuilder, MinHasher, estimate_tokens
+
+POLICY = "New joiners must finish compliance training within two weeks and record it in the learning portal."
+POLICY_COPY = "New joiners must finish compliance training within two weeks and record it in the learning portal!"
+CAFETERIA = "The cafeteria on the second floor serves breakfast from eight until ten every weekday morning."
+
+
+def test_token_estimate_is_close_to_word_count():
+    assert estimate_tokens("") == 0
+    assert 15 <= estimate_tokens(POLICY) <= 25
+
+
+def test_minhash_separates_duplicates_from_distinct_text():
+    hasher = MinHasher()
+    assert hasher.similarity(hasher.signature(POLICY), hasher.signature(POLICY_COPY)) == 1.0
+    assert hasher.similarity(hasher.signature(POLICY), hasher.signature(CAFETERIA)) < 0.2
+
+
+def test_duplicates_removed_and_best_ranked_copy_kept():
+    result = ContextBuilder().build([POLICY_COPY, CAFETERIA, POLICY], scores=[0.1, 0.5, 0.9])
+    assert result["chunks"] == [POLICY, CAFETERIA]
+    assert result["duplicates"] == 1 and result["dropped"] == 0
+    assert result["context"] == POLICY + "\n\n" + CAFETERIA
+
+
+def test_packing_respects_budget_in_rank_order():
+    budget = estimate_tokens(POLICY) + 2
+    result = ContextBuilder(token_budget=budget).build([CAFETERIA, POLICY], scores=[0.2, 0.8])
+    assert result["context"] == POLICY
+    assert result["tokens"] <= budget
+    assert result["dropped"] == 1
@@ -0,0 +1,169 @@
+import os
+import sys
+import json
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+pytest.importorskip("faiss")
+pytest.importorskip("langchain_google_genai")
+pytest.importorskip("langchain_groq")
+
+from backend.app.services.document_processor import DocumentProcessor
+from backend.app.services.embedding_providers import get_embedding_config, build_embedding_service
+
+
+class FakeLLM:
+    """Answers the agent's summary and answer prompts without a network call and records them."""
+
+    def __init__(self):
+        self.prompts = []
+
+    def invoke(self, prompt):
+        self.prompts.append(prompt)
+        if "summarization expert" in prompt:
+            return SimpleNamespace(content="summary")
+        return SimpleNamespace(content="answer")
+
+    def stream(self, prompt):
+        self.prompts.append(prompt)
+        for token in ["ans", "w", "er"]:
+            yield SimpleNamespace(content=token)
+
+    def count(self, marker):
+        return sum(marker in p for p in self.prompts)
+
+
+@pytest.fixture
+def processor(tmp_path, monkeypatch):
+    monkeypatch.setenv("EMBEDDING_PROVIDER", "hashing")
+    processor = DocumentProcessor()
+    processor.base_path = tmp_path
+    processor.embedding_config = get_embedding_config()
+    processor.embeddings = build_embedding_service(tmp_path / "embedding_cache", processor.embedding_config)
+    processor.extract_key_concepts = lambda text: ["Compliance", "Training"]
+
+    doc = tmp_path / "handbook.txt"
+    doc.write_text("\n\n".join([
+        "Compliance training must be completed by every new joiner within the first two weeks of starting.",
+        "Training sessions on anti-money-laundering rules run every Monday morning for the whole department.",
+        "The cafeteria on the second floor serves breakfast from eight until ten in the morning."
+    ]))
+    assert processor.process_document(str(doc), "DEPT1", metadata={"filename": "handbook.txt"})["success"]
+    return processor
+
+
+@pytest.fixture
+def agent(processor, monkeypatch):
+    monkeypatch.setenv("GROQ_API_KEY", os.getenv("GROQ_API_KEY", "test-key"))
+    from backend.app.services import conversation_agent as module
+
+    monkeypatch.setattr(module, "document_processor", processor)
+    return module.ConversationAgent(llm=FakeLLM(), embeddings=processor.embeddings)
+
+
+def test_hybrid_search_finds_exact_terms_with_one_embedding(agent, processor, tmp_path):
+    doc = tmp_path / "policy.txt"
+    doc.write_text("Expense claims above the limit need approval under policy FIN-7731 from the finance controller.")
+    assert processor.process_document(str(doc), "DEPT1", metadata={"filename": "policy.txt"})["success"]
+
+    before = processor.embeddings.stats()
+    chunks = agent.get_relevant_chunks("Which rule is FIN-7731?", "DEPT1")
+    after = processor.embeddings.stats()
+
+    assert "FIN-7731" in chunks[0]
+    assert (after["hits"] + after["misses"]) - (before["hits"] + before["misses"]) == 1
+
+
+def test_small_context_skips_summarization(agent):
+    result = agent.process_question("When is compliance training due?", "DEPT1", "Test")
+
+    assert result["answer"] == "answer"
+    assert result["chunks_found"] > 0
+    assert result["summarized"] is False
+    assert agent.llm.count("summarization expert") == 0
+    assert set(result["timings"]) == {"retrieval_ms", "context_ms", "answer_ms", "total_ms"}
+
+
+def test_large_context_is_summarized(agent):
+    agent.context_builder.token_budget = 10
+    result = agent.process_question("When is compliance training due?", "DEPT1", "Test")
+
+    assert result["summarized"] is True
+    assert result["context_summary"] == "summary"
+    assert agent.llm.count("summarization expert") == 1
+
+
+def test_repeated_question_is_served_from_answer_cache(agent, processor, tmp_path):
+    first = agent.process_question("When is compliance training due?", "DEPT1", "Test")
+    assert first["cache"] == {"hit": False}
+    calls = len(agent.llm.prompts)
+
+    second = agent.process_question("when is Compliance training due", "DEPT1", "Test")
+    assert second["cache"]["hit"] is True
+    assert second["answer"] == first["answer"]
+    assert len(agent.llm.prompts) == calls
+
+    # Ingesting into the department invalidates its cached answers
+    doc = tmp_path / "update.txt"
+    doc.write_text("Compliance training deadlines were extended to three weeks for all new joiners this year.")
+    assert processor.process_document(str(doc), "DEPT1", metadata={"filename": "update.txt"})["success"]
+
+    third = agent.process_question("When is compliance training due?", "DEPT1", "Test")
+    assert third["cache"] == {"hit": False}
+    assert len(agent.llm.prompts) > calls
+
+
+def test_failed_answer_is_not_cached(agent, monkeypatch):
+    invoke = agent.llm.invoke
+
+    def flaky(prompt):
+        if "Onboarding Mentor" in prompt:
+            raise RuntimeError("provider timeout")
+        return invoke(prompt)
+
+    monkeypatch.setattr(agent.llm, "invoke", flaky)
+    failed = agent.process_question("When is compliance training due?", "DEPT1", "Test")
+    assert failed["error"] == "provider timeout"
+
+    monkeypatch.setattr(agent.llm, "invoke", invoke)
+    retried = agent.process_question("When is compliance training due?", "DEPT1", "Test")
+    assert retried["cache"] == {"hit": False}
+    assert retried["answer"] == "answer"
+
+
+def parse_sse(body):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_ask_streams_metadata_then_tokens(agent, monkeypatch):
+    from flask import Flask
+    from backend.app.routes import conversation as routes
+
+    monkeypatch.setattr(routes, "conversation_agent", agent)
+    monkeypatch.setattr(routes, "get_user_department", lambda user_id: {"name": "Test", "id": "DEPT1", "found": True})
+    app = Flask(__name__)
+    app.register_blueprint(routes.conversation_bp, url_prefix="/api/conversation")
+    client = app.test_client()
+
+    response = client.post("/api/conversation/ask", json={
+        "question": "When is compliance training due?", "user_id": "u1", "stream": True
+    })
+    assert response.mimetype == "text/event-stream"
+    events = parse_sse(response.get_data(as_text=True))
+
+    assert events[0][0] == "metadata"
+    assert events[0][1]["chunks_found"] > 0 and events[0][1]["department_id"] == "DEPT1"
+    assert [data["text"] for event, data in events if event == "token"] == ["ans", "w", "er"]
+    assert events[-1][0] == "done" and "first_token_ms" in events[-1][1]["timings"]
+
+    # The streamed answer is cached for the blocking endpoint too
+    cached = client.post("/api/conversation/ask", json={"question": "When is compliance training due?", "user_id": "u1"})
+    assert cached.get_json()["cache"]["hit"] is True
+    assert cached.get_json()["answer"] == "answer"
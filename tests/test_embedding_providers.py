@@ -0,0 +1,53 @@
+import os
+import sys
+import math
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.app.services.embedding_providers import (
+    HashingEmbeddings, SentenceTransformerEmbeddings, get_embedding_config, create_embedding_provider
+)
+
+
+def _cosine(a, b):
+    return sum(x * y for x, y in zip(a, b))
+
+
+def test_hashing_embeddings_are_deterministic_and_normalised():
+    embeddings = HashingEmbeddings(dim=64)
+    first = embeddings.embed_query("KYC document verification policy")
+    assert first == HashingEmbeddings(dim=64).embed_documents(["KYC document verification policy"])[0]
+    assert len(first) == 64
+    assert math.isclose(sum(v * v for v in first), 1.0)
+
+
+def test_hashing_embeddings_rank_overlapping_text_higher():
+    embeddings = HashingEmbeddings()
+    query = embeddings.embed_query("customer identity verification")
+    related = embeddings.embed_query("verification of customer identity documents")
+    unrelated = embeddings.embed_query("quarterly marketing budget")
+    assert _cosine(query, related) > _cosine(query, unrelated)
+
+
+def test_default_config_keeps_existing_store_paths(monkeypatch):
+    for var in ("EMBEDDING_PROVIDER", "EMBEDDING_MODEL", "EMBEDDING_BATCH_SIZE"):
+        monkeypatch.delenv(var, raising=False)
+    config = get_embedding_config()
+    assert config["provider"] == "google"
+    assert config["store_suffix"] == ""
+
+
+def test_offline_providers_from_environment(monkeypatch):
+    monkeypatch.setenv("EMBEDDING_PROVIDER", "hashing")
+    monkeypatch.setenv("EMBEDDING_DIM", "128")
+    config = get_embedding_config()
+    assert config["namespace"] == "hashing-hashing-128"
+    assert config["store_suffix"] == "_hashing-hashing-128"
+    assert isinstance(create_embedding_provider(config), HashingEmbeddings)
+
+    monkeypatch.setenv("EMBEDDING_PROVIDER", "local")
+    monkeypatch.setenv("EMBEDDING_BATCH_SIZE", "8")
+    provider = create_embedding_provider()
+    # The model itself is only loaded on first use
+    assert isinstance(provider, SentenceTransformerEmbeddings)
+    assert provider.batch_size == 8 and provider._model is None
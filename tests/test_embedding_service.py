@@ -0,0 +1,88 @@
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+pytest.importorskip("numpy")
+
+from langchain_core.embeddings import Embeddings
+from backend.app.services.embedding_service import EmbeddingService
+
+
+class CountingEmbeddings(Embeddings):
+    def __init__(self):
+        self.batches = []
+        self.queries = []
+
+    def embed_documents(self, texts):
+        self.batches.append(list(texts))
+        return [[float(len(t)), float(sum(map(ord, t)) % 97), 1.0] for t in texts]
+
+    def embed_query(self, text):
+        self.queries.append(text)
+        return [float(len(text)), 0.0, 0.0]
+
+
+def test_misses_are_deduplicated_and_batched(tmp_path):
+    backend = CountingEmbeddings()
+    service = EmbeddingService(backend, cache_dir=tmp_path / "cache", batch_size=2)
+
+    vectors = service.embed_documents(["a", "bb", "a", "ccc", "dddd"])
+    assert backend.batches == [["a", "bb"], ["ccc", "dddd"]]
+    assert vectors[0] == vectors[2]
+    assert service.stats()["misses"] == 5
+
+    service.embed_documents(["bb", "ccc"])
+    assert len(backend.batches) == 2
+    assert service.stats()["hits"] == 2
+
+
+def test_cache_survives_restart(tmp_path):
+    first = EmbeddingService(CountingEmbeddings(), cache_dir=tmp_path / "cache")
+    expected = first.embed_documents(["Initial document for department knowledge base"])
+    first.embed_query("what is kyc?")
+
+    backend = CountingEmbeddings()
+    second = EmbeddingService(backend, cache_dir=tmp_path / "cache")
+    assert second.embed_documents(["Initial document for department knowledge base"]) == expected
+    second.embed_query("what is kyc?")
+    assert backend.batches == [] and backend.queries == []
+
+
+def test_cache_grows_past_initial_capacity(tmp_path):
+    texts = [f"chunk {i}" for i in range(3000)]
+    service = EmbeddingService(CountingEmbeddings(), cache_dir=tmp_path / "cache")
+    expected = service.embed_documents(texts)
+
+    reopened = EmbeddingService(CountingEmbeddings(), cache_dir=tmp_path / "cache")
+    assert reopened.embed_documents(texts) == expected
+    assert reopened.stats()["cached_vectors"] == 3000
+
+
+def test_torn_key_line_is_ignored(tmp_path):
+    cache_dir = tmp_path / "cache"
+    EmbeddingService(CountingEmbeddings(), cache_dir=cache_dir).embed_documents(["a"])
+    with open(cache_dir / "keys.txt", "a") as f:
+        f.write("deadbeef")
+
+    backend = CountingEmbeddings()
+    service = EmbeddingService(backend, cache_dir=cache_dir)
+    service.embed_documents(["a", "b"])
+    assert backend.batches == [["b"]]
+    reopened = EmbeddingService(CountingEmbeddings(), cache_dir=cache_dir)
+    assert reopened.embed_documents(["b"]) == service.embed_documents(["b"])
+    assert reopened.stats()["cached_vectors"] == 2
+
+
+def test_writers_sharing_a_directory_do_not_overwrite_rows(tmp_path):
+    cache_dir = tmp_path / "cache"
+    first = EmbeddingService(CountingEmbeddings(), cache_dir=cache_dir)
+    second = EmbeddingService(CountingEmbeddings(), cache_dir=cache_dir)
+    a = first.embed_documents(["a", "bb"])
+    c = second.embed_documents(["ccc"])
+    d = first.embed_documents(["dddd"])
+
+    reopened = EmbeddingService(CountingEmbeddings(), cache_dir=cache_dir)
+    assert reopened.embed_documents(["a", "bb", "ccc", "dddd"]) == a + c + d
+    assert reopened.stats()["cached_vectors"] == 4
@@ -0,0 +1,146 @@
+import os
+import sys
+import json
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from agent import persistence, focus
+from agent.orchestrator import Supervisor
+
+
+@pytest.fixture
+def state_dir(tmp_path, monkeypatch):
+    state, jd_dir, modules_dir = tmp_path / "state", tmp_path / "jd", tmp_path / "modules"
+    for d in (state, jd_dir, modules_dir):
+        d.mkdir()
+    monkeypatch.setattr(persistence, "STATE_DIR", str(state))
+    monkeypatch.setattr(persistence, "JD_DIR", str(jd_dir))
+    monkeypatch.setattr(persistence, "MODULES_DIR", str(modules_dir))
+    monkeypatch.setattr(focus, "MODULES_DIR", str(modules_dir))
+    persistence._audit_indexes.clear()
+    (jd_dir / "de.json").write_text(json.dumps({"role_id": "de", "skills": {
+        "Python": {"required_level": 4, "importance": 3}, "SQL": {"required_level": 3, "importance": 2}}}))
+    for module_id, skill in (("m_py", "Python"), ("m_sql", "SQL")):
+        (modules_dir / f"{module_id}.json").write_text(json.dumps({"module_id": module_id, "skills_covered": [
+            {"skill": skill, "weight": 0.8, "target_level": 4}]}))
+    return state
+
+
+def _seed(users):
+    for user_id in users:
+        persistence.save_user_profile(user_id, {"user_id": user_id, "role_id": "de", "skills": {
+            "Python": {"level": 1.5, "confidence": 0.4}, "SQL": {"level": 2.0, "confidence": 0.5}}})
+
+
+def _events():
+    events = []
+    for i in range(3):
+        for user_id in ("u1", "u2"):
+            events.append({"type": "module_completed", "user_id": user_id, "module_id": "m_py" if i % 2 else "m_sql",
+                           "skill": "Python", "target_level": 4, "completion_type": "passed",
+                           "idempotency_key": f"{user_id}-{i}"})
+    events.append(dict(events[0]))  # replayed within the batch
+    events.append({"type": "module_completed", "user_id": "u1", "module_id": "missing", "skill": "Python",
+                   "target_level": 4, "completion_type": "passed"})
+    events.append({"type": "module_completed", "user_id": "u2"})
+    return events
+
+
+def _state(state_dir):
+    out = {}
+    for path in sorted(state_dir.glob("*_audit.jsonl")):
+        user_id = path.name[:-len("_audit.jsonl")]
+        out[user_id] = {
+            "audit": [{k: v for k, v in json.loads(line).items() if k != "ts"} for line in path.read_text().splitlines()],
+            "profile": persistence.load_user_profile(user_id),
+            "focus": persistence.load_focus(user_id),
+            "idempotency": {k: persistence.load_idempotency(user_id, k)["result"]
+                            for k in persistence.idempotency_keys(user_id)},
+        }
+    return out
+
+
+def _strip_received_at(state):
+    for user_state in state.values():
+        for record in user_state["audit"]:
+            record["payload"].pop("received_at", None)
+    return state
+
+
+def test_batch_matches_sequential_handling(state_dir, tmp_path, monkeypatch):
+    _seed(["u1", "u2"])
+    sequential = [Supervisor().handle_event(dict(e)) for e in _events()]
+    expected = _strip_received_at(_state(state_dir))
+
+    state_dir = tmp_path / "state2"
+    monkeypatch.setattr(persistence, "STATE_DIR", str(state_dir))
+    persistence._audit_indexes.clear()
+    _seed(["u1", "u2"])
+    batched = Supervisor().handle_events([dict(e) for e in _events()])
+
+    assert batched == sequential
+    assert _strip_received_at(_state(state_dir)) == expected
+    # The replay within the batch was answered from the buffered idempotency result
+    assert batched[6] == batched[0]
+    assert [r["error"]["code"] for r in batched[7:]] == ["NOT_FOUND", "MISSING_FIELD"]
+
+
+def test_each_user_is_written_once(state_dir, monkeypatch):
+    _seed(["u1", "u2"])
+    calls = []
+    for name in ("save_user_profile", "upsert_focus", "append_audits", "save_idempotency_many"):
+        original = getattr(persistence, name)
+        monkeypatch.setattr(persistence, name,
+                            lambda user_id, *args, _name=name, _original=original:
+                            (calls.append((_name, user_id)), _original(user_id, *args))[1])
+    monkeypatch.setattr(persistence, "append_audit", lambda *args: pytest.fail("unbuffered audit write"))
+
+    results = Supervisor().handle_events(_events()[:6])
+    assert all("profile" in r for r in results)
+    assert sorted(calls) == sorted((name, user_id) for user_id in ("u1", "u2") for name in
+                                   ("save_user_profile", "upsert_focus", "append_audits", "save_idempotency_many"))
+
+
+def test_concurrent_events_for_one_user_do_not_lose_updates(state_dir, monkeypatch):
+    import threading
+    import time
+
+    _seed(["u1"])
+    load = persistence.load_user_profile
+    monkeypatch.setattr(persistence, "load_user_profile", lambda user_id: (time.sleep(0.05), load(user_id))[1])
+    events = [{"type": "module_completed", "user_id": "u1", "module_id": module_id, "skill": "x",
+               "target_level": 4, "completion_type": "passed", "idempotency_key": module_id}
+              for module_id in ("m_py", "m_sql")]
+    threads = [threading.Thread(target=Supervisor().handle_event, args=(e,)) for e in events]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    skills = persistence.load_user_profile("u1")["skills"]
+    assert skills["Python"]["level"] > 1.5 and skills["SQL"]["level"] > 2.0
+    assert sorted(persistence.idempotency_keys("u1")) == ["m_py", "m_sql"]
+
+
+def test_resume_analysis_runs_outside_the_transaction(state_dir, monkeypatch):
+    from agent import bootstrap
+
+    depths = []
+    analyze = bootstrap.analyze_resume
+
+    def analyze_resume(*args):
+        depths.append(getattr(persistence.state_store()._local, "depth", 0))
+        return analyze(*args)
+
+    monkeypatch.setattr(bootstrap, "analyze_resume", analyze_resume)
+    event = {"type": "user_created", "user_id": "u1", "role_id": "de", "resume_text": "Python and SQL",
+             "idempotency_key": "signup"}
+    result = Supervisor().handle_event(dict(event))
+    assert Supervisor().handle_event(dict(event)) == result
+    assert depths == [0]
+    assert persistence.load_user_profile("u1") == result["profile"]
+    assert persistence.load_focus("u1") == {"focus": result["focus"]}
+    audit = [json.loads(line)["event_type"] for line in (state_dir / "u1_audit.jsonl").read_text().splitlines()]
+    assert audit == ["user_created", "resume_bootstrap", "user_created"]
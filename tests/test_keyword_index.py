@@ -0,0 +1,53 @@
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.app.services.keyword_index import KeywordIndex, tokenize, reciprocal_rank_fusion
+
+
+def fake_store(texts):
+    return SimpleNamespace(docstore=SimpleNamespace(_dict={
+        doc_id: SimpleNamespace(page_content=text) for doc_id, text in texts.items()
+    }))
+
+
+STORE = fake_store({
+    "a": "Expense approvals follow policy FIN-7731 for all claims.",
+    "b": "Onboarding includes compliance training and expense tooling.",
+    "c": "The cafeteria serves breakfast every morning.",
+})
+
+
+def test_tokenize_keeps_codes_whole_and_split():
+    terms = tokenize("What is policy FIN-7731?")
+    assert "fin-7731" in terms and "fin" in terms and "7731" in terms
+    assert "what" not in terms and "is" not in terms
+
+
+def test_bm25_ranks_exact_term_matches_first():
+    index = KeywordIndex.build(STORE)
+    assert index.search("FIN-7731")[0][0] == "a"
+    assert {doc_id for doc_id, _ in index.search("expense")} == {"a", "b"}
+    assert index.search("breakfast", k=1) == index.search("breakfast")[:1]
+    assert index.search("unknownterm") == []
+
+
+def test_save_load_and_rebuild_on_mismatch(tmp_path):
+    index = KeywordIndex.build(STORE)
+    index.save(tmp_path)
+    loaded = KeywordIndex.load_or_build(tmp_path, STORE)
+    assert loaded.search("cafeteria") == index.search("cafeteria")
+
+    grown = fake_store({**{k: v.page_content for k, v in STORE.docstore._dict.items()},
+                        "d": "Cafeteria menus change weekly."})
+    rebuilt = KeywordIndex.load_or_build(tmp_path, grown)
+    assert len(rebuilt) == 4
+    assert len(KeywordIndex.load(tmp_path)) == 4
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion([["x", "y", "z"], ["y", "w"]])
+    assert fused[0][0] == "y"
+    assert {doc_id for doc_id, _ in fused} == {"x", "y", "z", "w"}
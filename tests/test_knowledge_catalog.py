@@ -0,0 +1,75 @@
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+pytest.importorskip("faiss")
+pytest.importorskip("langchain_google_genai")
+
+from backend.app.services.document_processor import DocumentProcessor
+from backend.app.services.embedding_providers import get_embedding_config, build_embedding_service
+
+
+@pytest.fixture
+def processor(tmp_path, monkeypatch):
+    monkeypatch.setenv("EMBEDDING_PROVIDER", "hashing")
+    processor = DocumentProcessor()
+    processor.base_path = tmp_path
+    processor.embedding_config = get_embedding_config()
+    processor.embeddings = build_embedding_service(tmp_path / "embedding_cache", processor.embedding_config)
+    processor.extract_key_concepts = lambda text: ["Onboarding", "Compliance"]
+    return processor
+
+
+def _write_doc(tmp_path, name, paragraphs):
+    path = tmp_path / name
+    path.write_text("\n\n".join(paragraphs))
+    return str(path)
+
+
+def test_stats_come_from_ingest_catalog(processor, tmp_path):
+    doc = _write_doc(tmp_path, "guide.txt", [
+        "Onboarding starts with Compliance training for every new joiner.",
+        "Onboarding also covers tooling access and team introductions."
+    ])
+    result = processor.process_document(doc, "TEST001", metadata={"filename": "guide.txt"})
+    assert result["success"]
+
+    # Stats must not touch the ANN index at all
+    processor.vector_stores["TEST001"].similarity_search = None
+    stats = processor.get_department_stats("TEST001")
+
+    assert stats["chunks"] == result["chunks"]
+    assert stats["nodes"] == result["nodes"]
+    assert stats["relationships"] == result["relationships"]
+    assert stats["concepts"] == ["Compliance", "Onboarding"]
+    assert stats["files"]["guide.txt"]["chunks"] == result["chunks"]
+    # placeholder system document + everything ingested
+    assert stats["total_documents"] == result["documents_created"] + 1
+
+
+def test_catalog_is_backfilled_and_repaired(processor, tmp_path):
+    doc = _write_doc(tmp_path, "policy.txt", ["Compliance policy for Onboarding reviews."])
+    processor.process_document(doc, "TEST002", metadata={"filename": "policy.txt"})
+    store_path = processor.get_vector_store_path("TEST002")
+    expected = processor.get_department_stats("TEST002")
+
+    # A store from before the catalog existed gets one backfill pass
+    (store_path / "catalog.json").unlink()
+    processor.vector_stores.clear()
+    assert processor.get_department_stats("TEST002")["total_documents"] == expected["total_documents"]
+
+    # A stale catalog (crash between segment commit and catalog write) is rebuilt on load
+    catalog = processor.catalog.load(store_path)
+    catalog["total_documents"] = 1
+    processor.catalog._save(store_path, catalog)
+    processor.vector_stores.clear()
+    processor.get_vector_store("TEST002")
+    assert processor.get_department_stats("TEST002")["total_documents"] == expected["total_documents"]
+
+
+def test_unknown_department_has_empty_stats(processor):
+    stats = processor.get_department_stats("NOPE")
+    assert stats["total_documents"] == 0
+    assert "NOPE" not in processor.vector_stores
@@ -0,0 +1,146 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from agent.llm_cache import PromptCache, cache_key
+from agent.llm_gateway import LLMGateway, MockProvider
+
+
+def _gateway(tmp_path, provider, **cache_kwargs):
+    gateway = LLMGateway(cache=PromptCache(str(tmp_path / "cache.sqlite3"), **cache_kwargs))
+    gateway.register("mock", provider)
+    return gateway
+
+
+def test_deterministic_calls_are_served_from_cache(tmp_path):
+    provider = MockProvider("cached answer")
+    gateway = _gateway(tmp_path, provider)
+
+    first = gateway.complete("mock", "same prompt")
+    second = gateway.complete("mock", "same prompt")
+    assert not first.cached and second.cached
+    assert second.text == "cached answer" and second.completion_tokens == 2
+    assert len(provider.calls) == 1
+
+    cache = gateway.metrics()["cache"]
+    assert cache["hits"] == 1 and cache["misses"] == 1 and cache["entries"] == 1
+
+
+def test_sampled_calls_skip_cache_unless_requested(tmp_path):
+    provider = MockProvider("answer")
+    gateway = _gateway(tmp_path, provider)
+
+    gateway.complete("mock", "p", temperature=0.7)
+    gateway.complete("mock", "p", temperature=0.7)
+    assert len(provider.calls) == 2
+
+    gateway.complete("mock", "p", temperature=0.7, cache=True)
+    gateway.complete("mock", "p", temperature=0.7, cache=True)
+    assert len(provider.calls) == 3
+
+
+def test_key_covers_model_and_parameters():
+    messages = [{"role": "user", "content": "p"}]
+    base = cache_key("groq", "m1", messages, 0.0, None)
+    assert base == cache_key("groq", "m1", list(messages), 0.0, None)
+    assert base != cache_key("groq", "m2", messages, 0.0, None)
+    assert base != cache_key("groq", "m1", messages, 0.0, 100)
+    assert base != cache_key("gemini", "m1", messages, 0.0, None)
+
+
+def test_cache_is_shared_through_the_database(tmp_path):
+    _gateway(tmp_path, MockProvider("from process one")).complete("mock", "q")
+
+    provider = MockProvider("from process two")
+    response = _gateway(tmp_path, provider).complete("mock", "q")
+    assert response.text == "from process one" and provider.calls == []
+
+
+def test_expired_entries_are_missed(tmp_path):
+    cache = PromptCache(str(tmp_path / "cache.sqlite3"), ttl_seconds=0.05)
+    cache.put("k", {"text": "v"})
+    assert cache.get("k") == {"text": "v"}
+    time.sleep(0.1)
+    assert cache.get("k") is None
+
+
+def test_eviction_drops_least_recently_used(tmp_path):
+    cache = PromptCache(str(tmp_path / "cache.sqlite3"), max_bytes=300, evict_interval=1000)
+    for i in range(6):
+        cache.put(f"k{i}", {"text": "x" * 80})
+        time.sleep(0.01)
+    cache.get("k0")
+    cache.evict()
+
+    assert cache.stats()["bytes"] <= 300
+    assert cache.get("k0") is not None
+    assert cache.get("k1") is None
+
+
+def test_forget_discards_an_unusable_response(tmp_path):
+    provider = MockProvider(["not json", "{}"])
+    gateway = _gateway(tmp_path, provider)
+
+    gateway.forget(gateway.complete("mock", "give json"))
+    assert gateway.complete("mock", "give json").text == "{}"
+
+
+def test_recommendations_for_unchanged_data_hit_the_cache(tmp_path):
+    from backend.app.services.ai_recommendations import AIRecommendationsService
+
+    provider = MockProvider('{"priority_actions": []}')
+    service = AIRecommendationsService(require_api_key=False)
+    service.gateway = _gateway(tmp_path, provider)
+    service.gateway.register("groq", provider)
+    service.llm_enabled = True
+    user_data = {"user_id": "u1", "learning_path_progress": [], "skill_gaps": [], "timestamp": "2026-01-01T00:00:00",
+                 "progress_analysis": {"total_paths": 1, "completed_paths": 0, "in_progress_paths": 1,
+                                       "not_started_paths": 0, "average_progress": 40.0, "total_time_invested": 90,
+                                       "upcoming_deadlines": [{"path_id": "p1", "deadline": "2026-02-01",
+                                                               "days_remaining": 12, "progress": 40}],
+                                       "stalled_paths": [], "high_priority_paths": []}}
+
+    service.generate_recommendations("u1", user_data=user_data)
+    # A day later: new analysis timestamp and day counts, same learning data
+    later = dict(user_data, timestamp="2026-01-02T00:00:00")
+    later["progress_analysis"] = dict(user_data["progress_analysis"], upcoming_deadlines=[
+        {"path_id": "p1", "deadline": "2026-02-01", "days_remaining": 11, "progress": 40}])
+    service.generate_recommendations("u1", user_data=later)
+
+    assert len(provider.calls) == 1
+    assert service.gateway.metrics()["cache"]["hits"] == 1
+
+
+def test_recommendation_prompt_keeps_urgency_and_stalled_days(tmp_path):
+    from backend.app.services.ai_recommendations import AIRecommendationsService
+
+    provider = MockProvider('{"stalled_paths_recovery": [{"path_id": "p2", "stalled_for": "2-4 weeks"}]}')
+    service = AIRecommendationsService(require_api_key=False)
+    service.gateway = _gateway(tmp_path, provider)
+    service.gateway.register("groq", provider)
+    service.llm_enabled = True
+    analysis = {"total_paths": 2, "completed_paths": 0, "in_progress_paths": 2, "not_started_paths": 0,
+                "average_progress": 30.0, "total_time_invested": 90, "high_priority_paths": [],
+                "upcoming_deadlines": [{"path_id": "p1", "deadline": "2026-02-01", "days_remaining": 5, "progress": 20}],
+                "stalled_paths": [{"path_id": "p2", "days_stalled": 20, "current_progress": 40}]}
+    user_data = {"user_id": "u1", "learning_path_progress": [], "skill_gaps": [], "timestamp": "2026-01-27T00:00:00",
+                 "progress_analysis": analysis}
+
+    result = service.generate_recommendations("u1", user_data=user_data)
+    prompt = provider.calls[0][-1]["content"]
+    assert '"urgency": "due within 7 days"' in prompt and '"stalled_for": "2-4 weeks"' in prompt
+    assert result["stalled_paths_recovery"][0]["days_stalled"] == 20
+
+    # The next day: same buckets, so the cached answer is reused with today's count
+    next_day = dict(user_data, progress_analysis=dict(analysis, stalled_paths=[
+        {"path_id": "p2", "days_stalled": 21, "current_progress": 40}]))
+    next_day["progress_analysis"]["upcoming_deadlines"] = [dict(analysis["upcoming_deadlines"][0], days_remaining=4)]
+    assert service.generate_recommendations("u1", user_data=next_day)["stalled_paths_recovery"][0]["days_stalled"] == 21
+    assert len(provider.calls) == 1
+
+    # A deadline that becomes more urgent is a new prompt
+    next_day["progress_analysis"]["upcoming_deadlines"] = [dict(analysis["upcoming_deadlines"][0], days_remaining=3)]
+    service.generate_recommendations("u1", user_data=next_day)
+    assert len(provider.calls) == 2
@@ -0,0 +1,95 @@
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from agent.llm_gateway import LLMGateway, LLMError, MockProvider, RetryBudget, ChatModel
+
+
+def _gateway(provider, **kwargs):
+    kwargs.setdefault("backoff_base", 0)
+    gateway = LLMGateway(**kwargs)
+    gateway.register("mock", provider)
+    return gateway
+
+
+def test_complete_records_tokens_and_latency():
+    provider = MockProvider("three word answer")
+    gateway = _gateway(provider)
+
+    response = gateway.complete("mock", "hello there", system="be brief")
+    assert response.text == "three word answer"
+    assert response.attempts == 1
+    assert provider.calls[0][0] == {"role": "system", "content": "be brief"}
+
+    stats = gateway.metrics()["providers"]["mock"]
+    assert stats["requests"] == 1 and stats["failures"] == 0
+    assert stats["prompt_tokens"] == 4 and stats["completion_tokens"] == 3
+    assert stats["in_flight"] == 0
+
+
+def test_retryable_errors_are_retried():
+    provider = MockProvider([TimeoutError("slow"), ConnectionError("reset"), "ok"])
+    gateway = _gateway(provider, max_retries=2)
+
+    response = gateway.complete("mock", "hi")
+    assert response.text == "ok" and response.attempts == 3
+    assert gateway.metrics()["providers"]["mock"]["retries"] == 2
+
+
+def test_non_retryable_errors_fail_immediately():
+    provider = MockProvider([ValueError("bad request"), "ok"])
+    gateway = _gateway(provider, max_retries=3)
+
+    with pytest.raises(LLMError):
+        gateway.complete("mock", "hi")
+    assert len(provider.calls) == 1
+    assert gateway.metrics()["providers"]["mock"]["failures"] == 1
+
+
+def test_retry_budget_caps_retries_across_requests():
+    provider = MockProvider(TimeoutError("down"))
+    gateway = _gateway(provider, max_retries=5, retry_budget=RetryBudget(ratio=0, min_tokens=3))
+
+    for _ in range(4):
+        with pytest.raises(LLMError):
+            gateway.complete("mock", "hi")
+    # Three retries in total, not five per request
+    assert len(provider.calls) == 4 + 3
+    assert gateway.metrics()["providers"]["mock"]["retries"] == 3
+
+
+def test_concurrency_limit_rejects_when_slots_stay_busy():
+    release = threading.Event()
+    provider = MockProvider(lambda messages: release.wait(5) and "done")
+    gateway = _gateway(provider, max_concurrency=1, queue_timeout=0.05, max_retries=0)
+
+    worker = threading.Thread(target=gateway.complete, args=("mock", "first"))
+    worker.start()
+    try:
+        while gateway.metrics()["providers"]["mock"]["in_flight"] == 0:
+            pass
+        with pytest.raises(LLMError):
+            gateway.complete("mock", "second")
+    finally:
+        release.set()
+        worker.join()
+    stats = gateway.metrics()["providers"]["mock"]
+    assert stats["rejected"] == 1 and stats["in_flight"] == 0
+
+
+def test_chat_model_invoke_and_stream():
+    gateway = _gateway(MockProvider("streamed answer text"))
+    llm = ChatModel("mock", gateway=gateway)
+
+    assert llm.invoke("q").content == "streamed answer text"
+    assert "".join(chunk.content for chunk in llm.stream("q")) == "streamed answer text"
+
+
+def test_forced_provider_answers_every_call():
+    gateway = LLMGateway(force_provider="mock")
+    assert gateway.complete("groq", "hi").provider == "mock"
+    assert list(gateway.metrics()["providers"]) == ["mock"]
@@ -0,0 +1,42 @@
+import os
+import importlib.util
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+spec = importlib.util.spec_from_file_location("profile_startup", os.path.join(ROOT, "scripts", "profile_startup.py"))
+profile_startup = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(profile_startup)
+
+
+def test_parse_importtime_output():
+    stderr = "\n".join([
+        "import time: self [us] | cumulative | imported package",
+        "import time:       120 |        120 |     json.decoder",
+        "import time:       300 |       1420 |   json",
+        "not an importtime line",
+    ])
+    modules = profile_startup.parse_importtime(stderr)
+    assert modules["json"] == {"self_ms": 0.3, "cumulative_ms": 1.42, "depth": 1}
+    assert modules["json.decoder"]["depth"] == 2
+
+
+def test_budgets_and_forbidden_modules_are_reported():
+    result = {
+        "target": "app",
+        "total_ms": 1200.0,
+        "blueprints": [{"name": "conversation", "total_ms": 900.0}, {"name": "user", "total_ms": 5.0}],
+        "modules": ["flask", "langchain.schema"],
+    }
+    violations = profile_startup.check_budgets(result, budget_ms=1000, blueprint_budget_ms=100,
+                                               forbid=["langchain", "torch"])
+    assert len(violations) == 3
+    assert any("conversation" in v for v in violations)
+    assert any("langchain" in v for v in violations)
+    assert profile_startup.check_budgets(result, budget_ms=2000) == []
+
+
+def test_profiles_session_server_end_to_end():
+    result = profile_startup.profile_target("session")
+    assert result["total_ms"] > 0
+    assert "flask" in result["imports"]
+    assert "session_tracking" in result["modules"]
+    assert profile_startup.format_report(result).startswith("Startup profile: session")
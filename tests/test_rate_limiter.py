@@ -0,0 +1,58 @@
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.app.services.rate_limiter import SlidingWindowRateLimiter, SQLiteRateLimiter, create_rate_limiter
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_limiter(request, tmp_path):
+    def _make(max_attempts=3, window_seconds=300, sweep_interval=60):
+        if request.param == "sqlite":
+            return SQLiteRateLimiter(str(tmp_path / "limits.sqlite3"), max_attempts, window_seconds, sweep_interval)
+        return SlidingWindowRateLimiter(max_attempts, window_seconds, sweep_interval)
+    return _make
+
+
+def test_blocks_after_max_attempts_and_reset_clears(make_limiter):
+    limiter = make_limiter()
+    for _ in range(3):
+        assert limiter.allowed("1.2.3.4")
+        limiter.hit("1.2.3.4")
+    assert not limiter.allowed("1.2.3.4")
+    assert limiter.allowed("5.6.7.8")
+
+    limiter.reset("1.2.3.4")
+    assert limiter.allowed("1.2.3.4")
+
+
+def test_attempts_slide_out_of_the_window_and_are_evicted(make_limiter):
+    limiter = make_limiter(max_attempts=2, window_seconds=0.05, sweep_interval=0)
+    limiter.hit("a")
+    limiter.hit("a")
+    assert not limiter.allowed("a")
+
+    time.sleep(0.1)
+    assert limiter.allowed("b")  # triggers a sweep
+    assert limiter.allowed("a")
+    assert limiter.stats()["tracked_keys"] == 0
+
+
+def test_sqlite_backend_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "limits.sqlite3")
+    first = create_rate_limiter(2, 300, backend="sqlite", db_path=path)
+    second = create_rate_limiter(2, 300, backend="sqlite", db_path=path)
+
+    first.hit("9.9.9.9")
+    second.hit("9.9.9.9")
+    assert not first.allowed("9.9.9.9")
+    assert not second.allowed("9.9.9.9")
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        create_rate_limiter(5, 300, backend="redis")
@@ -0,0 +1,118 @@
+import os
+import sys
+import json
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.app.services.recommendation_engine import RecommendationEngine
+from backend.app.services.recommendation_batch import refresh_all_recommendations, read_checkpoint
+
+
+class FakeService:
+    def __init__(self, users=5, llm_enabled=True):
+        self.progress = {f"u{i}": 10 for i in range(users)}
+        self.llm_enabled = llm_enabled
+        self.generated = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+        self.fail_for = set()
+
+    def get_all_users_learning_data(self):
+        return {
+            user_id: {"user_id": user_id, "learning_path_progress": [{"attributes": {"progress_percent": p}}],
+                      "skill_gaps": [], "progress_analysis": {}}
+            for user_id, p in self.progress.items()
+        }
+
+    def _create_fallback_recommendations(self, user_data):
+        return {"kind": "fallback", "metadata": {"fallback": True}}
+
+    def generate_recommendations(self, user_id, user_data=None):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if user_id in self.fail_for:
+                raise RuntimeError("model down")
+            self.generated.append(user_id)
+            return {"kind": "llm", "metadata": {}}
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+@pytest.fixture
+def run(tmp_path):
+    engine = RecommendationEngine(store_file=str(tmp_path / "ai_generated_recommendations.json"))
+    checkpoint = str(tmp_path / "checkpoint.json")
+
+    def _run(service, **kwargs):
+        kwargs.setdefault("max_concurrency", 2)
+        return refresh_all_recommendations(engine, service, checkpoint_file=checkpoint, flush_every=2, **kwargs)
+
+    _run.engine = engine
+    _run.checkpoint = checkpoint
+    return _run
+
+
+def test_generates_everyone_then_only_changed_users(run):
+    service = FakeService()
+    result = run(service)
+    assert result["status"] == "completed"
+    assert result["counts"]["generated"] == 5
+    assert service.max_in_flight <= 2
+    assert run.engine.stored("u3")["recommendations"]["kind"] == "llm"
+
+    service.generated.clear()
+    service.progress["u3"] = 90
+    result = run(service)
+    assert service.generated == ["u3"]
+    assert result["counts"]["unchanged"] == 4
+
+
+def test_without_llm_everyone_gets_fallback(run):
+    result = run(FakeService(llm_enabled=False))
+    assert result["counts"] == {"unchanged": 0, "fallback": 5, "generated": 0, "failed": 0}
+    assert run.engine.stored("u0")["fallback"] is True
+
+
+def test_interrupted_run_resumes_from_checkpoint(run):
+    with open(run.checkpoint, "w") as f:
+        json.dump({"run_id": "r1", "status": "running", "started_at": "2026-01-01T00:00:00",
+                   "done": ["u0", "u1"], "counts": {"unchanged": 0, "fallback": 2, "generated": 2, "failed": 0}}, f)
+    service = FakeService()
+    result = run(service)
+
+    assert result["run_id"] == "r1"
+    assert sorted(service.generated) == ["u2", "u3", "u4"]
+    assert read_checkpoint(run.checkpoint)["done"] == ["u0", "u1", "u2", "u3", "u4"]
+
+
+def test_failed_generation_keeps_fallback_and_counts(run):
+    service = FakeService()
+    service.fail_for = {"u2"}
+    result = run(service)
+    assert result["counts"]["failed"] == 1
+    assert run.engine.stored("u2")["recommendations"]["kind"] == "fallback"
+
+
+def test_resumed_run_retries_failed_users(run):
+    service = FakeService()
+    service.fail_for = {"u2"}
+    first = run(service)
+    assert first["failed"] == ["u2"] and "u2" not in first["done"]
+
+    # As if the run had been interrupted at its end
+    with open(run.checkpoint, "w") as f:
+        json.dump(dict(first, status="running"), f)
+    service.fail_for = set()
+    service.generated.clear()
+    result = run(service)
+    assert result["run_id"] == first["run_id"]
+    assert service.generated == ["u2"]
+    assert result["failed"] == [] and result["counts"]["failed"] == 0
+    assert run.engine.stored("u2")["recommendations"]["kind"] == "llm"
@@ -0,0 +1,110 @@
+import os
+import sys
+import json
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.app.services.recommendation_engine import RecommendationEngine, learning_data_fingerprint
+
+
+class FakeService:
+    def __init__(self):
+        self.progress = 10
+        self.calls = 0
+        self.fallback = False
+
+    def get_user_learning_data(self, user_id):
+        return {
+            "user_id": user_id,
+            "learning_path_progress": [{"attributes": {"user_id": user_id, "progress_percent": self.progress}}],
+            "skill_gaps": [{"skill": "SQL", "gap": 2}],
+            "progress_analysis": {"upcoming_deadlines": [{"path_id": "lp1", "deadline": "2030-01-01",
+                                                          "days_remaining": 100}]},
+            "timestamp": time.time()
+        }
+
+    def generate_recommendations(self, user_id, user_data=None):
+        self.calls += 1
+        return {"priority_actions": [f"call {self.calls}"], "metadata": {"fallback": self.fallback}}
+
+
+@pytest.fixture
+def engine(tmp_path):
+    service = FakeService()
+    engine = RecommendationEngine(lambda: service, str(tmp_path / "ai_generated_recommendations.json"), check_interval=0)
+    engine.fake = service
+    yield engine
+    engine.stop_worker()
+
+
+def test_fingerprint_ignores_drifting_fields():
+    service = FakeService()
+    first = service.get_user_learning_data("u1")
+    second = service.get_user_learning_data("u1")
+    second["progress_analysis"]["upcoming_deadlines"][0]["days_remaining"] = 99
+    assert learning_data_fingerprint(first) == learning_data_fingerprint(second)
+    second["progress_analysis"]["upcoming_deadlines"][0]["days_remaining"] = 3
+    assert learning_data_fingerprint(first) != learning_data_fingerprint(second)
+
+    service.progress = 50
+    assert learning_data_fingerprint(service.get_user_learning_data("u1")) != learning_data_fingerprint(first)
+
+
+def test_refresh_generates_only_when_data_changes(engine):
+    assert engine.refresh("u1") is True
+    assert engine.refresh("u1") is False
+    assert engine.fake.calls == 1
+
+    engine.fake.progress = 60
+    assert engine.refresh("u1") is True
+    assert engine.stored("u1")["recommendations"]["priority_actions"] == ["call 2"]
+
+
+def test_fallback_results_are_retried(engine):
+    engine.fake.fallback = True
+    engine.refresh("u1")
+    engine.fake.fallback = False
+    assert engine.refresh("u1") is True
+    assert engine.stored("u1")["fallback"] is False
+
+
+def test_get_serves_stored_result_and_refreshes_in_background(engine):
+    first = engine.get("u1")
+    assert first["status"] == "pending" and first["recommendations"] is None
+    assert engine.wait("u1", 5)
+
+    ready = engine.get("u1")
+    assert ready["status"] == "ready"
+    assert ready["recommendations"]["priority_actions"] == ["call 1"]
+    assert ready["generated_at"]
+
+    engine.wait("u1", 5)
+    assert engine.fake.calls == 1
+    assert engine.stats()["unchanged"] >= 1
+
+
+def test_results_do_not_share_the_recommendations_file(engine):
+    from backend.app.services.recommendation_engine import RecommendationEngine
+    from backend.app.services.data_access import get_data_file_path
+
+    assert RecommendationEngine().path != get_data_file_path("recommendations.json")
+    engine.refresh("u1")
+    with open(engine.path) as f:
+        assert "u1" in json.load(f)["AI_GENERATED"]
+
+
+def test_service_errors_are_reported(tmp_path):
+    def _missing_key():
+        raise ValueError("Groq API key is required.")
+
+    engine = RecommendationEngine(_missing_key, str(tmp_path / "ai_generated_recommendations.json"))
+    try:
+        engine.get("u1")
+        engine.wait("u1", 5)
+        result = engine.get("u1")
+        assert result["status"] == "error" and "API key" in result["error"]
+    finally:
+        engine.stop_worker()
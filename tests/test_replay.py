@@ -0,0 +1,116 @@
+import os
+import sys
+import json
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from agent import persistence, focus, update_math, replay
+from agent.orchestrator import Supervisor
+
+
+@pytest.fixture
+def dirs(tmp_path, monkeypatch):
+    state, jd_dir, modules_dir = tmp_path / "state", tmp_path / "jd", tmp_path / "modules"
+    for d in (state, jd_dir, modules_dir):
+        d.mkdir()
+    monkeypatch.setattr(persistence, "STATE_DIR", str(state))
+    monkeypatch.setattr(persistence, "JD_DIR", str(jd_dir))
+    monkeypatch.setattr(persistence, "MODULES_DIR", str(modules_dir))
+    monkeypatch.setattr(focus, "MODULES_DIR", str(modules_dir))
+    persistence._audit_indexes.clear()
+    (jd_dir / "de.json").write_text(json.dumps({"role_id": "de", "skills": {
+        "Python": {"required_level": 4, "importance": 3}, "SQL": {"required_level": 3, "importance": 2}}}))
+    (modules_dir / "m_py.json").write_text(json.dumps({"module_id": "m_py", "skills_covered": [
+        {"skill": "Python", "weight": 0.8, "target_level": 4, "has_assessment": True, "pass_threshold": 0.7}]}))
+    (modules_dir / "m_mix.json").write_text(json.dumps({"module_id": "m_mix", "skills_covered": [
+        {"skill": "SQL", "weight": 1.0}, {"skill": "Spark", "weight": 0.6, "target_level": 3}]}))
+    return state
+
+
+def _run_events(users):
+    for n, user_id in enumerate(users):
+        seed = {"user_id": user_id, "role_id": "de", "skills": {
+            "Python": {"level": 1.5 + n / 10, "confidence": 0.4}, "SQL": {"level": 2.0, "confidence": 0.5}}}
+        persistence.save_user_profile(user_id, seed)
+        persistence.append_audit(user_id, {"event_type": "resume_bootstrap", "payload": {"profile": seed}})
+        for i, (module_id, completion, score) in enumerate([("m_py", "passed", 0.9), ("m_mix", "watched", None),
+                                                            ("m_py", "failed", 0.4), ("m_mix", "passed", None)]):
+            event = {"type": "module_completed", "user_id": user_id, "module_id": module_id, "skill": "x",
+                     "target_level": 4, "completion_type": completion, "score": score,
+                     "idempotency_key": f"{user_id}-{i}"}
+            Supervisor().handle_event(dict(event))
+            if i == 0:
+                Supervisor().handle_event(dict(event))  # idempotent replay, not a second update
+
+
+def _profiles(state_dir):
+    return {user_id: persistence.load_user_profile(user_id) for user_id in ("u1", "u2", "u3")}
+
+
+def test_replay_of_unchanged_model_is_a_no_op(dirs):
+    _run_events(["u1", "u2", "u3"])
+    summary = replay.replay_all(workers=1, chunk_size=2)
+    assert (summary["users"], summary["unchanged"], summary["changed"]) == (3, 3, 0)
+
+
+def test_rolled_back_update_is_not_replayed_twice(dirs):
+    _run_events(["u1"])
+    path = dirs / "u1_audit.jsonl"
+    applied = [line for line in path.read_text().splitlines()
+               if '"alpha"' in line and '"u1-3"' in line]
+    # The record appended before a COMMIT that failed, then again when the retry committed
+    path.write_text(path.read_text() + applied[0] + "\n")
+    summary = replay.replay_all(workers=1)
+    assert (summary["unchanged"], summary["changed"]) == (1, 0)
+
+
+def test_replay_matches_live_updates_after_a_coefficient_change(dirs, monkeypatch, tmp_path):
+    _run_events(["u1", "u2", "u3"])
+    (dirs / "legacy_audit.jsonl").write_text(json.dumps({"ts": "t", "event_type": "unknown",
+                                                         "payload": "resume_bootstrap"}) + "\n")
+    monkeypatch.setattr(update_math, "ALPHA_BASE", 0.3)
+    monkeypatch.setattr(update_math, "CONF_SCORE", 0.1)
+
+    seen = []
+    summary = replay.replay_all(workers=2, chunk_size=1, progress=lambda done, total: seen.append((done, total)))
+    assert (summary["changed"], summary["no_baseline"], summary["failed"]) == (3, 1, 0)
+    assert seen[-1] == (4, 4)
+    assert summary["max_level_delta"] > 0
+    replayed = _profiles(dirs)
+
+    # The same events sent through the Supervisor under the new coefficients
+    fresh = tmp_path / "fresh"
+    monkeypatch.setattr(persistence, "STATE_DIR", str(fresh))
+    persistence._audit_indexes.clear()
+    _run_events(["u1", "u2", "u3"])
+    assert replayed == _profiles(fresh)
+
+
+def test_dry_run_reports_without_writing(dirs, monkeypatch):
+    _run_events(["u1"])
+    before = _profiles(dirs)
+    monkeypatch.setattr(update_math, "ALPHA_MAX", 0.3)
+    summary = replay.replay_all(write=False, workers=1)
+    assert summary["changed"] == 1
+    assert set(summary["results"][0]["changes"]) == {"Python", "SQL"}  # Spark alphas stay under the cap
+    assert _profiles(dirs) == before
+
+
+def test_batch_math_matches_scalar_math():
+    np = pytest.importorskip("numpy")
+    cases = [(w, c, h, s, t) for w in (0.2, 1.0, 1.7) for c in ("passed", "failed", "watched", None)
+             for h in (True, False) for s in (None, 0.3, 0.95) for t in (None, 0.7)]
+    scored = [h and s is not None for _, _, h, s, _ in cases]
+    alpha = update_math.compute_alpha_batch(
+        np.array([w for w, *_ in cases]), np.array([c == "passed" for _, c, *_ in cases]),
+        np.array([c == "failed" for _, c, *_ in cases]),
+        np.array([s - t if ok and t is not None else 0.0 for (_, _, _, s, t), ok in zip(cases, scored)]))
+    L, C = update_math.update_skill_batch(np.full(len(cases), 2.3), np.full(len(cases), 0.45), np.full(len(cases), 4.0),
+                                          alpha, np.array([c == "passed" for _, c, *_ in cases]),
+                                          np.array([s if ok else 0.0 for (_, _, _, s, _), ok in zip(cases, scored)]))
+    for i, (w, c, h, s, t) in enumerate(cases):
+        a = update_math.compute_alpha(w, c, h, s, t)
+        assert alpha[i] == a
+        assert (L[i], C[i]) == update_math.update_skill(2.3, 0.45, 4.0, a, c, s, h)
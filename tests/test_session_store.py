@@ -0,0 +1,79 @@
+import os
+import sys
+import json
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.app.services.session_store import SessionStore
+
+
+def _store(tmp_path, **kwargs):
+    kwargs.setdefault("purge_interval", 0)
+    return SessionStore(str(tmp_path / "sessions.log"), **kwargs)
+
+
+def test_create_get_and_revoke(tmp_path):
+    store = _store(tmp_path)
+    token = store.create(" Alice@Example.com ")
+
+    assert store.get(token)["email"] == "alice@example.com"
+    assert store.get("unknown") is None
+    assert store.revoke(token) is True
+    assert store.get(token) is None
+    assert store.revoke(token) is False
+
+
+def test_sessions_expire_after_ttl(tmp_path):
+    store = _store(tmp_path, ttl_seconds=0.05)
+    token = store.create("bob@example.com")
+    time.sleep(0.1)
+    assert store.get(token) is None
+
+
+def test_log_is_shared_between_instances(tmp_path):
+    writer = _store(tmp_path)
+    reader = _store(tmp_path)
+
+    token = writer.create("carol@example.com")
+    assert reader.get(token)["email"] == "carol@example.com"
+
+    # A sign-out in one process ends the session the other has cached
+    writer.revoke(token)
+    assert reader.get(token) is None
+
+    # A fresh process replays the log
+    assert _store(tmp_path).get(token) is None
+
+
+def test_legacy_sessions_json_is_imported_once(tmp_path):
+    legacy = tmp_path / "sessions.json"
+    fresh = (datetime.utcnow() - timedelta(hours=1)).replace(microsecond=0).isoformat() + "Z"
+    stale = (datetime.utcnow() - timedelta(days=30)).replace(microsecond=0).isoformat() + "Z"
+    legacy.write_text(json.dumps({
+        "fresh": {"email": "dana@example.com", "created_at": fresh},
+        "stale": {"email": "erin@example.com", "created_at": stale},
+    }))
+
+    store = _store(tmp_path, legacy_path=str(legacy))
+    assert store.get("fresh")["email"] == "dana@example.com"
+    assert store.get("stale") is None
+
+    # Once the log exists the legacy file is no longer consulted
+    legacy.write_text(json.dumps({"other": {"email": "x@example.com", "created_at": fresh}}))
+    assert _store(tmp_path, legacy_path=str(legacy)).get("other") is None
+
+
+def test_purge_compacts_mostly_dead_log(tmp_path):
+    store = _store(tmp_path)
+    keep = store.create("keep@example.com")
+    for _ in range(150):
+        store.revoke(store.create("gone@example.com"))
+
+    store.purge_expired()
+
+    assert store.stats()["log_records"] == 1
+    with open(store.log_path) as f:
+        assert len(f.readlines()) == 1
+    assert _store(tmp_path).get(keep)["email"] == "keep@example.com"
@@ -0,0 +1,47 @@
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from agent.resume_analyzer import ResumeAnalyzer, SkillMatcher
+
+RESUME = """
+Jane Roe
+Senior Software Engineer
+
+I have 5+ years of experience in Python development, working with Django and Flask frameworks.
+Built multiple web applications using React.js, Node.js and JavaScript. Advanced knowledge of SQL.
+Led a team of 3 developers in creating microservices using Docker. Expert in AWS cloud services.
+Familiar with C# and ASP.NET. Built a Financial Modeling toolkit used by 40% of analysts.
+"""
+
+
+def test_scan_matches_per_pattern_finditer():
+    patterns = [r"\breact\b", r"\breact\.js\b", r"\bjs\b", r"\bnode\.?js\b", r"\b\.net\b",
+                r"\bc#\b", r"\bsupervis\w+\b", r"\bfinancial modeling\b", r"\breact\b"]
+    text = RESUME.lower() + " supervised supervision react react.js"
+    hits = SkillMatcher(patterns).scan(text)
+
+    for pattern in set(patterns):
+        expected = [m.span() for m in re.finditer(pattern, text, re.IGNORECASE)]
+        assert [m.span() for m in hits.get(pattern, [])] == expected, pattern
+
+
+def test_analyze_skills_catalog_and_custom_skills():
+    analyzer = ResumeAnalyzer()
+    skills = analyzer.analyze_skills(RESUME, ["Python", "React", "Docker", "Financial Modeling", "Kubernetes"])
+
+    assert set(skills) == {"Python", "React", "Docker", "Financial Modeling"}
+    assert skills["Python"].years_experience == 5
+    # "Senior"/"Expert" anywhere in the resume sets the base level
+    assert skills["Docker"].proficiency_level == 5.0
+    assert "using React.js" in skills["React"].evidence[0]
+
+
+def test_proficiency_matches_direct_computation():
+    analyzer = ResumeAnalyzer()
+    text = "Basic exposure to docker. Intermediate SQL, built and developed reports."
+    for skill, match in analyzer.analyze_skills(text).items():
+        # Without the precomputed full-text weight the indicators are re-scanned
+        assert match.proficiency_level == analyzer._determine_proficiency(match.evidence, text)
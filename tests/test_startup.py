@@ -0,0 +1,84 @@
+import os
+import sys
+import json
+import time
+import threading
+import subprocess
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.app.services.registry import ServiceRegistry
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Top-level packages that must not be imported while an app is starting up
+HEAVY_MODULES = [
+    "torch", "transformers", "sentence_transformers", "faiss", "numpy",
+    "langchain", "langchain_core", "langchain_community", "langchain_groq", "langchain_google_genai",
+    "groq", "google", "PyPDF2", "docx", "docx2txt",
+]
+
+# Wall-clock budget for importing the app and registering every blueprint
+STARTUP_BUDGET_SECONDS = float(os.getenv("STARTUP_BUDGET_SECONDS", "3.0"))
+
+
+def _import_in_fresh_process(code: str, cwd: str = ROOT) -> dict:
+    script = (
+        "import sys, json, time\n"
+        "started = time.perf_counter()\n"
+        f"{code}\n"
+        "elapsed = time.perf_counter() - started\n"
+        f"heavy = sorted({{m.split('.')[0] for m in sys.modules}} & set({HEAVY_MODULES!r}))\n"
+        "print('RESULT ' + json.dumps({'elapsed': elapsed, 'heavy': heavy}))\n"
+    )
+    env = dict(os.environ, SERVICE_WARMUP="0")
+    out = subprocess.run([sys.executable, "-c", script], cwd=cwd, env=env,
+                         capture_output=True, text=True, timeout=300)
+    assert out.returncode == 0, out.stderr
+    line = [l for l in out.stdout.splitlines() if l.startswith("RESULT ")][-1]
+    return json.loads(line[len("RESULT "):])
+
+
+def test_create_app_loads_no_ml_libraries_and_fits_budget():
+    result = _import_in_fresh_process("from backend.app import create_app\napp = create_app()")
+    assert result["heavy"] == []
+    assert result["elapsed"] < STARTUP_BUDGET_SECONDS
+
+
+def test_auth_and_session_processes_load_no_ml_libraries():
+    backend_dir = os.path.join(ROOT, "backend")
+    assert _import_in_fresh_process("import auth_server", cwd=backend_dir)["heavy"] == []
+    assert _import_in_fresh_process("import session_tracking", cwd=backend_dir)["heavy"] == []
+
+
+def test_service_is_built_once_under_concurrency():
+    registry = ServiceRegistry()
+    builds = []
+
+    def factory():
+        builds.append(1)
+        time.sleep(0.05)
+        return object()
+
+    registry.register("svc", factory)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get("svc"))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(builds) == 1
+    assert all(r is results[0] for r in results)
+
+
+def test_lazy_proxy_and_background_warm_up():
+    registry = ServiceRegistry()
+    registry.register("svc", lambda: type("Svc", (), {"value": 42})())
+    proxy = registry.lazy("svc")
+    assert not registry.is_loaded("svc") and registry.peek("svc") is None
+
+    warmed = threading.Event()
+    registry.warm_up(["svc"], then=warmed.set).join(timeout=5)
+    assert warmed.is_set() and registry.is_loaded("svc")
+    assert proxy.value == 42
@@ -0,0 +1,96 @@
+import os
+import sys
+import json
+
+import pytest
+from flask import Flask
+from werkzeug.security import generate_password_hash
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.app.services import data_access
+from backend.app.services.data_access import UserDirectory
+from backend.app.services.rate_limiter import SlidingWindowRateLimiter
+import backend.app.routes.user_auth as user_auth
+
+PASSWORD = "correct-horse-1"
+
+
+@pytest.fixture
+def users_file(tmp_path):
+    path = tmp_path / "users.json"
+    path.write_text(json.dumps({
+        "ann@example.com": {"email": "ann@example.com", "name": "Ann",
+                            "password_hash": generate_password_hash(PASSWORD)},
+        "legacy-admin": {"email": "Admin@Example.com", "name": "Admin", "password": PASSWORD},
+    }))
+    return path
+
+
+@pytest.fixture
+def writes(monkeypatch):
+    calls = []
+    original = data_access._write_json
+
+    def _counting_write(path, data):
+        calls.append(path)
+        original(path, data)
+
+    monkeypatch.setattr(data_access, "_write_json", _counting_write)
+    return calls
+
+
+@pytest.fixture
+def client(tmp_path, users_file, monkeypatch):
+    monkeypatch.setattr(user_auth, "USERS_FILE", str(users_file))
+    monkeypatch.setattr(user_auth, "SESSIONS_FILE", str(tmp_path / "sessions.json"))
+    monkeypatch.setattr(user_auth, "_login_limiter", SlidingWindowRateLimiter(5, 300))
+    app = Flask(__name__)
+    app.register_blueprint(user_auth.user_auth_bp, url_prefix="/api")
+    return app.test_client()
+
+
+def _sign_in(client, email):
+    return client.post("/api/sign-in", json={"email": email, "password": PASSWORD})
+
+
+def test_find_by_key_and_embedded_email(users_file):
+    directory = UserDirectory(str(users_file))
+    assert directory.find(" ANN@example.com")[0] == "ann@example.com"
+    assert directory.find("admin@example.com")[0] == "legacy-admin"
+    assert directory.find("nobody@example.com") == (None, None)
+
+
+def test_update_writes_only_when_record_changes(users_file, writes):
+    directory = UserDirectory(str(users_file))
+    assert directory.update("ann@example.com", {"name": "Ann"}) is False
+    assert writes == []
+
+    assert directory.update("ann@example.com", {"name": "Annie"}) is True
+    assert len(writes) == 1
+    assert directory.find("ann@example.com")[1]["name"] == "Annie"
+
+
+def test_repeated_sign_in_does_not_rewrite_users(client, users_file, writes):
+    for _ in range(3):
+        resp = _sign_in(client, "ann@example.com")
+        assert resp.status_code == 200 and resp.get_json()["token"]
+    assert str(users_file) not in writes
+
+
+def test_legacy_record_is_rekeyed_and_rehashed_once(client, users_file, writes):
+    assert _sign_in(client, "admin@example.com").status_code == 200
+    assert _sign_in(client, "admin@example.com").status_code == 200
+    assert writes.count(str(users_file)) == 1
+
+    users = json.loads(users_file.read_text())
+    assert "legacy-admin" not in users
+    assert "password" not in users["admin@example.com"]
+    assert users["admin@example.com"]["password_hash"].startswith(("scrypt:", "pbkdf2:"))
+
+
+def test_wrong_password_is_rejected_without_writes(client, users_file, writes):
+    resp = client.post("/api/sign-in", json={"email": "admin@example.com", "password": "wrong-password"})
+    assert resp.status_code == 401
+    assert str(users_file) not in writes
+    assert "legacy-admin" in json.loads(users_file.read_text())
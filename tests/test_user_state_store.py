@@ -0,0 +1,68 @@
+import os
+import sys
+import json
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from agent import persistence
+
+
+@pytest.fixture
+def state_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(persistence, "STATE_DIR", str(tmp_path))
+    monkeypatch.delenv("USER_STATE_DB", raising=False)
+    return tmp_path
+
+
+def test_state_lives_in_one_database(state_dir):
+    persistence.save_user_profile("u1", {"skills": {"Python": {"level": 2.0, "confidence": 0.5}}})
+    persistence.upsert_focus("u1", {"focus": [{"skill": "Python"}]})
+    persistence.save_idempotency("u1", "k1", "hash", {"ok": True})
+
+    assert persistence.load_user_profile("u1")["skills"]["Python"]["level"] == 2.0
+    assert persistence.load_focus("u1") == {"focus": [{"skill": "Python"}]}
+    assert persistence.load_idempotency("u1", "k1")["result"] == {"ok": True}
+    assert persistence.load_user_profile("nobody") is None
+    assert sorted(p.name for p in state_dir.iterdir() if not p.name.endswith(("-wal", "-shm"))) == ["user_state.sqlite3"]
+
+
+def test_failed_transaction_leaves_no_partial_update(state_dir):
+    persistence.save_user_profile("u1", {"v": 1})
+    with pytest.raises(RuntimeError):
+        with persistence.transaction():
+            persistence.save_user_profile("u1", {"v": 2})
+            persistence.upsert_focus("u1", {"focus": []})
+            raise RuntimeError("crash between writes")
+    assert persistence.load_user_profile("u1") == {"v": 1}
+    assert persistence.load_focus("u1") is None
+
+
+def test_legacy_files_are_imported(state_dir):
+    (state_dir / "u1_profile.json").write_text(json.dumps({"v": "legacy"}))
+    (state_dir / "u1_idempotency.json").write_text(json.dumps({"k1": {"payload_hash": "h", "result": {"n": 1}}}))
+    (state_dir / "u2_idempotency.json").write_text(json.dumps(["old-key"]))
+
+    assert persistence.load_user_profile("u1") == {"v": "legacy"}
+    assert persistence.load_idempotency("u1", "k1") == {"payload_hash": "h", "result": {"n": 1},
+                                                        "stored_at": pytest.approx(persistence.time.time(), abs=60)}
+    assert persistence.idempotency_keys("u2") == ["old-key"]
+
+    assert persistence.state_store().migrate(remove=True) == 3
+    assert list(state_dir.glob("*.json")) == []
+    assert persistence.load_user_profile("u1") == {"v": "legacy"}
+
+
+def test_jd_and_module_lookups_are_cached_until_the_file_changes(tmp_path, monkeypatch):
+    monkeypatch.setattr(persistence, "JD_DIR", str(tmp_path))
+    path = tmp_path / "de.json"
+    path.write_text(json.dumps({"v": 1}))
+    first = persistence.get_jd("de")
+    assert persistence.get_jd("de") is first
+
+    path.write_text(json.dumps({"v": 2}))
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1))
+    assert persistence.get_jd("de") == {"v": 2}
+    path.unlink()
+    assert persistence.get_jd("de") is None
@@ -0,0 +1,64 @@
+import os
+import sys
+import json
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.app.services.vector_store_manager import VectorStoreManager, estimate_store_bytes
+
+
+def fake_store(vectors: int, dim: int = 256):
+    docs = {str(i): SimpleNamespace(page_content="x" * 100) for i in range(vectors)}
+    return SimpleNamespace(index=SimpleNamespace(ntotal=vectors, d=dim), docstore=SimpleNamespace(_dict=docs))
+
+
+def test_size_estimate_counts_vectors_and_text():
+    assert estimate_store_bytes(fake_store(10, dim=4)) == 10 * 4 * 4 + 10 * 100 + 10 * 512
+
+
+def test_least_recently_used_store_is_evicted_over_budget():
+    one_store = estimate_store_bytes(fake_store(100))
+    manager = VectorStoreManager(memory_budget_bytes=int(one_store * 2.5))
+    loads = []
+
+    def loader(department_id):
+        loads.append(department_id)
+        return fake_store(100)
+
+    manager.get("A", loader)
+    manager.get("B", loader)
+    manager.get("A", loader)          # A is now most recently used
+    manager.get("C", loader)          # over budget: B goes
+
+    assert "B" not in manager and "A" in manager and "C" in manager
+    assert manager.stats()["evictions"] == 1
+    assert manager.resident_bytes() <= manager.memory_budget_bytes
+
+    manager.get("B", loader)
+    assert loads == ["A", "B", "C", "B"]
+
+
+def test_oversized_store_is_still_served():
+    manager = VectorStoreManager(memory_budget_bytes=1)
+    manager.get("A", lambda d: fake_store(10))
+    store = manager.get("B", lambda d: fake_store(10))
+    assert manager["B"] is store
+    assert len(manager) == 1
+
+
+def test_usage_is_persisted_and_drives_prewarm(tmp_path):
+    usage_file = tmp_path / "usage.json"
+    manager = VectorStoreManager(memory_budget_bytes=10 ** 9, usage_file=usage_file, usage_flush_every=1)
+    for department_id in ["KYC", "KYC", "KYC", "ENG", "ENG", "DS"]:
+        manager.get(department_id, lambda d: fake_store(1))
+    assert json.loads(usage_file.read_text()) == {"KYC": 3, "ENG": 2, "DS": 1}
+
+    restarted = VectorStoreManager(memory_budget_bytes=10 ** 9, usage_file=usage_file)
+    assert restarted.most_queried(2) == ["KYC", "ENG"]
+
+    thread = restarted.prewarm(lambda d: fake_store(1), limit=2, exists=lambda d: d != "ENG")
+    thread.join(timeout=5)
+    assert "KYC" in restarted and "ENG" not in restarted and "DS" not in restarted
+    # Prewarm loads are not counted as queries
+    assert restarted.query_counts["KYC"] == 3
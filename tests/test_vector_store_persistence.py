@@ -0,0 +1,136 @@
+import os
+import sys
+import json
+import hashlib
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+pytest.importorskip("faiss")
+np = pytest.importorskip("numpy")
+
+from langchain.schema import Document
+from langchain_core.embeddings import Embeddings
+from langchain_community.vectorstores import FAISS
+from backend.app.services.vector_store_persistence import VectorStorePersistence
+
+
+class FakeEmbeddings(Embeddings):
+    def _embed(self, text):
+        digest = hashlib.sha256(text.encode('utf-8')).digest()
+        return [b / 255.0 for b in digest[:16]]
+
+    def embed_documents(self, texts):
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+def _docs(*texts):
+    return [Document(page_content=t, metadata={"type": "chunk", "text": t}) for t in texts]
+
+
+def _append(persistence, store_path, store, docs):
+    vectors = FakeEmbeddings().embed_documents([d.page_content for d in docs])
+    return persistence.append(store_path, store, docs, vectors)
+
+
+def _new_store():
+    return FAISS.from_texts(["placeholder"], FakeEmbeddings(), metadatas=[{"type": "system"}])
+
+
+def test_first_append_snapshots_then_segments(tmp_path):
+    persistence = VectorStorePersistence()
+    store_path = tmp_path / "vector_store_TEST"
+    store = _new_store()
+
+    _append(persistence, store_path, store, _docs("alpha", "beta"))
+    manifest = persistence.read_manifest(store_path)
+    assert manifest["base"] == "base_000001"
+    assert manifest["segments"] == []
+
+    _append(persistence, store_path, store, _docs("gamma", "delta"))
+    manifest = persistence.read_manifest(store_path)
+    assert manifest["segments"] == ["seg_000001"]
+    with open(store_path / "segments" / "seg_000001.json") as f:
+        assert [r["page_content"] for r in json.load(f)] == ["gamma", "delta"]
+
+    reloaded = persistence.load(store_path, FakeEmbeddings())
+    assert len(reloaded.docstore._dict) == len(store.docstore._dict) == 5
+    assert reloaded.similarity_search("delta", k=1)[0].page_content == "delta"
+
+
+def test_uncommitted_segment_is_ignored(tmp_path):
+    persistence = VectorStorePersistence()
+    store_path = tmp_path / "vector_store_TEST"
+    store = _new_store()
+    _append(persistence, store_path, store, _docs("alpha"))
+
+    # Simulate a crash after writing segment files but before the manifest commit
+    segments_dir = store_path / "segments"
+    segments_dir.mkdir(exist_ok=True)
+    np.save(segments_dir / "seg_000009.npy", np.zeros((1, 16), dtype=np.float32))
+    (segments_dir / "seg_000009.json").write_text("[{\"truncated")
+
+    reloaded = persistence.load(store_path, FakeEmbeddings())
+    assert len(reloaded.docstore._dict) == 2
+    assert not (segments_dir / "seg_000009.json").exists()
+
+
+def test_segments_are_merged_after_limit(tmp_path):
+    persistence = VectorStorePersistence(max_segments=2)
+    store_path = tmp_path / "vector_store_TEST"
+    store = _new_store()
+    for text in ["a", "b", "c", "d"]:
+        _append(persistence, store_path, store, _docs(text))
+
+    manifest = persistence.read_manifest(store_path)
+    assert manifest["base"] == "base_000002"
+    assert manifest["segments"] == []
+    assert not any((store_path / "segments").iterdir())
+    assert not (store_path / "base_000001").exists()
+    assert len(persistence.load(store_path, FakeEmbeddings()).docstore._dict) == 5
+
+
+def test_legacy_layout_is_loaded_and_replaced(tmp_path):
+    persistence = VectorStorePersistence()
+    store_path = tmp_path / "vector_store_TEST"
+    store = _new_store()
+    store.save_local(str(store_path))
+
+    loaded = persistence.load(store_path, FakeEmbeddings())
+    _append(persistence, store_path, loaded, _docs("alpha"))
+    assert persistence.read_manifest(store_path)["segments"] == ["seg_000001"]
+
+    persistence.compact(store_path, loaded)
+    assert not (store_path / "index.faiss").exists()
+    assert len(persistence.load(store_path, FakeEmbeddings()).docstore._dict) == 2
+
+
+def test_keyword_index_is_saved_as_deltas_between_snapshots(tmp_path):
+    from backend.app.services.keyword_index import KeywordIndex, INDEX_FILE
+
+    persistence = VectorStorePersistence(max_segments=2)
+    store_path = tmp_path / "vector_store_TEST"
+    store = _new_store()
+    store.keyword_index = KeywordIndex.build(store)
+
+    _append(persistence, store_path, store, _docs("policy FIN-7731 approvals"))
+    full = (store_path / INDEX_FILE).read_text()
+    _append(persistence, store_path, store, _docs("cafeteria breakfast"))
+    _append(persistence, store_path, store, _docs("compliance training"))
+    # Ingests after the snapshot leave the full index alone and write only their postings
+    assert (store_path / INDEX_FILE).read_text() == full
+    deltas = persistence.keyword_deltas(store_path)
+    assert [p.name for p in deltas] == ["seg_000001.bm25.json", "seg_000002.bm25.json"]
+
+    reloaded = persistence.load(store_path, FakeEmbeddings())
+    loaded = KeywordIndex.load(store_path, deltas)
+    assert set(loaded.doc_lengths) == set(reloaded.docstore._dict)
+    assert loaded.search("cafeteria") == store.keyword_index.search("cafeteria")
+
+    # The next snapshot folds the deltas back into the full index
+    _append(persistence, store_path, store, _docs("expense tooling"))
+    assert persistence.keyword_deltas(store_path) == []
+    assert len(KeywordIndex.load(store_path)) == len(store.docstore._dict) == 5